@@ -0,0 +1,52 @@
+# benchmarks/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stubs import StubServer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def stubbed_markpost(stub_server, tmp_path, monkeypatch):
+    """Point every markpost client at the stub server, with limits high enough not to throttle."""
+    import boto3
+
+    from markpost import server
+    from markpost.publishers import threads, twitter
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("""
+[twitter]
+consumer_key = "k"
+consumer_secret = "s"
+access_token = "a"
+access_token_secret = "as"
+rate_limit = 1000000000
+
+[threads]
+access_token = "t"
+user_id = "1"
+rate_limit = 1000000000
+
+[blog]
+s3_bucket = "bench"
+base_url = "https://blog.example.com"
+""")
+    monkeypatch.setenv("MARKPOST_CONFIG", str(config_file))
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "bench")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "bench")
+    monkeypatch.setattr(threads, "THREADS_API_BASE", f"{stub_server.url}/v1.0")
+    monkeypatch.setattr(twitter, "TWITTER_API_BASE", f"{stub_server.url}/2")
+
+    s3 = boto3.client("s3", region_name="us-east-1", endpoint_url=stub_server.url)
+    monkeypatch.setattr(server.clients, "s3", lambda config: s3)
+    yield server
@@ -0,0 +1,80 @@
+# benchmarks/corpora.py
+"""Inputs for the formatter benchmarks: realistic posts and adversarial strings."""
+from __future__ import annotations
+
+import random
+
+TARGET_SIZE = 100_000
+
+
+def realistic_post(size: int = TARGET_SIZE, seed: int = 1) -> str:
+    """A long-form post mixing headings, prose, lists, links, emphasis and code."""
+    rnd = random.Random(seed)
+    words = (
+        "the quick brown fox jumps over lazy dogs while markdown parsers split threads "
+        "into sentences and publish posts to several platforms with retries and limits"
+    ).split()
+
+    def sentence() -> str:
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(6, 18)))
+        if rnd.random() < 0.3:
+            text += f" with *emphasis* and a [link](https://example.com/{rnd.randint(1, 999)})"
+        if rnd.random() < 0.15:
+            text += " using `inline_code()`"
+        return text.capitalize() + rnd.choice(".!?")
+
+    blocks = []
+    length = 0
+    while length < size:
+        kind = rnd.random()
+        if kind < 0.1:
+            block = f"## {sentence()[:-1]}"
+        elif kind < 0.25:
+            block = "\n".join(f"- {sentence()}" for _ in range(rnd.randint(2, 5)))
+        elif kind < 0.3:
+            block = "```python\n" + "\n".join(f"value_{i} = compute({i})" for i in range(5)) + "\n```"
+        elif kind < 0.33:
+            block = "---"
+        else:
+            block = " ".join(sentence() for _ in range(rnd.randint(2, 6)))
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def emphasis_heavy(size: int = TARGET_SIZE) -> str:
+    """Dense, partly unbalanced emphasis and code markers."""
+    unit = "**bold** *it* _u_ __b__ *open `tick ``two`` [x](y) ![i](j) "
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def no_whitespace(size: int = TARGET_SIZE) -> str:
+    """One enormous word: forces hard splits in split_into_thread."""
+    return "x" * size
+
+
+def unbalanced_brackets(size: int = TARGET_SIZE) -> str:
+    """Opening brackets that never close."""
+    return "[" * size
+
+
+def sentence_soup(size: int = TARGET_SIZE) -> str:
+    """Many tiny sentences separated by irregular whitespace."""
+    unit = "Hi.\nYo!  Ok?\t"
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# Python-Markdown's inline patterns are roughly quadratic on these inputs
+# (100 KB of "[" takes minutes), so markdown_to_html benchmarks a prefix.
+HTML_LIMITS = {
+    "emphasis_heavy": 10_000,
+    "unbalanced_brackets": 2_000,
+}
+
+CORPORA = {
+    "realistic": realistic_post,
+    "emphasis_heavy": emphasis_heavy,
+    "no_whitespace": no_whitespace,
+    "unbalanced_brackets": unbalanced_brackets,
+    "sentence_soup": sentence_soup,
+}
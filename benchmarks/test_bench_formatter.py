@@ -0,0 +1,49 @@
+# benchmarks/test_bench_formatter.py
+import pytest
+
+from corpora import CORPORA, HTML_LIMITS
+
+from markpost.formatter import markdown_to_html, markdown_to_plain, split_into_thread
+from markpost.publishers.threads import THREADS_CHAR_LIMIT, THREADS_LENGTH
+from markpost.publishers.twitter import TWITTER_CHAR_LIMIT, TWITTER_LENGTH
+
+
+@pytest.fixture(params=sorted(CORPORA), scope="module")
+def corpus(request):
+    return request.param, CORPORA[request.param]()
+
+
+def test_markdown_to_plain(benchmark, corpus):
+    name, text = corpus
+    benchmark.group = f"markdown_to_plain: {name}"
+    benchmark(markdown_to_plain, text)
+
+
+@pytest.mark.parametrize("max_chars", [280, 500])
+def test_split_into_thread(benchmark, corpus, max_chars):
+    name, text = corpus
+    benchmark.group = f"split_into_thread: {name}"
+    plain = markdown_to_plain(text)
+    parts = benchmark(split_into_thread, plain, max_chars)
+    assert all(len(part) <= max_chars for part in parts)
+
+
+@pytest.mark.parametrize(
+    ("max_chars", "length"),
+    [(TWITTER_CHAR_LIMIT, TWITTER_LENGTH), (THREADS_CHAR_LIMIT, THREADS_LENGTH)],
+    ids=["twitter", "threads"],
+)
+def test_split_into_thread_platform_length(benchmark, corpus, max_chars, length):
+    name, text = corpus
+    benchmark.group = f"split_into_thread (platform length): {name}"
+    plain = markdown_to_plain(text)
+    parts = benchmark(split_into_thread, plain, max_chars, length)
+    assert all(length(part) <= max_chars for part in parts)
+
+
+def test_markdown_to_html(benchmark, corpus):
+    name, text = corpus
+    text = text[: HTML_LIMITS.get(name)]
+    benchmark.group = f"markdown_to_html: {name}"
+    benchmark.extra_info["size"] = len(text)
+    benchmark(markdown_to_html, text, "Benchmark")
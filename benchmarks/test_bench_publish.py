@@ -0,0 +1,32 @@
+# benchmarks/test_bench_publish.py
+import asyncio
+import itertools
+
+import pytest
+
+from corpora import realistic_post
+
+# Short enough for a few thread parts per platform, like a typical post.
+POST = realistic_post(size=1500, seed=7)
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.mark.benchmark(group="publish_post")
+@pytest.mark.parametrize("platforms", [["twitter"], ["threads"], ["blog"], ["twitter", "threads", "blog"]], ids="+".join)
+def test_publish_post(benchmark, stubbed_markpost, run, platforms):
+    counter = itertools.count()
+
+    def publish():
+        # Unique content each round, so neither the replay cache nor thread
+        # checkpoints short-circuit the publish.
+        content = f"{POST}\n\nRun {next(counter)}."
+        result = run(stubbed_markpost.publish_post.fn(content=content, title="Bench", platforms=platforms))
+        assert "errors" not in result, result
+
+    benchmark(publish)
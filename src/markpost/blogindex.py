@@ -0,0 +1,157 @@
+# src/markpost/blogindex.py
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+from html import escape
+from xml.sax.saxutils import escape as xml_escape
+
+from markpost.config import BlogConfig
+from markpost.publishers.blog import BlogObject
+from markpost.store import SQLiteStore
+
+# Posts listed on index.html and in feed.xml.
+INDEX_SIZE = 50
+FEED_SIZE = 20
+
+
+class PostIndex(SQLiteStore):
+    """Every published blog post, so the index page, feed and sitemaps can be
+    rebuilt from local state instead of by listing the bucket.
+
+    Sitemaps are split by month; publishing a post only touches its month.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS posts (
+        bucket TEXT NOT NULL,
+        url TEXT NOT NULL,
+        title TEXT NOT NULL,
+        published TEXT NOT NULL,
+        month TEXT NOT NULL,
+        PRIMARY KEY (bucket, url)
+    );
+    CREATE INDEX IF NOT EXISTS posts_by_date ON posts (bucket, published);
+    CREATE INDEX IF NOT EXISTS posts_by_month ON posts (bucket, month);
+    CREATE TABLE IF NOT EXISTS months (
+        bucket TEXT NOT NULL,
+        month TEXT NOT NULL,
+        PRIMARY KEY (bucket, month)
+    );
+    """
+
+    def add(self, bucket: str, url: str, title: str, published: date) -> str:
+        """Record a post (replacing one at the same URL) and return its month."""
+        month = published.strftime("%Y-%m")
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO posts (bucket, url, title, published, month) VALUES (?, ?, ?, ?, ?)",
+                (bucket, url, title, published.isoformat(), month),
+            )
+            conn.execute("INSERT OR IGNORE INTO months (bucket, month) VALUES (?, ?)", (bucket, month))
+        return month
+
+    def recent(self, bucket: str, limit: int) -> list[dict]:
+        rows = self.execute(
+            "SELECT url, title, published FROM posts WHERE bucket = ? ORDER BY published DESC, url DESC LIMIT ?",
+            (bucket, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def in_month(self, bucket: str, month: str) -> list[dict]:
+        rows = self.execute(
+            "SELECT url, title, published FROM posts WHERE bucket = ? AND month = ? ORDER BY published, url",
+            (bucket, month),
+        )
+        return [dict(row) for row in rows]
+
+    def months(self, bucket: str) -> list[str]:
+        rows = self.execute("SELECT month FROM months WHERE bucket = ? ORDER BY month", (bucket,))
+        return [row["month"] for row in rows]
+
+
+def site_files(index: PostIndex, config: BlogConfig, months: set[str]) -> list[BlogObject]:
+    """Index page, feed, sitemap index and the sitemaps for the given months.
+
+    The work is bounded by INDEX_SIZE, FEED_SIZE, the number of months and
+    the posts in the given months, never by the size of the whole archive.
+    """
+    recent = index.recent(config.s3_bucket, max(INDEX_SIZE, FEED_SIZE))
+    files = [
+        BlogObject("index.html", render_index(recent[:INDEX_SIZE], config)),
+        BlogObject("feed.xml", render_feed(recent[:FEED_SIZE], config), "application/rss+xml"),
+        BlogObject("sitemap.xml", render_sitemap_index(index.months(config.s3_bucket), config), "application/xml"),
+    ]
+    for month in sorted(months):
+        posts = index.in_month(config.s3_bucket, month)
+        files.append(BlogObject(f"sitemaps/{month}.xml", render_sitemap(posts), "application/xml"))
+    return files
+
+
+def render_index(posts: list[dict], config: BlogConfig) -> str:
+    items = "\n".join(
+        f'<li><time datetime="{post["published"]}">{post["published"]}</time> '
+        f'<a href="{escape(post["url"])}">{escape(post["title"])}</a></li>'
+        for post in posts
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(config.site_title)}</title>
+<link rel="alternate" type="application/rss+xml" href="{escape(_site_url(config, "feed.xml"))}">
+</head>
+<body>
+<h1>{escape(config.site_title)}</h1>
+<ul>
+{items}
+</ul>
+</body>
+</html>"""
+
+
+def render_feed(posts: list[dict], config: BlogConfig) -> str:
+    items = "\n".join(
+        f"<item><title>{xml_escape(post['title'])}</title><link>{xml_escape(post['url'])}</link>"
+        f"<guid>{xml_escape(post['url'])}</guid><pubDate>{_rfc822(post['published'])}</pubDate></item>"
+        for post in posts
+    )
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0">
+<channel>
+<title>{xml_escape(config.site_title)}</title>
+<link>{xml_escape(_site_url(config, "index.html"))}</link>
+<description>{xml_escape(config.site_title)}</description>
+{items}
+</channel>
+</rss>"""
+
+
+def render_sitemap(posts: list[dict]) -> str:
+    urls = "\n".join(
+        f"<url><loc>{xml_escape(post['url'])}</loc><lastmod>{post['published']}</lastmod></url>" for post in posts
+    )
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{urls}
+</urlset>"""
+
+
+def render_sitemap_index(months: list[str], config: BlogConfig) -> str:
+    sitemaps = "\n".join(
+        f"<sitemap><loc>{xml_escape(_site_url(config, f'sitemaps/{month}.xml'))}</loc></sitemap>" for month in months
+    )
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{sitemaps}
+</sitemapindex>"""
+
+
+def _site_url(config: BlogConfig, key: str) -> str:
+    return f"{config.base_url.rstrip('/')}/{config.s3_prefix}{key}"
+
+
+def _rfc822(published: str) -> str:
+    day = date.fromisoformat(published)
+    return format_datetime(datetime(day.year, day.month, day.day, tzinfo=timezone.utc))
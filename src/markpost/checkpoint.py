@@ -0,0 +1,81 @@
+# src/markpost/checkpoint.py
+from __future__ import annotations
+
+import hashlib
+import time
+
+from markpost.store import SQLiteStore
+
+# Checkpoints older than this are pruned; re-posting the same content
+# after that starts a fresh thread.
+CHECKPOINT_TTL = 7 * 24 * 3600
+
+
+def thread_digest(parts: list[str]) -> str:
+    """Stable hash of a split thread, used to recognise a repeat publish."""
+    h = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode()
+        h.update(len(encoded).to_bytes(8, "big"))
+        h.update(encoded)
+    return h.hexdigest()
+
+
+def account_key(secret: str) -> str:
+    """Identify an account without storing its credentials."""
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+class CheckpointStore(SQLiteStore):
+    """Posted part IDs per (platform, account, thread digest).
+
+    Each part is recorded as soon as it is live, so publishing the same
+    thread again continues the reply chain from the last posted part
+    instead of duplicating what's already up.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        platform TEXT NOT NULL,
+        account TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        post_id TEXT NOT NULL,
+        posted_at REAL NOT NULL,
+        PRIMARY KEY (platform, account, digest, idx)
+    );
+    CREATE INDEX IF NOT EXISTS checkpoints_posted_at ON checkpoints (posted_at);
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.prune()
+
+    def posted(self, platform: str, account: str, digest: str) -> list[str]:
+        """IDs of the leading run of posted parts, in order."""
+        rows = self.execute(
+            "SELECT idx, post_id FROM checkpoints WHERE platform = ? AND account = ? AND digest = ? ORDER BY idx",
+            (platform, account, digest),
+        )
+        posted: list[str] = []
+        for row in rows:
+            if row["idx"] != len(posted):
+                break
+            posted.append(row["post_id"])
+        return posted
+
+    def record(self, platform: str, account: str, digest: str, index: int, post_id: str) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO checkpoints (platform, account, digest, idx, post_id, posted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (platform, account, digest, index, post_id, time.time()),
+        )
+
+    def prune(self, max_age: float = CHECKPOINT_TTL) -> None:
+        """Forget threads whose last part was posted more than max_age seconds ago."""
+        self.execute(
+            "DELETE FROM checkpoints WHERE (platform, account, digest) IN ("
+            "SELECT platform, account, digest FROM checkpoints "
+            "GROUP BY platform, account, digest HAVING MAX(posted_at) < ?)",
+            (time.time() - max_age,),
+        )
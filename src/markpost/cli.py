@@ -0,0 +1,344 @@
+# src/markpost/cli.py
+"""Command-line interface: `markpost build` renders a directory of Markdown posts."""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from markpost.blogindex import PostIndex, site_files
+from markpost.config import BlogConfig, load_config
+from markpost.manifest import BlogManifest
+from markpost.publishers.blog import BlogObject, post_key, post_url, slugify, upload_to_blog
+from markpost.store import SQLiteStore
+from markpost.templates import layout_files, render_blog_page
+
+BUILD_DB = "build.sqlite3"
+BLOG_MANIFEST_DB = "blog_manifest.sqlite3"
+POST_INDEX_DB = "posts.sqlite3"
+SOURCE_SUFFIXES = frozenset({".md", ".markdown"})
+# Below this many changed sources, rendering in-process beats starting a pool.
+PARALLEL_THRESHOLD = 32
+
+_DATE_PREFIX = re.compile(r"(\d{4}-\d{2}-\d{2})-")
+_TITLE = re.compile(r"^#[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+
+
+class BuildState(SQLiteStore):
+    """What each source looked like when it was last built for a target."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sources (
+        target TEXT NOT NULL,
+        key TEXT NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        PRIMARY KEY (target, key)
+    );
+    CREATE TABLE IF NOT EXISTS source_dates (
+        path TEXT PRIMARY KEY,
+        published TEXT NOT NULL
+    );
+    """
+
+    def get(self, target: str, key: str) -> dict | None:
+        rows = self.execute("SELECT * FROM sources WHERE target = ? AND key = ?", (target, key))
+        return dict(rows[0]) if rows else None
+
+    def record(self, target: str, key: str, mtime_ns: int, size: int, hash: str, fingerprint: str) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO sources (target, key, mtime_ns, size, hash, fingerprint) VALUES (?, ?, ?, ?, ?, ?)",
+            (target, key, mtime_ns, size, hash, fingerprint),
+        )
+
+    def published(self, path: str, default: date) -> date:
+        """The date first given to an undated source, recording default if it has none yet."""
+        self.execute("INSERT OR IGNORE INTO source_dates (path, published) VALUES (?, ?)", (path, default.isoformat()))
+        rows = self.execute("SELECT published FROM source_dates WHERE path = ?", (path,))
+        return date.fromisoformat(rows[0]["published"])
+
+
+@dataclass(frozen=True)
+class Source:
+    path: Path
+    # Output key relative to the blog prefix, as publish_post names it, e.g. "2024-01-02-hello.html".
+    key: str
+    slug: str
+    published: date
+    mtime_ns: int
+    size: int
+
+
+def find_sources(root: Path, state: BuildState | None = None) -> list[Source]:
+    """Every Markdown file under root, in a stable order.
+
+    A file named YYYY-MM-DD-<slug>.md maps to the page publish_post
+    wrote for that date and slug. A file without a date prefix is dated
+    by its modification time when it is first seen; with a BuildState,
+    that date is kept, so later edits replace the same page.
+    """
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            if path.suffix.lower() not in SOURCE_SUFFIXES:
+                continue
+            stat = path.stat()
+            published, name = _date_prefix(path.stem)
+            if published is None:
+                published = date.fromtimestamp(stat.st_mtime_ns / 1e9)
+                if state is not None:
+                    published = state.published(str(path.resolve()), published)
+            slug = slugify(name) or "post"
+            sources.append(Source(path, post_key(slug, published), slug, published, stat.st_mtime_ns, stat.st_size))
+    return sources
+
+
+def render_fingerprint(config: BlogConfig) -> str:
+    """Hash of every setting and layout file that affects rendered pages.
+
+    When it changes (e.g. a template edit), every source is rebuilt.
+    """
+    digest = hashlib.sha256(
+        json.dumps([config.markdown_extensions, config.layout, config.site_title, config.base_url]).encode()
+    )
+    if config.layout:
+        layout_dir = Path(config.layout).expanduser().resolve().parent
+        for path in layout_files(config.layout):
+            digest.update(path.relative_to(layout_dir).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def render_source(text: str, slug: str, title: str, published: date, config: BlogConfig) -> str:
+    """Render one source to a page. Runs in worker processes."""
+    return render_blog_page(text, title, slug, published, config)
+
+
+def build(
+    root: Path,
+    config: BlogConfig,
+    state: BuildState,
+    out: Path | None = None,
+    client=None,
+    manifest: BlogManifest | None = None,
+    workers: int | None = None,
+    force: bool = False,
+    index: PostIndex | None = None,
+) -> dict:
+    """Render every changed source under root into out, or upload it to the blog bucket.
+
+    Pages get the same keys publish_post gives them, so rebuilding after
+    a template change replaces the published pages. With a post index,
+    uploaded pages are recorded in it and the site's index, feed and
+    sitemaps are refreshed, as publish_post does; a local build writes
+    the pages only.
+
+    A source is skipped when its mtime and size, or failing that its
+    content hash, match the last build for the same target and the
+    render settings are unchanged. Returns the keys that were "built" and
+    "skipped", and per-key "errors".
+    """
+    target = str(out.resolve()) if out is not None else f"s3://{config.s3_bucket}/{config.s3_prefix}"
+    fingerprint = render_fingerprint(config)
+
+    pending: list[tuple[Source, str, str]] = []
+    skipped: list[str] = []
+    errors: dict[str, str] = {}
+    seen: dict[str, Path] = {}
+    for source in find_sources(root, state):
+        if source.key in seen:
+            errors[source.path.relative_to(root).as_posix()] = (
+                f"same page as {seen[source.key].relative_to(root).as_posix()}: {source.key}"
+            )
+            continue
+        seen[source.key] = source.path
+
+        previous = state.get(target, source.key)
+        up_to_date = not force and previous is not None and previous["fingerprint"] == fingerprint
+        if up_to_date and out is not None and not (out / source.key).exists():
+            up_to_date = False
+        if up_to_date and (previous["mtime_ns"], previous["size"]) == (source.mtime_ns, source.size):
+            skipped.append(source.key)
+            continue
+
+        text = source.path.read_text(encoding="utf-8")
+        content_hash = hashlib.sha256(text.encode()).hexdigest()
+        if up_to_date and previous["hash"] == content_hash:
+            # Touched but not edited; remember the new mtime so the next build skips it on stat alone.
+            state.record(target, source.key, source.mtime_ns, source.size, content_hash, fingerprint)
+            skipped.append(source.key)
+            continue
+        pending.append((source, text, content_hash))
+
+    titles = {source.key: _title(text, source) for source, text, _ in pending}
+    jobs = [
+        (source.key, text, source.slug, titles[source.key], source.published, config) for source, text, _ in pending
+    ]
+    pages, render_errors = _render_all(jobs, workers)
+    errors.update(render_errors)
+
+    if out is not None:
+        for key, html in pages.items():
+            path = out / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(html, encoding="utf-8")
+    else:
+        uploaded = upload_to_blog(
+            [BlogObject(key, html) for key, html in pages.items()], config, client=client, manifest=manifest
+        )
+        for key, entry in uploaded.items():
+            if "error" in entry:
+                errors[key.removeprefix(config.s3_prefix)] = entry["error"]
+
+    built = []
+    months = set()
+    for source, _, content_hash in pending:
+        if source.key in pages and source.key not in errors:
+            state.record(target, source.key, source.mtime_ns, source.size, content_hash, fingerprint)
+            built.append(source.key)
+            if out is None and index is not None:
+                url = post_url(config.s3_prefix + source.key, config)
+                months.add(index.add(config.s3_bucket, url, titles[source.key], source.published))
+
+    if months:
+        uploaded = upload_to_blog(site_files(index, config, months), config, client=client, manifest=manifest)
+        for key, entry in uploaded.items():
+            if "error" in entry:
+                errors[key.removeprefix(config.s3_prefix)] = entry["error"]
+
+    return {"built": built, "skipped": skipped, "errors": errors}
+
+
+def _render_all(jobs: list[tuple], workers: int | None) -> tuple[dict[str, str], dict[str, str]]:
+    pages: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    if not jobs:
+        return pages, errors
+
+    if workers == 1 or len(jobs) < PARALLEL_THRESHOLD:
+        results = map(_render_job, jobs)
+        for key, html, error in results:
+            _collect(key, html, error, pages, errors)
+        return pages, errors
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        for key, html, error in pool.map(_render_job, jobs, chunksize=chunksize):
+            _collect(key, html, error, pages, errors)
+    return pages, errors
+
+
+def _render_job(job: tuple) -> tuple[str, str | None, str | None]:
+    key = job[0]
+    try:
+        return key, render_source(*job[1:]), None
+    except Exception as e:
+        return key, None, f"{type(e).__name__}: {e}"
+
+
+def _collect(key: str, html: str | None, error: str | None, pages: dict, errors: dict) -> None:
+    if error is None:
+        pages[key] = html
+    else:
+        errors[key] = error
+
+
+def _title(text: str, source: Source) -> str:
+    """The first level-one heading, or the file name."""
+    match = _TITLE.search(text)
+    return match.group(1) if match else source.path.stem
+
+
+def _date_prefix(stem: str) -> tuple[date | None, str]:
+    """The date a file name starts with (YYYY-MM-DD-...) and the rest of the name, or None and the whole name."""
+    match = _DATE_PREFIX.match(stem)
+    if match:
+        try:
+            return date.fromisoformat(match.group(1)), stem[match.end():]
+        except ValueError:
+            pass
+    return None, stem
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="markpost", description="Markpost command-line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Render a directory of Markdown posts to HTML.")
+    build_parser.add_argument("source", type=Path, help="Directory containing .md files")
+    build_parser.add_argument(
+        "--out", type=Path, help="Write pages here instead of uploading to the blog bucket (pages only, no site index)"
+    )
+    build_parser.add_argument("--config", type=Path, help="Config file (default: MARKPOST_CONFIG or ~/.markpost/config.toml)")
+    build_parser.add_argument("--workers", type=int, help="Render processes (default: one per CPU)")
+    build_parser.add_argument("--force", action="store_true", help="Rebuild every source, changed or not")
+
+    args = parser.parse_args(argv)
+    return _build_command(args)
+
+
+def _build_command(args: argparse.Namespace) -> int:
+    if not args.source.is_dir():
+        print(f"markpost build: {args.source} is not a directory", file=sys.stderr)
+        return 2
+
+    try:
+        config = load_config(args.config)
+        blog, state_dir = config.blog, config.state_dir
+    except FileNotFoundError as e:
+        if args.out is None or args.config is not None:
+            print(f"markpost build: config file not found: {e.filename}", file=sys.stderr)
+            return 2
+        # A local build works without a config; keep build state next to the output.
+        blog, state_dir = BlogConfig(s3_bucket="", base_url=""), args.out
+
+    state = BuildState(state_dir / BUILD_DB)
+    manifest = None
+    client = None
+    index = None
+    if args.out is None:
+        import boto3
+
+        manifest = BlogManifest(state_dir / BLOG_MANIFEST_DB)
+        client = boto3.client("s3", region_name=blog.aws_region)
+        if blog.site_index:
+            index = PostIndex(state_dir / POST_INDEX_DB)
+
+    try:
+        result = build(
+            args.source,
+            blog,
+            state,
+            out=args.out,
+            client=client,
+            manifest=manifest,
+            workers=args.workers,
+            force=args.force,
+            index=index,
+        )
+    finally:
+        state.close()
+        if manifest is not None:
+            manifest.close()
+        if index is not None:
+            index.close()
+
+    for key, error in sorted(result["errors"].items()):
+        print(f"error: {key}: {error}", file=sys.stderr)
+    print(f"Built {len(result['built'])}, skipped {len(result['skipped'])} unchanged, {len(result['errors'])} failed.")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
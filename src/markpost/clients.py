@@ -0,0 +1,73 @@
+# src/markpost/clients.py
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import boto3
+import httpx
+
+from markpost.config import BlogConfig
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ModuleNotFoundError:
+    HTTP2_AVAILABLE = False
+
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+
+class ClientRegistry:
+    """Owns the long-lived, connection-pooled clients used for publishing.
+
+    Clients are created on first use and reused across requests so that
+    TLS handshakes and SDK setup are paid once. Twitter and Threads share
+    one httpx client; S3 gets a boto3 client, rebuilt if the region changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._s3: tuple[str, object] | None = None
+        self._http: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+    def s3(self, config: BlogConfig):
+        """Return the shared boto3 S3 client for the configured region."""
+        with self._lock:
+            if self._s3 is not None and self._s3[0] == config.aws_region:
+                return self._s3[1]
+            client = boto3.client("s3", region_name=config.aws_region)
+            self._s3 = (config.aws_region, client)
+        return client
+
+    def http(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive httpx client for the running event loop.
+
+        Uses HTTP/2 when the optional h2 package is installed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._http is not None and self._http[0] is loop and not self._http[1].is_closed:
+                return self._http[1]
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=HTTP_LIMITS,
+                timeout=HTTP_TIMEOUT,
+            )
+            # A client left over from another event loop can't be closed from
+            # this one; its connections are dropped with it.
+            self._http = (loop, client)
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client. Safe to call more than once."""
+        with self._lock:
+            s3, http = self._s3, self._http
+            self._s3 = self._http = None
+        if s3 is not None:
+            s3[1].close()
+        if http is not None:
+            await http[1].aclose()
+
@@ -1,8 +1,11 @@
 # src/markpost/config.py
 from __future__ import annotations
 
+import logging
 import os
+import threading
 from dataclasses import dataclass
+from importlib.util import find_spec
 from pathlib import Path
 
 try:
@@ -10,6 +13,8 @@ try:
 except ModuleNotFoundError:
     import tomli as tomllib
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class TwitterConfig:
@@ -17,12 +22,28 @@ class TwitterConfig:
     consumer_secret: str
     access_token: str
     access_token_secret: str
+    # Client-side cap on tweets per window, refined from API response headers.
+    rate_limit: int = 100
+    rate_window: float = 900.0
 
 
 @dataclass(frozen=True)
 class ThreadsConfig:
     access_token: str
     user_id: str
+    # Pipelined mode attaches every reply to the first post so that reply
+    # containers can be created concurrently instead of one at a time.
+    pipeline: bool = False
+    max_concurrency: int = 4
+    # Seconds between container status checks before publishing; 0 skips polling.
+    poll_interval: float = 0.0
+    poll_timeout: float = 60.0
+    # Client-side cap on published posts per window (Threads allows 250 per 24h).
+    rate_limit: int = 250
+    rate_window: float = 86400.0
+
+
+CONTENT_ENCODINGS = frozenset({"", "gzip", "br"})
 
 
 @dataclass(frozen=True)
@@ -31,6 +52,28 @@ class BlogConfig:
     base_url: str
     s3_prefix: str = ""
     aws_region: str = "us-east-1"
+    # Python-Markdown extensions used to render posts, e.g. ("tables", "fenced_code", "toc").
+    markdown_extensions: tuple[str, ...] = ()
+    # Precompress text uploads: "gzip", "br" (needs the brotli extra) or "" for none.
+    content_encoding: str = ""
+    # Cache-Control header for uploaded objects, e.g. "public, max-age=3600".
+    cache_control: str = ""
+    # Jinja2 template (needs the templates extra) that wraps each post's HTML.
+    # Receives content, title, date, slug, excerpt, site_title and base_url.
+    layout: str = ""
+    # Maintain index.html, feed.xml and sitemap.xml under s3_prefix on every publish.
+    site_index: bool = False
+    # Title of the generated index page and feed.
+    site_title: str = "Blog"
+
+    def __post_init__(self):
+        if self.content_encoding not in CONTENT_ENCODINGS:
+            raise ValueError(
+                f"Unsupported content_encoding {self.content_encoding!r}; use one of {sorted(CONTENT_ENCODINGS)}"
+            )
+        # Checked here rather than on first upload, so a reload keeps the last good config.
+        if self.content_encoding == "br" and find_spec("brotli") is None:
+            raise ValueError('content_encoding = "br" needs the brotli package: pip install "markpost[brotli]"')
 
 
 @dataclass(frozen=True)
@@ -38,6 +81,18 @@ class MarkpostConfig:
     blog: BlogConfig
     twitter: TwitterConfig | None = None
     threads: ThreadsConfig | None = None
+    # Where local state (job queue etc.) is kept. Defaults to the config file's directory.
+    state_dir: Path = Path.home() / ".markpost"
+    # Seconds a successful publish_post result is replayed for identical retries.
+    idempotency_ttl: float = 86400.0
+
+
+def default_config_path() -> Path:
+    """Return MARKPOST_CONFIG if set, otherwise ~/.markpost/config.toml."""
+    env = os.environ.get("MARKPOST_CONFIG")
+    if env:
+        return Path(env)
+    return Path.home() / ".markpost" / "config.toml"
 
 
 def load_config(path: Path | None = None) -> MarkpostConfig:
@@ -48,13 +103,12 @@ def load_config(path: Path | None = None) -> MarkpostConfig:
 
     Only the [blog] section is required. [twitter] and [threads]
     are optional — omit them if you haven't set up those platforms yet.
+    A top-level state_dir sets where local state is stored; it defaults
+    to the directory containing the config file. A top-level
+    idempotency_ttl sets how long publish results are replayed.
     """
     if path is None:
-        env = os.environ.get("MARKPOST_CONFIG")
-        if env:
-            path = Path(env)
-        else:
-            path = Path.home() / ".markpost" / "config.toml"
+        path = default_config_path()
 
     with open(path, "rb") as f:
         raw = tomllib.load(f)
@@ -69,6 +123,83 @@ def load_config(path: Path | None = None) -> MarkpostConfig:
         base_url=blog_raw["base_url"],
         s3_prefix=blog_raw.get("s3_prefix", ""),
         aws_region=aws.get("region", "us-east-1"),
+        markdown_extensions=tuple(blog_raw.get("markdown_extensions", ())),
+        content_encoding=blog_raw.get("content_encoding", ""),
+        cache_control=blog_raw.get("cache_control", ""),
+        layout=blog_raw.get("layout", ""),
+        site_index=blog_raw.get("site_index", False),
+        site_title=blog_raw.get("site_title", "Blog"),
+    )
+
+    state_dir = Path(raw["state_dir"]).expanduser() if "state_dir" in raw else Path(path).parent
+
+    return MarkpostConfig(
+        twitter=twitter,
+        threads=threads,
+        blog=blog,
+        state_dir=state_dir,
+        idempotency_ttl=float(raw.get("idempotency_ttl", MarkpostConfig.idempotency_ttl)),
     )
 
-    return MarkpostConfig(twitter=twitter, threads=threads, blog=blog)
+
+class ConfigService:
+    """Keeps the parsed config in memory and reloads it when the file changes.
+
+    get() costs a single stat() while the file is unchanged. When the
+    file's mtime or size changes it is re-parsed; if the new contents
+    fail to load, the last good config is kept and a warning is logged.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._config: MarkpostConfig | None = None
+        self._loaded_path: Path | None = None
+        self._stamp: tuple[int, int] | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path if self._path is not None else default_config_path()
+
+    def get(self) -> MarkpostConfig:
+        """Return the current config, re-parsing only if the file changed."""
+        path = self.path
+        with self._lock:
+            if self._config is not None and path == self._loaded_path:
+                try:
+                    stamp = _file_stamp(path)
+                except OSError:
+                    logger.warning("Config file %s is unreadable; keeping last good config", path)
+                    return self._config
+                if stamp == self._stamp:
+                    return self._config
+                try:
+                    return self._load(path, stamp)
+                except Exception:
+                    logger.warning("Failed to reload config from %s; keeping last good config", path, exc_info=True)
+                    # Don't retry the same broken file on every call.
+                    self._stamp = stamp
+                    return self._config
+
+            return self._load(path, _file_stamp(path))
+
+    def reload(self) -> MarkpostConfig:
+        """Force a re-parse of the config file.
+
+        Raises if the file can't be loaded; the last good config stays in place.
+        """
+        path = self.path
+        with self._lock:
+            return self._load(path, _file_stamp(path))
+
+    def _load(self, path: Path, stamp: tuple[int, int]) -> MarkpostConfig:
+        config = load_config(path)
+        self._config = config
+        self._loaded_path = path
+        self._stamp = stamp
+        return config
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
@@ -0,0 +1,88 @@
+# src/markpost/fanout.py
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """A lazily started thread pool for blocking calls made from async code."""
+
+    def __init__(self, max_workers: int, name: str) -> None:
+        self.max_workers = max_workers
+        self.name = name
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run func on the pool and await its result.
+
+        Context variables (such as the current trace span) carry over to
+        the worker thread, as with asyncio.to_thread.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for in-flight calls to finish. It restarts on next use."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+
+# Upper bound on blocking calls (site rendering, local stores) in flight at once.
+MAX_WORKERS = 8
+
+_pool = WorkerPool(MAX_WORKERS, "markpost-worker")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous function on the shared worker pool.
+
+    Keeps blocking calls off the event loop so other MCP requests are
+    served while they run.
+    """
+    return await _pool.run(func, *args, **kwargs)
+
+
+async def fan_out(jobs: dict[str, Awaitable[Any]]) -> tuple[dict[str, Any], dict[str, str]]:
+    """Await all jobs concurrently.
+
+    Returns (results, errors): results maps each job name to its return
+    value, errors maps each failed job name to a short error message.
+    One job failing does not cancel the others.
+    """
+    names = list(jobs)
+    outcomes = await asyncio.gather(*jobs.values(), return_exceptions=True)
+
+    results: dict[str, Any] = {}
+    errors: dict[str, str] = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, Exception):
+            errors[name] = f"{type(outcome).__name__}: {outcome}"
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+
+    return results, errors
+
+
+def shutdown() -> None:
+    """Stop the shared worker pool, waiting for in-flight calls to finish."""
+    _pool.shutdown()
@@ -1,131 +1,394 @@
 # src/markpost/formatter.py
 from __future__ import annotations
 
+import hashlib
 import re
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
 from html import escape
 
 import markdown
 
+from markpost.length import Measure, TextLength
+
 
 def markdown_to_plain(text: str) -> str:
     """Convert Markdown to plain text suitable for social media.
 
-    Links become "text (url)" format. All other formatting is stripped.
-    """
-    # Convert links before stripping HTML so we can capture href
-    # First handle markdown links: [text](url) -> text (url)
-    text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r"\1 (\2)", text)
+    Links and images become "text (url)" format, including reference-style
+    links. Code spans keep their contents verbatim. All other formatting
+    is stripped.
 
-    # Strip heading markers
-    text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
+    Runs in a single linear pass: each line is tokenized once with a
+    non-backtracking pattern, and output is assembled from pieces at the end.
+    """
+    definitions = _link_definitions(text) if "]:" in text else {}
 
-    # Strip bold/italic markers
-    text = re.sub(r"\*{1,3}(.+?)\*{1,3}", r"\1", text)
-    text = re.sub(r"_{1,3}(.+?)_{1,3}", r"\1", text)
+    lines: list[str] = []
+    blank_run = 0
+    in_fence = False
 
-    # Strip list markers
-    text = re.sub(r"^[\-\*\+]\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\d+\.\s+", "", text, flags=re.MULTILINE)
+    for line in text.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            out = line
+        elif definitions and _LINK_DEFINITION.match(line):
+            continue
+        else:
+            prefix = _BLOCK_PREFIX.match(line)
+            out = _inline_to_plain(line, prefix.end() if prefix else 0, definitions)
 
-    # Collapse multiple blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+        # Collapse runs of blank lines to one
+        if out:
+            blank_run = 0
+        else:
+            blank_run += 1
+            if blank_run > 1:
+                continue
+        lines.append(out)
+
+    return "\n".join(lines).strip()
+
+
+# Heading markers and list markers at the start of a line
+_BLOCK_PREFIX = re.compile(r"(?:#{1,6}(?=[ \t]|$)|[-*+](?=[ \t])|\d+\.(?=[ \t]))[ \t]*")
+
+# [label]: url "optional title"
+_LINK_DEFINITION = re.compile(
+    r" {0,3}\[([^\]]+)\]:[ \t]*<?([^\s>]+)>?(?:[ \t]+(?:\"[^\"]*\"|'[^']*'|\([^)]*\)))?[ \t]*$"
+)
+
+# One inline token: a run of ordinary text, a backslash escape, a backtick
+# run, an emphasis delimiter run, or a single special character.
+_INLINE_TOKEN = re.compile(r"[^\\`*_\[\]!]+|\\[!-/:-@\[-`{-~]|`+|\*+|_+|!\[|.")
+
+_INLINE_SPECIAL = frozenset("\\`*_[]!")
+
+_BACKTICK_RUN = re.compile(r"`+")
+
+_PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+
+# Character kinds for emphasis flanking rules
+_SPACE, _PUNCT, _OTHER = 0, 1, 2
+
+
+def _char_kind(c: str) -> int:
+    if c.isspace():
+        return _SPACE
+    if c in _PUNCTUATION:
+        return _PUNCT
+    return _OTHER
+
+
+def _link_definitions(text: str) -> dict[str, str]:
+    """Collect reference link definitions, keyed by normalized label."""
+    definitions: dict[str, str] = {}
+    for line in text.splitlines():
+        m = _LINK_DEFINITION.match(line)
+        if m:
+            definitions.setdefault(_normalize_label(m.group(1)), m.group(2))
+    return definitions
+
+
+def _normalize_label(label: str) -> str:
+    return " ".join(label.split()).casefold()
+
+
+def _inline_to_plain(line: str, pos: int, definitions: dict[str, str]) -> str:
+    """Strip inline Markdown from one line, starting at pos."""
+    pieces: list[str] = []
+    delimiters: list[tuple[int, str, bool, bool]] = []  # (piece index, char, can_open, can_close)
+    brackets: list[tuple[int, int]] = []  # (piece index, position after the opening bracket)
+    backtick_runs: dict[int, list[int]] | None = None
+    backtick_cursor: dict[int, int] = {}
+    end = len(line)
+    # Tokens before this position were consumed by a code span or link
+    skip_until = pos
+    # Position past which there is known to be no ")"
+    no_paren_from = end + 1
+
+    append = pieces.append
+    for m in _INLINE_TOKEN.finditer(line, pos):
+        start, stop = m.span()
+        if start < skip_until:
+            if stop <= skip_until:
+                continue
+            start = skip_until
+        token = line[start:stop]
+        first = token[0]
+
+        if first not in _INLINE_SPECIAL:
+            append(token)
+
+        elif first == "*" or first == "_":
+            before = _char_kind(line[start - 1]) if start > 0 else _SPACE
+            after = _char_kind(line[stop]) if stop < end else _SPACE
+            left = after != _SPACE and (after != _PUNCT or before != _OTHER)
+            right = before != _SPACE and (before != _PUNCT or after != _OTHER)
+            if first == "_":
+                can_open = left and (not right or before == _PUNCT)
+                can_close = right and (not left or after == _PUNCT)
+            else:
+                can_open, can_close = left, right
+            if can_open or can_close:
+                delimiters.append((len(pieces), first, can_open, can_close))
+            append(token)
+
+        elif first == "\\" and len(token) == 2:
+            append(token[1])
+
+        elif first == "`":
+            if backtick_runs is None:
+                backtick_runs = {}
+                for run in _BACKTICK_RUN.finditer(line):
+                    backtick_runs.setdefault(len(run.group()), []).append(run.start())
+            after_pos = start + len(token)
+            closer = _next_run(backtick_runs, backtick_cursor, len(token), after_pos)
+            if closer is None:
+                pieces.append(token)
+            else:
+                code = line[after_pos:closer]
+                if len(code) > 2 and code[0] == " " and code[-1] == " " and code.strip(" "):
+                    code = code[1:-1]
+                pieces.append(code)
+                skip_until = closer + len(token)
+
+        elif token == "[" or token == "![":
+            brackets.append((len(pieces), start + len(token)))
+            pieces.append(token)
+
+        elif token == "]" and brackets:
+            opener_index, label_start = brackets.pop()
+            after_pos = start + 1
+            url = None
+            if after_pos < end and line[after_pos] == "(":
+                if after_pos + 1 < no_paren_from:
+                    close = line.find(")", after_pos + 1)
+                    if close == -1:
+                        no_paren_from = after_pos + 1
+                    elif close > after_pos + 1:
+                        url = line[after_pos + 1:close]
+                        skip_until = close + 1
+            elif definitions:
+                label = line[label_start:start]
+                ref_end = after_pos
+                if after_pos < end and line[after_pos] == "[":
+                    ref_close = line.find("]", after_pos + 1)
+                    if ref_close != -1:
+                        if ref_close > after_pos + 1:
+                            label = line[after_pos + 1:ref_close]
+                        ref_end = ref_close + 1
+                url = definitions.get(_normalize_label(label))
+                if url is not None:
+                    skip_until = ref_end
+            if url is None:
+                pieces.append(token)
+            else:
+                pieces[opener_index] = ""
+                pieces.append(f" ({url})")
 
-    return text.strip()
+        else:
+            pieces.append(token)
+
+    # Pair emphasis delimiters: each closer matches the nearest open runs
+    # of the same character. As in CommonMark, a pair uses up as many
+    # characters as the shorter run has, and what is left of either run
+    # can still pair with another; unpaired characters stay in the text.
+    openers: dict[str, list[int]] = {"*": [], "_": []}
+    for index, char, can_open, can_close in delimiters:
+        stack = openers[char]
+        if can_close:
+            while stack and pieces[index]:
+                opener = stack[-1]
+                used = min(len(pieces[opener]), len(pieces[index]))
+                pieces[opener] = pieces[opener][used:]
+                pieces[index] = pieces[index][used:]
+                if not pieces[opener]:
+                    stack.pop()
+        if can_open and pieces[index]:
+            stack.append(index)
+
+    return "".join(pieces)
+
+
+def _next_run(runs: dict[int, list[int]], cursor: dict[int, int], length: int, after: int) -> int | None:
+    """Start of the next backtick run of exactly this length at or after `after`.
+
+    Cursors only move forward, so all lookups on a line take linear time.
+    """
+    starts = runs.get(length, ())
+    i = cursor.get(length, 0)
+    while i < len(starts) and starts[i] < after:
+        i += 1
+    cursor[length] = i
+    return starts[i] if i < len(starts) else None
 
 
 SEPARATOR_PATTERN = re.compile(r"\n\s*---\s*\n")
 
 
-def split_into_thread(text: str, max_chars: int = 280) -> list[str]:
+def split_into_thread(text: str, max_chars: int = 280, length: TextLength | None = None) -> list[str]:
     """Split text into thread parts.
 
     First splits on --- separators, then splits any chunk that exceeds
     max_chars at sentence boundaries. Falls back to word boundaries
-    if a single sentence exceeds the limit.
+    if a single sentence exceeds the limit. Parts are measured with the
+    platform's length (e.g. TwitterLength), or in code points by default.
     """
-    # Step 1: split on explicit separators
-    raw_parts = SEPARATOR_PATTERN.split(text)
-    raw_parts = [p.strip() for p in raw_parts if p.strip()]
-
-    # Step 2: split any over-length parts
-    result: list[str] = []
-    for part in raw_parts:
-        if len(part) <= max_chars:
-            result.append(part)
+    return list(iter_thread(text, max_chars, length))
+
+
+def iter_thread(text: str, max_chars: int = 280, length: TextLength | None = None) -> Iterator[str]:
+    """Yield the parts of split_into_thread one at a time.
+
+    Works on offsets into the original text and runs in linear time.
+    Each part is one slice of the text, unless the units packed into it
+    were separated by something other than a single space, in which case
+    they are joined with one (as split_into_thread always has).
+    """
+    measure = (length or _CODE_POINTS).measure(text)
+    for start, end in _separated_chunks(text):
+        if measure.cost(start, end) <= max_chars:
+            yield text[start:end]
         else:
-            result.extend(_split_long_text(part, max_chars))
+            yield from _split_long_text(text, start, end, max_chars, measure)
+
+
+_CODE_POINTS = TextLength()
+
+
+_SENTENCE_GAP = re.compile(r"(?<=[.!?])\s+")
+
+# Gaps that are not a single space; packing collapses these, so a part
+# containing one has to be joined from pieces instead of sliced.
+_IRREGULAR_SENTENCE_GAP = re.compile(r"[.!?](?: \s|[^\S ])")
 
-    return result
+_WORD_GAP = re.compile(r"\s+")
 
+_IRREGULAR_WORD_GAP = re.compile(r"[^\S ]|  ")
 
-def _split_long_text(text: str, max_chars: int) -> list[str]:
-    """Split text at sentence boundaries, falling back to word boundaries."""
-    sentences = re.split(r"(?<=[.!?])\s+", text)
-    parts: list[str] = []
-    current = ""
+_NON_BLANK = re.compile(r"\S(?:.*\S)?", re.DOTALL)
 
-    for sentence in sentences:
-        if not current:
-            if len(sentence) <= max_chars:
-                current = sentence
+
+def _separated_chunks(text: str) -> Iterator[tuple[int, int]]:
+    """Offsets of the non-blank chunks between --- separators, stripped."""
+    bounds = [m.span() for m in SEPARATOR_PATTERN.finditer(text)]
+    starts = [0] + [end for _, end in bounds]
+    ends = [start for start, _ in bounds] + [len(text)]
+    for start, end in zip(starts, ends):
+        if start < end and not (text[start].isspace() or text[end - 1].isspace()):
+            yield start, end
+        elif chunk := _NON_BLANK.search(text, start, end):
+            yield chunk.span()
+
+
+def _split_long_text(text: str, start: int, end: int, max_chars: int, measure: Measure) -> Iterator[str]:
+    """Split text[start:end] at sentence boundaries, falling back to word boundaries.
+
+    Rather than visiting every sentence, jumps as far ahead as max_chars
+    reaches and looks back for the last sentence boundary that still fits.
+    """
+    pos = start
+    while pos < end:
+        stop = measure.reach(pos, max_chars)
+        if stop >= end and not _IRREGULAR_SENTENCE_GAP.search(text, pos, end):
+            yield text[pos:end]
+            return
+
+        if not _IRREGULAR_SENTENCE_GAP.search(text, pos, min(stop + 2, end)):
+            if text[stop] == " " and text[stop - 1] in ".!?":
+                cut = stop
             else:
-                # Sentence itself is too long — split on words
-                parts.extend(_split_on_words(sentence, max_chars))
-        elif len(current) + 1 + len(sentence) <= max_chars:
-            current = current + " " + sentence
+                cut = max(text.rfind(". ", pos, stop + 1), text.rfind("! ", pos, stop + 1),
+                          text.rfind("? ", pos, stop + 1)) + 1
+            if cut > pos:
+                yield text[pos:cut]
+                pos = cut + 1
+                continue
+            part = None
+            gap = _SENTENCE_GAP.search(text, pos, end)
+            sentence_end = gap.start() if gap else end
         else:
-            parts.append(current)
-            if len(sentence) <= max_chars:
-                current = sentence
-            else:
-                parts.extend(_split_on_words(sentence, max_chars))
-                current = ""
+            part, sentence_end = _pack_one(text, _SENTENCE_GAP, pos, end, max_chars, measure)
 
-    if current:
-        parts.append(current)
-
-    return parts
+        if part is not None:
+            yield part
+            pos = sentence_end
+        else:
+            # Sentence itself is too long — split on words
+            yield from _split_on_words(text, pos, sentence_end, max_chars, measure)
+            next_sentence = _NON_BLANK.search(text, sentence_end, end)
+            pos = next_sentence.start() if next_sentence else end
 
 
-def _split_on_words(text: str, max_chars: int) -> list[str]:
+def _split_on_words(text: str, start: int, end: int, max_chars: int, measure: Measure) -> Iterator[str]:
     """Last-resort split on word boundaries."""
-    words = text.split()
-    parts: list[str] = []
-    current = ""
-
-    for word in words:
-        # If a single word exceeds max_chars, hard-split it
-        while len(word) > max_chars:
-            if current:
-                parts.append(current)
-                current = ""
-            parts.append(word[:max_chars])
-            word = word[max_chars:]
-
-        if not word:
-            continue
-
-        if not current:
-            current = word
-        elif len(current) + 1 + len(word) <= max_chars:
-            current = current + " " + word
+    pos = start
+    while pos < end:
+        stop = measure.reach(pos, max_chars)
+        if stop >= end and not _IRREGULAR_WORD_GAP.search(text, pos, end):
+            yield text[pos:end]
+            return
+
+        if not _IRREGULAR_WORD_GAP.search(text, pos, min(stop + 2, end)):
+            cut = stop if text[stop] == " " else text.rfind(" ", pos, stop)
+            if cut > pos:
+                yield text[pos:cut]
+                pos = cut + 1
+                continue
+            part = None
         else:
-            parts.append(current)
-            current = word
+            part, next_pos = _pack_one(text, _WORD_GAP, pos, end, max_chars, measure)
 
-    if current:
-        parts.append(current)
+        if part is not None:
+            yield part
+            pos = next_pos
+        else:
+            # A single word exceeds max_chars, hard-split it
+            yield text[pos:stop]
+            pos = stop
 
-    return parts
 
+def _pack_one(
+    text: str, gap: re.Pattern[str], pos: int, end: int, max_chars: int, measure: Measure
+) -> tuple[str | None, int]:
+    """Greedily pack units separated by gap, starting at pos, into one part.
 
-def markdown_to_html(text: str, title: str | None = None) -> str:
+    Returns the part and where the next one starts, or None and the end
+    of the first unit if that unit alone is longer than max_chars.
+    """
+    pieces: list[str] = []
+    length = -1
+    for match in gap.finditer(text, pos, end):
+        unit_length = measure.cost(pos, match.start())
+        if not pieces and unit_length > max_chars:
+            return None, match.start()
+        if length + 1 + unit_length > max_chars:
+            return " ".join(pieces), pos
+        pieces.append(text[pos:match.start()])
+        length += 1 + unit_length
+        pos = match.end()
+
+    if not pieces and measure.cost(pos, end) > max_chars:
+        return None, end
+    if length + 1 + measure.cost(pos, end) > max_chars:
+        return " ".join(pieces), pos
+    pieces.append(text[pos:end])
+    return " ".join(pieces), end
+
+
+def markdown_to_html(text: str, title: str | None = None, extensions: Sequence[str] = ()) -> str:
     """Convert Markdown to HTML.
 
     If title is provided, wraps in a full HTML document.
     Otherwise returns just the body HTML fragment.
+    extensions names Python-Markdown extensions to enable (e.g. "tables").
     """
-    body = markdown.markdown(text)
+    body = markdown_pool(extensions).convert(text)
 
     if title is None:
         return body
@@ -141,3 +404,146 @@ def markdown_to_html(text: str, title: str | None = None) -> str:
 {body}
 </body>
 </html>"""
+
+
+MARKDOWN_POOL_SIZE = 8
+
+
+class MarkdownPool:
+    """Reusable Markdown converters for one set of extensions.
+
+    Building a Markdown instance loads every extension and registers its
+    processors, which costs more than converting a short post. Converters
+    here are built once and reset() between documents. Each conversion
+    checks out its own instance, so a pool can be shared between threads;
+    at most max_idle instances are kept around.
+    """
+
+    def __init__(self, extensions: Sequence[str] = (), max_idle: int = MARKDOWN_POOL_SIZE) -> None:
+        self.extensions = tuple(extensions)
+        self.max_idle = max_idle
+        self._idle: list[markdown.Markdown] = []
+        self._lock = threading.Lock()
+
+    def convert(self, text: str) -> str:
+        with self._lock:
+            md = self._idle.pop() if self._idle else None
+        if md is None:
+            md = markdown.Markdown(extensions=list(self.extensions))
+
+        # A converter that raised is dropped rather than returned half-reset.
+        html = md.convert(text)
+        md.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(md)
+        return html
+
+
+_pools: dict[tuple[str, ...], MarkdownPool] = {}
+_pools_lock = threading.Lock()
+
+
+def markdown_pool(extensions: Sequence[str] = ()) -> MarkdownPool:
+    """Return the shared converter pool for this extension configuration."""
+    key = tuple(extensions)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, MarkdownPool(key))
+    return pool
+
+
+RENDER_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered output, keyed by content hash.
+
+    Holds plain text, thread splits and HTML so that previewing and then
+    publishing the same content formats it once. Entries are evicted
+    least-recently-used first once their total size passes max_bytes.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def plain(self, text: str) -> str:
+        """Cached markdown_to_plain(text)."""
+        return self._get(("plain", _digest(text)), lambda: markdown_to_plain(text))
+
+    def thread(self, text: str, max_chars: int = 280, length: TextLength | None = None) -> list[str]:
+        """Cached split_into_thread(markdown_to_plain(text), max_chars, length)."""
+        parts = self._get(
+            ("thread", _digest(text), max_chars, length),
+            lambda: tuple(split_into_thread(self.plain(text), max_chars, length)),
+        )
+        return list(parts)
+
+    def html(self, text: str, title: str | None = None, extensions: Sequence[str] = ()) -> str:
+        """Cached markdown_to_html(text, title, extensions)."""
+        return self._get(
+            ("html", _digest(text), title, tuple(extensions)),
+            lambda: markdown_to_html(text, title=title, extensions=extensions),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _get(self, key: tuple, render: Callable[[], object]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Render outside the lock; a concurrent miss on the same key just
+        # renders twice and stores the same value.
+        value = render()
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+        return value
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode()).digest()
+
+
+def _sizeof(value: object) -> int:
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+render_cache = RenderCache()
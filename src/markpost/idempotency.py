@@ -0,0 +1,58 @@
+# src/markpost/idempotency.py
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+
+from markpost.store import SQLiteStore
+
+IDEMPOTENCY_TTL = 24 * 3600
+
+
+def request_key(
+    content: str,
+    title: str | None,
+    slug: str | None,
+    platforms: list[str],
+    idempotency_key: str | None = None,
+) -> str:
+    """Key identifying a publish request.
+
+    A caller-supplied idempotency_key wins; otherwise the key is a hash
+    of everything that affects what gets published.
+    """
+    if idempotency_key is not None:
+        payload = {"key": idempotency_key}
+    else:
+        payload = {"content": content, "title": title, "slug": slug, "platforms": sorted(platforms)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class IdempotencyCache(SQLiteStore):
+    """Results of successful publishes, so a retried call can return them
+    without touching any platform API."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        result TEXT NOT NULL,
+        stored_at REAL NOT NULL
+    );
+    """
+
+    def get(self, key: str, ttl: float = IDEMPOTENCY_TTL) -> dict | None:
+        rows = self.execute(
+            "SELECT result FROM results WHERE key = ? AND stored_at >= ?",
+            (key, time.time() - ttl),
+        )
+        return json.loads(rows[0]["result"]) if rows else None
+
+    def put(self, key: str, result: dict) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO results (key, result, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(result), time.time()),
+        )
+
+    def prune(self, ttl: float = IDEMPOTENCY_TTL) -> None:
+        self.execute("DELETE FROM results WHERE stored_at < ?", (time.time() - ttl,))
@@ -0,0 +1,337 @@
+# src/markpost/jobs.py
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from markpost.store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = 2
+# Longest the scheduler sleeps before re-reading the wall clock. The event
+# loop's monotonic clock stops while the machine is suspended, so a single
+# week-long sleep could fire late.
+MAX_SCHEDULER_SLEEP = 3600.0
+
+SCHEDULED = "scheduled"
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+PARTIAL = "partial"
+FAILED = "failed"
+
+
+class JobStore(SQLiteStore):
+    """Durable record of submitted publish jobs and their per-platform progress.
+
+    Each posted thread part is written as soon as it is live, so a job
+    interrupted by a crash can continue from the last completed part.
+    Scheduled jobs keep their due time in job_schedule; their status moves
+    from scheduled to queued in one statement, so a restart never loses or
+    duplicates one.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        request TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+    CREATE TABLE IF NOT EXISTS job_platforms (
+        job_id TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        status TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        PRIMARY KEY (job_id, platform)
+    );
+    CREATE TABLE IF NOT EXISTS job_parts (
+        job_id TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        post_id TEXT NOT NULL,
+        PRIMARY KEY (job_id, platform, idx)
+    );
+    CREATE TABLE IF NOT EXISTS job_schedule (
+        job_id TEXT PRIMARY KEY,
+        run_at REAL NOT NULL
+    );
+    """
+
+    def create(self, request: dict, run_at: float | None = None) -> str:
+        """Record a job. With run_at (a Unix time) it waits as scheduled until release()."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED if run_at is None else SCHEDULED, json.dumps(request), now, now),
+            )
+            if run_at is not None:
+                conn.execute("INSERT INTO job_schedule (job_id, run_at) VALUES (?, ?)", (job_id, run_at))
+            conn.executemany(
+                "INSERT INTO job_platforms (job_id, platform, status) VALUES (?, ?, ?)",
+                [(job_id, platform, QUEUED) for platform in request["platforms"]],
+            )
+        return job_id
+
+    def request(self, job_id: str) -> dict:
+        rows = self.execute("SELECT request FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            raise KeyError(job_id)
+        return json.loads(rows[0]["request"])
+
+    def set_status(self, job_id: str, status: str) -> None:
+        self.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), job_id))
+
+    def set_platform(self, job_id: str, platform: str, status: str, result=None, error: str | None = None) -> None:
+        self.execute(
+            "UPDATE job_platforms SET status = ?, result = ?, error = ? WHERE job_id = ? AND platform = ?",
+            (status, json.dumps(result) if result is not None else None, error, job_id, platform),
+        )
+
+    def record_part(self, job_id: str, platform: str, index: int, post_id: str) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO job_parts (job_id, platform, idx, post_id) VALUES (?, ?, ?, ?)",
+            (job_id, platform, index, post_id),
+        )
+
+    def posted_ids(self, job_id: str, platform: str) -> list[str]:
+        rows = self.execute(
+            "SELECT post_id FROM job_parts WHERE job_id = ? AND platform = ? ORDER BY idx",
+            (job_id, platform),
+        )
+        return [row["post_id"] for row in rows]
+
+    def get(self, job_id: str) -> dict | None:
+        rows = self.execute(f"{_SELECT_JOBS} WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = _job_summary(rows[0])
+
+        platforms: dict = {}
+        for row in self.execute("SELECT * FROM job_platforms WHERE job_id = ?", (job_id,)):
+            entry: dict = {"status": row["status"], "posted_ids": self.posted_ids(job_id, row["platform"])}
+            if row["result"] is not None:
+                entry["result"] = json.loads(row["result"])
+            if row["error"] is not None:
+                entry["error"] = row["error"]
+            platforms[row["platform"]] = entry
+        job["platforms"] = platforms
+        return job
+
+    def list(self, status: str | None = None, limit: int = 20) -> list[dict]:
+        if status is None:
+            rows = self.execute(f"{_SELECT_JOBS} ORDER BY created_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self.execute(
+                f"{_SELECT_JOBS} WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            )
+        return [_job_summary(row) for row in rows]
+
+    def unfinished(self) -> list[str]:
+        """IDs of jobs that were queued or running, oldest first."""
+        rows = self.execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (QUEUED, RUNNING),
+        )
+        return [row["id"] for row in rows]
+
+    def scheduled(self) -> list[tuple[float, str]]:
+        """(run_at, job_id) for every job still waiting for its time, earliest first."""
+        rows = self.execute(
+            "SELECT job_id, run_at FROM job_schedule JOIN jobs ON jobs.id = job_id"
+            " WHERE status = ? ORDER BY run_at",
+            (SCHEDULED,),
+        )
+        return [(row["run_at"], row["job_id"]) for row in rows]
+
+    def release(self, job_id: str) -> bool:
+        """Move a scheduled job to queued. Returns False if it was no longer scheduled."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, SCHEDULED),
+            )
+            return cursor.rowcount == 1
+
+
+_SELECT_JOBS = "SELECT jobs.*, job_schedule.run_at FROM jobs LEFT JOIN job_schedule ON job_schedule.job_id = jobs.id"
+
+
+def _job_summary(row) -> dict:
+    request = json.loads(row["request"])
+    summary = {
+        "job_id": row["id"],
+        "status": row["status"],
+        "title": request.get("title"),
+        "platforms": request["platforms"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+    if row["run_at"] is not None:
+        summary["run_at"] = row["run_at"]
+    return summary
+
+
+class JobProgress:
+    """Per-job view of the store handed to the job runner.
+
+    Publishers use posted() to resume a thread and recorder() to
+    checkpoint each part as it goes live.
+    """
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def posted(self, platform: str) -> list[str]:
+        return self.store.posted_ids(self.job_id, platform)
+
+    def recorder(self, platform: str) -> Callable[[int, str], None]:
+        def record(index: int, post_id: str) -> None:
+            self.store.record_part(self.job_id, platform, index, post_id)
+
+        return record
+
+    def completed(self, platform: str) -> bool:
+        rows = self.store.execute(
+            "SELECT status FROM job_platforms WHERE job_id = ? AND platform = ?",
+            (self.job_id, platform),
+        )
+        return bool(rows) and rows[0]["status"] == SUCCEEDED
+
+    def started(self, platform: str) -> None:
+        self.store.set_platform(self.job_id, platform, RUNNING)
+
+    def succeeded(self, platform: str, result: dict) -> None:
+        self.store.set_platform(self.job_id, platform, SUCCEEDED, result=result)
+
+    def failed(self, platform: str, error: str) -> None:
+        self.store.set_platform(self.job_id, platform, FAILED, error=error)
+
+
+JobRunner = Callable[[dict, JobProgress], Awaitable[dict[str, str]]]
+
+
+class JobQueue:
+    """Runs submitted jobs on in-process worker tasks.
+
+    The runner receives the job's request and a JobProgress, and returns
+    a mapping of failed platform -> error message. On start(), jobs left
+    queued or running by a previous process are picked up again, and
+    scheduled jobs are reloaded into an in-memory heap. A single timer
+    task sleeps until the earliest of them is due, then queues it.
+    """
+
+    def __init__(self, store: JobStore, runner: JobRunner, workers: int = JOB_WORKERS):
+        self.store = store
+        self._runner = runner
+        self._workers = workers
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._schedule: list[tuple[float, str]] = []
+        self._reschedule = asyncio.Event()
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def path(self) -> Path:
+        return self.store.path
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.loop = asyncio.get_running_loop()
+        for job_id in self.store.unfinished():
+            self._queue.put_nowait(job_id)
+        self._schedule = self.store.scheduled()
+        heapq.heapify(self._schedule)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+        self._tasks.append(asyncio.create_task(self._release_due()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.loop = None
+        self.store.close()
+
+    def submit(self, request: dict) -> str:
+        """Persist a job and queue it. Returns the job ID."""
+        job_id = self.store.create(request)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    def schedule(self, request: dict, run_at: float) -> str:
+        """Persist a job to be queued at run_at (a Unix time). Returns the job ID."""
+        job_id = self.store.create(request, run_at=run_at)
+        heapq.heappush(self._schedule, (run_at, job_id))
+        if self._schedule[0][1] == job_id:
+            # New earliest job: cut the timer's current sleep short.
+            self._reschedule.set()
+        return job_id
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        await self._queue.join()
+
+    async def _release_due(self) -> None:
+        while True:
+            self._reschedule.clear()
+            if not self._schedule:
+                await self._reschedule.wait()
+                continue
+
+            run_at, job_id = self._schedule[0]
+            delay = run_at - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._reschedule.wait(), min(delay, MAX_SCHEDULER_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._schedule)
+            try:
+                released = self.store.release(job_id)
+            except Exception:
+                # The job stays scheduled in the store and is reloaded on the next start.
+                logger.exception("Could not release scheduled job %s", job_id)
+                continue
+            if released:
+                self._queue.put_nowait(job_id)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed", job_id)
+                self.store.set_status(job_id, FAILED)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        request = self.store.request(job_id)
+        self.store.set_status(job_id, RUNNING)
+        errors = await self._runner(request, JobProgress(self.store, job_id))
+        if not errors:
+            status = SUCCEEDED
+        elif len(errors) < len(request["platforms"]):
+            status = PARTIAL
+        else:
+            status = FAILED
+        self.store.set_status(job_id, status)
@@ -0,0 +1,178 @@
+# src/markpost/length.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, repeat
+
+
+class TextLength:
+    """Counts text the way a platform counts it against its length limit.
+
+    The base class counts code points, like len(). Subclasses override
+    weights() to give each code point its own cost; a code point that
+    continues a character the platform counts once (an emoji modifier,
+    a combining mark, the rest of a URL) costs 0. The splitter measures
+    through measure(), which precomputes prefix sums so that any slice
+    or budget can be checked without rescanning the text.
+    """
+
+    def __call__(self, text: str) -> int:
+        weights = self.weights(text)
+        return len(text) if weights is None else sum(weights)
+
+    def weights(self, text: str) -> list[int] | None:
+        """Cost of each code point in text, or None if every one costs 1."""
+        return None
+
+    def measure(self, text: str) -> Measure:
+        weights = self.weights(text)
+        return CodePoints() if weights is None else Weighted(weights)
+
+
+class CodePoints:
+    """Measures slices of a text in code points."""
+
+    def cost(self, start: int, end: int) -> int:
+        return end - start
+
+    def reach(self, start: int, budget: int) -> int:
+        """The furthest end with cost(start, end) <= budget; may lie past the text."""
+        return start + budget
+
+
+class Weighted:
+    """Measures slices of a text from per-code-point weights."""
+
+    def __init__(self, weights: list[int]):
+        self.prefix = array("q", accumulate(weights, initial=0))
+
+    def cost(self, start: int, end: int) -> int:
+        return self.prefix[end] - self.prefix[start]
+
+    def reach(self, start: int, budget: int) -> int:
+        """The furthest end with cost(start, end) <= budget, and at least start + 1.
+
+        Gallops forward before bisecting, so the work is logarithmic in
+        the distance reached rather than in the length of the text.
+        """
+        prefix = self.prefix
+        limit = prefix[start] + budget
+        size = len(prefix)
+        lo, step = start, 1
+        while start + step < size and prefix[start + step] <= limit:
+            lo = start + step
+            step *= 2
+        end = bisect_right(prefix, limit, lo, min(start + step, size)) - 1
+        return max(end, start + 1)
+
+
+Measure = CodePoints | Weighted
+
+
+_REGIONAL_INDICATOR = "\U0001f1e6-\U0001f1ff"
+
+# Code points that continue the emoji before them: the second regional
+# indicator of a flag, or a run of variation selectors, keycaps, skin
+# tones, tag characters and ZWJ-joined emoji. Group 1 or 2 is the tail.
+_EMOJI_TAIL = re.compile(
+    f"[{_REGIONAL_INDICATOR}]([{_REGIONAL_INDICATOR}])"
+    "|((?:[\ufe0e\ufe0f\u20e3\U0001f3fb-\U0001f3ff\U000e0020-\U000e007f]"
+    "|\u200d[\u2600-\u27bf\U0001f000-\U0001faff])+)"
+)
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+def _fold_emoji(text: str, weights: list[int], emoji_weight: int) -> None:
+    """Charge each emoji sequence emoji_weight on its first code point and nothing on the rest."""
+    for match in _EMOJI_TAIL.finditer(text):
+        start, end = match.span(match.lastindex)
+        if start:
+            weights[start - 1] = emoji_weight
+        weights[start:end] = repeat(0, end - start)
+
+
+class GraphemeLength(TextLength):
+    """Counts user-perceived characters (extended grapheme clusters).
+
+    Approximates Unicode's segmentation rules with the cases that occur
+    in posts: combining marks, CRLF, and emoji sequences (flags, skin
+    tones, keycaps, ZWJ sequences) each count once.
+    """
+
+    def weights(self, text: str) -> list[int] | None:
+        if text.isascii() and "\r\n" not in text:
+            return None
+        weights = [1] * len(text)
+        for crlf in re.finditer("\r\n", text):
+            weights[crlf.end() - 1] = 0
+        if not text.isascii():
+            _fold_emoji(text, weights, 1)
+            for run in _NON_ASCII.finditer(text):
+                for i in range(max(run.start(), 1), run.end()):
+                    if unicodedata.category(text[i])[0] == "M":
+                        weights[i] = 0
+        return weights
+
+
+# Code points outside these ranges weigh 2 in twitter-text's default
+# configuration: U+0000-U+10FF, U+2000-U+200D, U+2010-U+201F, U+2032-U+2037.
+_TWITTER_HEAVY = re.compile("[^\x00-\u10ff\u2000-\u200d\u2010-\u201f\u2032-\u2037]+")
+
+_URL_END = r"[^\s.,:;!?'\")\]]"
+
+_TWITTER_URL = re.compile(
+    rf"(?<![\w@./-])(?:(?:https?://|www\.)\S*{_URL_END}"
+    rf"|(?P<domain>(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+(?P<tld>[a-z]{{2,}}))(?![\w-])(?::\d+)?(?:/\S*{_URL_END})?)",
+    re.IGNORECASE,
+)
+
+# Top-level domains common enough that a bare name ending in one is
+# surely linked. twitter-text knows every TLD; for names ending in
+# anything else, this module can't tell a domain from a file name.
+_COMMON_TLDS = frozenset(
+    "com org net edu gov io co ai app dev me ly gg tv fm sh so to cc info biz xyz"
+    " uk us ca de fr jp cn au in br ru es it nl se no ch eu"
+    .split()
+)
+
+
+class TwitterLength(TextLength):
+    """twitter-text's weighted length.
+
+    Latin and most punctuation weigh 1; CJK, emoji and everything else
+    weigh 2, with an emoji sequence counted as one emoji. Every link is
+    shortened by t.co, so a link counts as url_length no matter how long
+    it is: one starting with http(s):// or www., or a bare domain such as
+    x.com or t.co/abc. Twitter only links bare names ending in a real
+    TLD; a name ending in anything outside _COMMON_TLDS, like
+    config.toml, counts as at least url_length, so a part may come out
+    short but never over the limit.
+    """
+
+    def __init__(self, url_length: int = 23):
+        self.url_length = url_length
+
+    def weights(self, text: str) -> list[int] | None:
+        urls = list(_TWITTER_URL.finditer(text))
+        if not urls and text.isascii():
+            return None
+        weights = [1] * len(text)
+        if not text.isascii():
+            for run in _TWITTER_HEAVY.finditer(text):
+                weights[run.start():run.end()] = repeat(2, run.end() - run.start())
+            _fold_emoji(text, weights, 2)
+        for url in urls:
+            start, end = url.span()
+            cost = self.url_length
+            if url["domain"] and url["tld"].lower() not in _COMMON_TLDS:
+                cost = max(cost, end - start)
+            # The first code point carries the whole cost, so the splitter
+            # never reaches partway into a link: a fragment would be
+            # counted as a link of its own.
+            weights[start] = cost
+            weights[start + 1:end] = repeat(0, end - start - 1)
+        return weights
@@ -0,0 +1,51 @@
+# src/markpost/manifest.py
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Iterable
+
+from markpost.store import SQLiteStore
+
+
+def content_hash(body: bytes | Iterable[bytes], headers: dict[str, str]) -> str:
+    """Hash of an object's bytes and the headers it is uploaded with.
+
+    body may be the bytes themselves or an iterable of chunks of them.
+    Headers are included so that changing e.g. the content type of an
+    otherwise identical object still re-uploads it.
+    """
+    digest = hashlib.sha256(json.dumps(headers, sort_keys=True).encode())
+    digest.update(b"\0")
+    for chunk in (body,) if isinstance(body, (bytes, bytearray)) else body:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlogManifest(SQLiteStore):
+    """Content hash of every object uploaded to a blog bucket, so
+    re-publishing skips objects whose bytes have not changed."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS objects (
+        bucket TEXT NOT NULL,
+        key TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        uploaded_at REAL NOT NULL,
+        PRIMARY KEY (bucket, key)
+    );
+    """
+
+    def get(self, bucket: str, key: str) -> str | None:
+        rows = self.execute("SELECT hash FROM objects WHERE bucket = ? AND key = ?", (bucket, key))
+        return rows[0]["hash"] if rows else None
+
+    def record(self, bucket: str, key: str, hash: str) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO objects (bucket, key, hash, uploaded_at) VALUES (?, ?, ?, ?)",
+            (bucket, key, hash, time.time()),
+        )
+
+    def forget(self, bucket: str, key: str) -> None:
+        self.execute("DELETE FROM objects WHERE bucket = ? AND key = ?", (bucket, key))
@@ -0,0 +1,305 @@
+# src/markpost/metrics.py
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace
+except ModuleNotFoundError:
+    trace = None
+
+# Histogram bounds in seconds: sub-millisecond rendering up to rate-limit waits of minutes.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Family:
+    """A named metric with a fixed set of label names; one series per label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if len(labels) != len(self.labels) or not all(name in labels for name in self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+
+class Counter(_Family):
+    """A count that only goes up, e.g. retries."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: object) -> None:
+        """Overwrite a series, for mirroring a count kept elsewhere."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels: object) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def series(self) -> list[tuple[dict[str, str], float]]:
+        with self._lock:
+            return [(dict(zip(self.labels, key)), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Family):
+    """Observations counted into cumulative buckets, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket (last is +Inf)..., sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe how long the block takes, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            return 0 if counts is None else int(sum(counts[:-1]))
+
+    def series(self) -> list[tuple[dict[str, str], dict]]:
+        """Each series' labels with its count, sum and cumulative bucket counts."""
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        result = []
+        for key, counts in items:
+            cumulative = 0.0
+            buckets: dict[str, int] = {}
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                buckets[_format_value(bound)] = int(cumulative)
+            result.append((dict(zip(self.labels, key)), {"count": int(cumulative), "sum": counts[-1], "buckets": buckets}))
+        return result
+
+
+class Registry:
+    """The process's metric families, rendered for Prometheus or as a dict."""
+
+    def __init__(self) -> None:
+        self._families: dict[str, _Family] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def on_collect(self, callback: Callable[[], None]) -> None:
+        """Call callback before every render or snapshot, e.g. to copy in outside counts."""
+        with self._lock:
+            self._collectors.append(callback)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Every family as {"type", "help", "series": [{"labels", ...values}]}."""
+        result: dict[str, dict] = {}
+        for family in self._collect():
+            series = []
+            for labels, value in family.series():
+                if isinstance(value, dict):
+                    series.append({"labels": labels, **value})
+                else:
+                    series.append({"labels": labels, "value": value})
+            result[family.name] = {"type": family.kind, "help": family.help, "series": series}
+        return result
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for family in self._collect():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in family.series():
+                if isinstance(value, dict):
+                    for bound, count in value["buckets"].items():
+                        lines.append(f"{family.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+                    lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                    lines.append(f"{family.name}_count{_format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{family.name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, family: _Family):
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                if type(existing) is not type(family) or existing.labels != family.labels:
+                    raise ValueError(f"Metric {family.name} is already registered differently")
+                return existing
+            self._families[family.name] = family
+            return family
+
+    def _collect(self) -> list[_Family]:
+        with self._lock:
+            collectors = list(self._collectors)
+            families = list(self._families.values())
+        for callback in collectors:
+            callback()
+        return families
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "markpost_stage_seconds",
+    "Time spent in each publishing stage (format, split, render, client_setup, publish, ...).",
+    ("stage", "platform"),
+)
+api_request_seconds = registry.histogram(
+    "markpost_api_request_seconds",
+    "Latency of each platform API round-trip, including failed ones.",
+    ("platform", "operation"),
+)
+api_errors = registry.counter(
+    "markpost_api_errors_total",
+    "Platform API round-trips that raised.",
+    ("platform", "operation"),
+)
+retries = registry.counter(
+    "markpost_retries_total",
+    "Platform API calls repeated after a transient failure or a rate-limit response.",
+    ("platform", "reason"),
+)
+rate_limit_wait_seconds = registry.histogram(
+    "markpost_rate_limit_wait_seconds",
+    "Time spent waiting for a rate-limit token before an API call, when there was a wait.",
+    ("platform",),
+)
+cache_requests = registry.counter(
+    "markpost_cache_requests_total",
+    "Lookups in markpost's caches (render, idempotency, blog_manifest) by result.",
+    ("cache", "result"),
+)
+
+
+@contextmanager
+def span(stage: str, platform: str = "") -> Iterator[None]:
+    """Time one stage of a publish into stage_seconds.
+
+    With the OpenTelemetry API installed, the stage is also a span named
+    markpost.<stage>; spans are exported wherever the process's tracer
+    provider sends them.
+    """
+    with _otel_span(f"markpost.{stage}", platform), stage_seconds.time(stage=stage, platform=platform):
+        yield
+
+
+@contextmanager
+def api_call(platform: str, operation: str) -> Iterator[None]:
+    """Time one platform API round-trip, counting it as an error if it raises."""
+    try:
+        with _otel_span(f"markpost.{platform}.{operation}", platform), api_request_seconds.time(
+            platform=platform, operation=operation
+        ):
+            yield
+    except Exception:
+        api_errors.inc(platform=platform, operation=operation)
+        raise
+
+
+def record_wait(platform: str, seconds: float) -> float:
+    """Note a rate-limit wait about to be slept, and pass it through."""
+    if seconds > 0:
+        rate_limit_wait_seconds.observe(seconds, platform=platform)
+    return seconds
+
+
+def retry_counter(platform: str, reason: str = "transient") -> Callable[[Exception], None]:
+    """An on_retry callback for markpost.retry that counts into retries."""
+    def count(error: Exception) -> None:
+        retries.inc(platform=platform, reason=reason)
+
+    return count
+
+
+def cache_hit_rates() -> dict[str, float]:
+    """Hits as a fraction of lookups, per cache with at least one lookup."""
+    totals: dict[str, list[float]] = {}
+    for labels, value in cache_requests.series():
+        hits_lookups = totals.setdefault(labels["cache"], [0.0, 0.0])
+        hits_lookups[1] += value
+        if labels["result"] == "hit":
+            hits_lookups[0] += value
+    return {cache: round(hits / lookups, 4) for cache, (hits, lookups) in totals.items() if lookups}
+
+
+@contextmanager
+def _otel_span(name: str, platform: str) -> Iterator[None]:
+    if trace is None:
+        yield
+        return
+    attributes = {"markpost.platform": platform} if platform else None
+    with trace.get_tracer("markpost").start_as_current_span(name, attributes=attributes):
+        yield
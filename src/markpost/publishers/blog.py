@@ -1,26 +1,283 @@
 # src/markpost/publishers/blog.py
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import io
+import re
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 
 from markpost.config import BlogConfig
+from markpost.fanout import WorkerPool
+from markpost.manifest import BlogManifest, content_hash
+from markpost.metrics import api_call, cache_requests
 
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
 
-def publish_to_blog(html: str, slug: str, config: BlogConfig) -> str:
-    """Upload rendered HTML to S3 and return the public URL."""
-    s3 = boto3.client("s3", region_name=config.aws_region)
+# Concurrent uploads in upload_to_blog; one shared client serves them all.
+UPLOAD_WORKERS = 8
+# S3 calls in flight at once from the async publishers, across all requests.
+S3_WORKERS = 8
+# Bodies are encoded and compressed this many characters at a time, as S3 reads them.
+STREAM_CHUNK = 256 * 1024
+# Objects at least this large are sent as multipart uploads in parts of this size.
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
 
-    today = date.today().isoformat()
-    key = f"{config.s3_prefix}{today}-{slug}.html"
+# Only these are precompressed; images and other binaries are already compact.
+COMPRESSIBLE_TYPES = frozenset({"application/javascript", "application/json", "application/xml", "image/svg+xml"})
 
-    s3.put_object(
-        Bucket=config.s3_bucket,
-        Key=key,
-        Body=html,
-        ContentType="text/html",
-    )
+# Parts are sent one after another on the calling thread, so a multipart
+# upload occupies one worker of its pool instead of starting threads of its own.
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNKSIZE,
+    use_threads=False,
+)
 
-    base = config.base_url.rstrip("/")
-    return f"{base}/{key}"
+# Async uploads run here rather than on fanout's shared pool, so a burst of
+# large uploads can't hold up other blocking work.
+s3_pool = WorkerPool(S3_WORKERS, "markpost-s3")
+
+
+@dataclass(frozen=True)
+class BlogObject:
+    """One file to upload; key is relative to the blog's s3_prefix."""
+
+    key: str
+    body: str | bytes
+    content_type: str = "text/html"
+
+
+def publish_to_blog(
+    html: str,
+    slug: str,
+    config: BlogConfig,
+    client=None,
+    manifest: BlogManifest | None = None,
+    published: date | None = None,
+) -> str:
+    """Upload rendered HTML to S3 and return the public URL.
+
+    Pass a long-lived boto3 S3 client to reuse it; otherwise a new one
+    is created. With a manifest, the upload is skipped when the same
+    bytes were already uploaded to this key. Compression and
+    Cache-Control follow the config's content_encoding and cache_control.
+    The key is dated with `published`, defaulting to today.
+    """
+    s3 = client if client is not None else boto3.client("s3", region_name=config.aws_region)
+
+    key = config.s3_prefix + post_key(slug, published or date.today())
+    _put(s3, html, key, "text/html", config, manifest)
+    return post_url(key, config)
+
+
+def post_key(slug: str, published: date) -> str:
+    """Key of a post's page relative to the blog's s3_prefix: "{date}-{slug}.html"."""
+    return f"{published.isoformat()}-{slug}.html"
+
+
+def post_url(key: str, config: BlogConfig) -> str:
+    """Public URL of an S3 key under the blog's base_url."""
+    return f"{config.base_url.rstrip('/')}/{key}"
+
+
+def slugify(text: str) -> str:
+    """Convert text to a URL-safe slug."""
+    slug = text.lower().strip()
+    slug = re.sub(r"[^\w\s-]", "", slug)
+    slug = re.sub(r"[\s_]+", "-", slug)
+    slug = re.sub(r"-+", "-", slug)
+    return slug.strip("-")
+
+
+def upload_to_blog(
+    objects: Iterable[BlogObject],
+    config: BlogConfig,
+    client=None,
+    workers: int = UPLOAD_WORKERS,
+    manifest: BlogManifest | None = None,
+) -> dict[str, dict]:
+    """Upload many objects concurrently and return a manifest keyed by S3 key.
+
+    Uploads run on a pool of at most `workers` threads sharing one S3
+    client. Objects of MULTIPART_THRESHOLD bytes or more are sent as
+    multipart uploads. Each manifest entry holds the object's "url" and
+    uncompressed "bytes", or an "error" if that upload failed; one failure does not
+    stop the rest. With a BlogManifest, objects whose bytes are unchanged
+    since their last upload are not sent again and are marked "skipped".
+    """
+    s3 = client if client is not None else boto3.client("s3", region_name=config.aws_region)
+
+    # Each upload runs in its own copy of the caller's context, so trace spans nest under it.
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="markpost-upload") as pool:
+        return dict(pool.map(lambda obj: context.copy().run(_upload_entry, s3, obj, config, manifest), objects))
+
+
+async def apublish_to_blog(
+    html: str,
+    slug: str,
+    config: BlogConfig,
+    client,
+    manifest: BlogManifest | None = None,
+    published: date | None = None,
+) -> str:
+    """publish_to_blog() on s3_pool, without blocking the event loop."""
+    return await s3_pool.run(publish_to_blog, html, slug, config, client=client, manifest=manifest, published=published)
+
+
+async def aupload_to_blog(
+    objects: Iterable[BlogObject],
+    config: BlogConfig,
+    client,
+    manifest: BlogManifest | None = None,
+) -> dict[str, dict]:
+    """upload_to_blog() on s3_pool, without blocking the event loop.
+
+    Objects upload concurrently, limited to S3_WORKERS at once across
+    every caller rather than per call.
+    """
+    entries = await asyncio.gather(*(s3_pool.run(_upload_entry, client, obj, config, manifest) for obj in objects))
+    return dict(entries)
+
+
+def _upload_entry(s3, obj: BlogObject, config: BlogConfig, manifest: BlogManifest | None) -> tuple[str, dict]:
+    """Upload one BlogObject and return its key and upload_to_blog() manifest entry."""
+    key = f"{config.s3_prefix}{obj.key}"
+    try:
+        entry = _put(s3, obj.body, key, obj.content_type, config, manifest)
+    except Exception as e:
+        return key, {"error": f"{type(e).__name__}: {e}"}
+    return key, {"url": post_url(key, config), **entry}
+
+
+def _put(s3, body: str | bytes, key: str, content_type: str, config: BlogConfig, manifest: BlogManifest | None) -> dict:
+    """Upload body to key unless the manifest shows it unchanged.
+
+    Bodies below the multipart threshold are encoded and sent with one
+    put_object call on the shared client. Larger ones are hashed, encoded
+    and compressed chunk by chunk as S3 reads them, so no full encoded
+    copy is ever held. Returns {"bytes": n}, plus "skipped": True when
+    nothing was sent.
+    """
+    headers = _object_headers(content_type, config)
+    digest, size = _measure(body, headers)
+    if _unchanged(manifest, config.s3_bucket, key, digest):
+        return {"bytes": size, "skipped": True}
+
+    compress = _compressor(headers.get("ContentEncoding"))
+    with api_call("blog", "upload"):
+        if size < TRANSFER_CONFIG.multipart_threshold:
+            encoded = b"".join(compress(_chunks(body)))
+            s3.put_object(Bucket=config.s3_bucket, Key=key, Body=encoded, **headers)
+        else:
+            stream = io.BufferedReader(_ChunkReader(compress(_chunks(body))), buffer_size=STREAM_CHUNK)
+            s3.upload_fileobj(stream, config.s3_bucket, key, ExtraArgs=headers, Config=TRANSFER_CONFIG)
+
+    if manifest is not None:
+        manifest.record(config.s3_bucket, key, digest)
+    return {"bytes": size}
+
+
+def _measure(body: str | bytes, headers: dict[str, str]) -> tuple[str, int]:
+    """Content hash and UTF-8 size of body, computed chunk by chunk."""
+    size = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal size
+        for chunk in _chunks(body):
+            size += len(chunk)
+            yield chunk
+
+    return content_hash(counted(), headers), size
+
+
+def _unchanged(manifest: BlogManifest | None, bucket: str, key: str, digest: str) -> bool:
+    """Whether the manifest says these exact bytes are already at this key."""
+    if manifest is None:
+        return False
+    unchanged = manifest.get(bucket, key) == digest
+    cache_requests.inc(cache="blog_manifest", result="hit" if unchanged else "miss")
+    return unchanged
+
+
+def _object_headers(content_type: str, config: BlogConfig) -> dict[str, str]:
+    """S3 upload headers for an object of this type under the blog's settings."""
+    headers = {"ContentType": content_type}
+    if config.content_encoding and _is_compressible(content_type):
+        headers["ContentEncoding"] = config.content_encoding
+    if config.cache_control:
+        headers["CacheControl"] = config.cache_control
+    return headers
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip()
+    return media_type.startswith("text/") or media_type.endswith("+xml") or media_type in COMPRESSIBLE_TYPES
+
+
+def _chunks(body: str | bytes) -> Iterator[bytes]:
+    """body as UTF-8 bytes, STREAM_CHUNK characters at a time."""
+    for start in range(0, len(body), STREAM_CHUNK):
+        piece = body[start:start + STREAM_CHUNK]
+        yield piece.encode() if isinstance(piece, str) else piece
+
+
+def _compressor(encoding: str | None) -> Callable[[Iterator[bytes]], Iterator[bytes]]:
+    """A function compressing a stream of chunks; identity if encoding is unset."""
+    if encoding is None:
+        return lambda chunks: chunks
+    if encoding == "gzip":
+        return _gzip_chunks
+    if brotli is None:
+        raise RuntimeError('content_encoding = "br" needs the brotli package: pip install "markpost[brotli]"')
+    return _brotli_chunks
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # wbits=31 writes a gzip header; zlib's has mtime 0, so identical
+    # input gives identical output.
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.flush()
+
+
+def _brotli_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = brotli.Compressor()
+    for chunk in chunks:
+        yield compressor.process(chunk)
+    yield compressor.finish()
+
+
+class _ChunkReader(io.RawIOBase):
+    """A read-only, non-seekable file over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
@@ -1,52 +1,252 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable
+
 import httpx
 
 from markpost.config import ThreadsConfig
+from markpost.length import GraphemeLength
+from markpost.metrics import api_call, api_errors, record_wait, retries, retry_counter
+from markpost.ratelimit import TokenBucket
+from markpost.retry import aretry
 
 THREADS_API_BASE = "https://graph.threads.net/v1.0"
 THREADS_CHAR_LIMIT = 500
+# Threads counts the limit in user-perceived characters.
+THREADS_LENGTH = GraphemeLength()
+# How many throttled responses to wait out on a single request before giving up.
+RATE_LIMIT_RETRIES = 5
+# Graph API error codes meaning "rate limited" (returned with HTTP 400 or 429).
+THROTTLE_ERROR_CODES = {4, 17, 32, 613}
 
 
-async def post_to_threads(parts: list[str], config: ThreadsConfig) -> list[str]:
+async def post_to_threads(
+    parts: list[str],
+    config: ThreadsConfig,
+    client: httpx.AsyncClient | None = None,
+    resume_from: list[str] | None = None,
+    on_posted: Callable[[int, str], None] | None = None,
+    bucket: TokenBucket | None = None,
+) -> list[str]:
     """Post a single post or reply chain to Threads.
 
-    Uses the two-step create-then-publish flow.
+    Uses the two-step create-then-publish flow. Pass a long-lived client
+    to reuse its connections; otherwise a temporary one is opened.
+    With config.pipeline set, replies are attached to the first post and
+    their containers are created concurrently. resume_from holds IDs of
+    parts already posted; those parts are skipped. on_posted(index, post_id)
+    is called after each part is published. With a bucket, each publish
+    waits for a rate-limit token and throttled responses are retried
+    after the advertised delay. Server and connection errors are retried
+    with jittered backoff.
     Returns a list of post IDs.
     """
-    post_ids: list[str] = []
-    previous_id: str | None = None
+    posted = list(resume_from or [])
+    notify = on_posted or _ignore
+
+    if client is not None:
+        return await _post(parts, _ThreadsAPI(config, client, bucket), posted, notify)
 
     async with httpx.AsyncClient() as client:
-        for part in parts:
-            # Step 1: Create media container
-            create_params: dict = {
-                "text": part,
-                "media_type": "TEXT",
-                "access_token": config.access_token,
-            }
-            if previous_id is not None:
-                create_params["reply_to_id"] = previous_id
-
-            create_resp = await client.post(
-                f"{THREADS_API_BASE}/{config.user_id}/threads",
-                params=create_params,
-            )
-            create_resp.raise_for_status()
-            container_id = create_resp.json()["id"]
-
-            # Step 2: Publish
-            publish_resp = await client.post(
-                f"{THREADS_API_BASE}/{config.user_id}/threads_publish",
-                params={
-                    "creation_id": container_id,
-                    "access_token": config.access_token,
-                },
-            )
-            publish_resp.raise_for_status()
-            post_id = publish_resp.json()["id"]
+        return await _post(parts, _ThreadsAPI(config, client, bucket), posted, notify)
+
+
+def _ignore(index: int, post_id: str) -> None:
+    pass
 
-            post_ids.append(post_id)
-            previous_id = post_id
+
+async def _post(
+    parts: list[str],
+    api: _ThreadsAPI,
+    posted: list[str],
+    notify: Callable[[int, str], None],
+) -> list[str]:
+    if api.config.pipeline and len(parts) > 1:
+        return await _post_pipelined(parts, api, posted, notify)
+    return await _post_chain(parts, api, posted, notify)
+
+
+async def _post_chain(
+    parts: list[str],
+    api: _ThreadsAPI,
+    post_ids: list[str],
+    notify: Callable[[int, str], None],
+) -> list[str]:
+    """Create and publish each part in turn, each replying to the one before.
+
+    Reply containers need the parent's published ID, so nothing can overlap.
+    """
+    previous_id: str | None = post_ids[-1] if post_ids else None
+
+    for index in range(len(post_ids), len(parts)):
+        container_id = await api.create_container(parts[index], previous_id)
+        await api.wait_until_ready(container_id)
+        post_id = await api.publish_container(container_id)
+
+        post_ids.append(post_id)
+        previous_id = post_id
+        notify(index, post_id)
 
     return post_ids
+
+
+async def _post_pipelined(
+    parts: list[str],
+    api: _ThreadsAPI,
+    post_ids: list[str],
+    notify: Callable[[int, str], None],
+) -> list[str]:
+    """Publish the first part, then reply to it with every remaining part.
+
+    Since all replies share one parent, their containers are created (and
+    polled) concurrently, bounded by config.max_concurrency, while earlier
+    replies are being published. Publishing still happens in order.
+    """
+    if not post_ids:
+        root_container = await api.create_container(parts[0], None)
+        await api.wait_until_ready(root_container)
+        post_ids.append(await api.publish_container(root_container))
+        notify(0, post_ids[0])
+    root_id = post_ids[0]
+
+    semaphore = asyncio.Semaphore(api.config.max_concurrency)
+
+    async def prepare(part: str) -> str:
+        async with semaphore:
+            container_id = await api.create_container(part, root_id)
+            await api.wait_until_ready(container_id)
+            return container_id
+
+    start = len(post_ids)
+    pending = [asyncio.create_task(prepare(part)) for part in parts[start:]]
+    try:
+        for index, task in enumerate(pending, start):
+            container_id = await task
+            post_ids.append(await api.publish_container(container_id))
+            notify(index, post_ids[-1])
+    finally:
+        for task in pending:
+            task.cancel()
+        # Wait for the cancellations and retrieve every outcome, so no reply is still
+        # running, or has an unretrieved exception, once this returns.
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return post_ids
+
+
+class _ThreadsAPI:
+    """The Threads endpoints used for publishing, bound to one account."""
+
+    def __init__(self, config: ThreadsConfig, client: httpx.AsyncClient, bucket: TokenBucket | None):
+        self.config = config
+        self.client = client
+        self.bucket = bucket
+
+    async def create_container(self, text: str, reply_to_id: str | None) -> str:
+        params: dict = {
+            "text": text,
+            "media_type": "TEXT",
+            "access_token": self.config.access_token,
+        }
+        if reply_to_id is not None:
+            params["reply_to_id"] = reply_to_id
+
+        resp = await self._send("create_container", "post", f"{THREADS_API_BASE}/{self.config.user_id}/threads", params)
+        return resp.json()["id"]
+
+    async def wait_until_ready(self, container_id: str) -> None:
+        """Poll a media container until Threads reports it FINISHED.
+
+        Does nothing when config.poll_interval is 0.
+        """
+        if self.config.poll_interval <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.poll_timeout
+        while True:
+            resp = await self._send(
+                "container_status",
+                "get",
+                f"{THREADS_API_BASE}/{container_id}",
+                {"fields": "status,error_message", "access_token": self.config.access_token},
+            )
+            data = resp.json()
+            status = data.get("status")
+            if status == "FINISHED":
+                return
+            if status in ("ERROR", "EXPIRED"):
+                raise RuntimeError(f"Threads container {container_id} {status}: {data.get('error_message', '')}")
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Threads container {container_id} not ready after {self.config.poll_timeout}s")
+            await asyncio.sleep(self.config.poll_interval)
+
+    async def publish_container(self, container_id: str) -> str:
+        resp = await self._send(
+            "publish_container",
+            "post",
+            f"{THREADS_API_BASE}/{self.config.user_id}/threads_publish",
+            {"creation_id": container_id, "access_token": self.config.access_token},
+            consume=True,
+        )
+        return resp.json()["id"]
+
+    async def _send(
+        self, operation: str, method: str, url: str, params: dict, consume: bool = False
+    ) -> httpx.Response:
+        return await aretry(
+            lambda: self._send_once(operation, method, url, params, consume),
+            _is_transient,
+            on_retry=retry_counter("threads"),
+        )
+
+    async def _send_once(
+        self, operation: str, method: str, url: str, params: dict, consume: bool
+    ) -> httpx.Response:
+        """Make a request, waiting out rate limits when a bucket is set.
+
+        Only publishes (consume=True) count against the bucket; every
+        response's headers are used to keep it in sync.
+        """
+        request = getattr(self.client, method)
+        if self.bucket is None:
+            with api_call("threads", operation):
+                resp = await request(url, params=params)
+                resp.raise_for_status()
+            return resp
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if consume:
+                await asyncio.sleep(record_wait("threads", self.bucket.reserve()))
+            with api_call("threads", operation):
+                resp = await request(url, params=params)
+            if not _is_throttled(resp) or attempt == RATE_LIMIT_RETRIES:
+                break
+            retries.inc(platform="threads", reason="rate_limited")
+            self.bucket.throttled(resp.headers)
+            if not consume:
+                await asyncio.sleep(record_wait("threads", self.bucket.eta(1)))
+
+        self.bucket.update_from_headers(resp.headers)
+        if resp.is_error:
+            api_errors.inc(platform="threads", operation=operation)
+        resp.raise_for_status()
+        return resp
+
+
+def _is_throttled(resp: httpx.Response) -> bool:
+    if resp.status_code == 429:
+        return True
+    if resp.status_code != 400:
+        return False
+    try:
+        return resp.json().get("error", {}).get("code") in THROTTLE_ERROR_CODES
+    except ValueError:
+        return False
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
@@ -1,35 +1,127 @@
 from __future__ import annotations
 
-import tweepy
+import asyncio
+import json
+from collections.abc import Callable
+
+import httpx
+from oauthlib.oauth1 import Client as OAuth1Client
 
 from markpost.config import TwitterConfig
+from markpost.length import TwitterLength
+from markpost.metrics import api_call, api_errors, record_wait, retries, retry_counter
+from markpost.ratelimit import TokenBucket
+from markpost.retry import aretry
 
+TWITTER_API_BASE = "https://api.twitter.com/2"
 TWITTER_CHAR_LIMIT = 280
+# Counted in twitter-text weighted units, with links shortened by t.co.
+TWITTER_LENGTH = TwitterLength(url_length=23)
+# How many 429s to wait out on a single part before giving up.
+RATE_LIMIT_RETRIES = 5
 
 
-def post_to_twitter(parts: list[str], config: TwitterConfig) -> list[str]:
+async def post_to_twitter(
+    parts: list[str],
+    config: TwitterConfig,
+    client: httpx.AsyncClient | None = None,
+    resume_from: list[str] | None = None,
+    on_posted: Callable[[int, str], None] | None = None,
+    bucket: TokenBucket | None = None,
+) -> list[str]:
     """Post a single tweet or a thread to Twitter/X.
 
+    Calls the v2 API directly, signing each request with the config's
+    OAuth 1.0a user credentials. Pass a long-lived client to reuse its
+    connections; otherwise a temporary one is opened. resume_from holds
+    IDs of parts already posted; those parts are skipped and the thread
+    continues as a reply to the last one. on_posted(index, tweet_id) is
+    called after each part. With a bucket, each tweet waits for a
+    rate-limit token, and a 429 delays the part until the window resets
+    instead of failing. Server and connection errors are retried with
+    jittered backoff.
     Returns a list of tweet IDs.
     """
-    client = tweepy.Client(
-        consumer_key=config.consumer_key,
-        consumer_secret=config.consumer_secret,
-        access_token=config.access_token,
-        access_token_secret=config.access_token_secret,
-    )
-
-    tweet_ids: list[str] = []
-    previous_id: str | None = None
-
-    for part in parts:
-        kwargs: dict = {"text": part}
+    if client is not None:
+        return await _post(parts, _TwitterAPI(config, client, bucket), list(resume_from or []), on_posted)
+
+    async with httpx.AsyncClient() as client:
+        return await _post(parts, _TwitterAPI(config, client, bucket), list(resume_from or []), on_posted)
+
+
+async def _post(
+    parts: list[str],
+    api: _TwitterAPI,
+    tweet_ids: list[str],
+    on_posted: Callable[[int, str], None] | None,
+) -> list[str]:
+    previous_id: str | None = tweet_ids[-1] if tweet_ids else None
+
+    for index in range(len(tweet_ids), len(parts)):
+        payload: dict = {"text": parts[index]}
         if previous_id is not None:
-            kwargs["in_reply_to_tweet_id"] = previous_id
+            payload["reply"] = {"in_reply_to_tweet_id": previous_id}
 
-        response = client.create_tweet(**kwargs)
-        tweet_id = response.data["id"]
+        tweet_id = await api.create_tweet(payload)
         tweet_ids.append(tweet_id)
         previous_id = tweet_id
+        if on_posted is not None:
+            on_posted(index, tweet_id)
 
     return tweet_ids
+
+
+class _TwitterAPI:
+    """The v2 tweet endpoint, bound to one account's OAuth 1.0a credentials."""
+
+    def __init__(self, config: TwitterConfig, client: httpx.AsyncClient, bucket: TokenBucket | None):
+        self.client = client
+        self.bucket = bucket
+        self.oauth = OAuth1Client(
+            config.consumer_key,
+            client_secret=config.consumer_secret,
+            resource_owner_key=config.access_token,
+            resource_owner_secret=config.access_token_secret,
+        )
+
+    async def create_tweet(self, payload: dict) -> str:
+        resp = await aretry(lambda: self._send_once(payload), _is_transient, on_retry=retry_counter("twitter"))
+        return resp.json()["data"]["id"]
+
+    async def _send_once(self, payload: dict) -> httpx.Response:
+        """POST one tweet, waiting out rate limits when a bucket is set."""
+        body = json.dumps(payload)
+        if self.bucket is None:
+            with api_call("twitter", "create_tweet"):
+                resp = await self._post(body)
+                resp.raise_for_status()
+            return resp
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await asyncio.sleep(record_wait("twitter", self.bucket.reserve()))
+            with api_call("twitter", "create_tweet"):
+                resp = await self._post(body)
+            if resp.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                break
+            retries.inc(platform="twitter", reason="rate_limited")
+            self.bucket.throttled(resp.headers)
+
+        self.bucket.update_from_headers(resp.headers)
+        if resp.is_error:
+            api_errors.inc(platform="twitter", operation="create_tweet")
+        resp.raise_for_status()
+        return resp
+
+    async def _post(self, body: str) -> httpx.Response:
+        # Signed per attempt: every request needs a fresh nonce and timestamp.
+        # JSON bodies are not part of the OAuth 1.0a signature.
+        url = f"{TWITTER_API_BASE}/tweets"
+        _, headers, _ = self.oauth.sign(url, http_method="POST")
+        headers["Content-Type"] = "application/json"
+        return await self.client.post(url, content=body, headers=headers)
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
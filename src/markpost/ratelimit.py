@@ -0,0 +1,141 @@
+# src/markpost/ratelimit.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Mapping
+
+# Pause applied when an API says we're throttled without saying for how long.
+DEFAULT_BACKOFF = 60.0
+
+
+class TokenBucket:
+    """Client-side model of one account's rate limit on one platform.
+
+    Refills continuously at capacity/period tokens per second. When the
+    API reports its own window via response headers, the bucket switches
+    to that window: it holds exactly the remaining count until the reset
+    time, then refills to capacity.
+
+    reserve() never blocks: it takes a token and returns how long the
+    caller must wait before using it, so the same bucket serves worker
+    threads (time.sleep) and the event loop (asyncio.sleep).
+    """
+
+    def __init__(self, capacity: int, period: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.period = period
+        self._rate = capacity / period
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._reset_at: float | None = None
+
+    def reserve(self, n: int = 1) -> float:
+        """Take n tokens and return the seconds to wait before using them."""
+        with self._lock:
+            now = self._refill()
+            self._tokens -= n
+            return self._delay_for(self._tokens, now)
+
+    def eta(self, n: int) -> float:
+        """Predict how long until n more calls could all be made, without reserving."""
+        with self._lock:
+            now = self._refill()
+            return self._delay_for(self._tokens - n, now)
+
+    def sync(self, remaining: int, reset_in: float) -> None:
+        """Adopt the API's view: `remaining` calls left until `reset_in` seconds from now."""
+        with self._lock:
+            now = self._refill()
+            # Keep reservations already handed out that the API hasn't seen yet.
+            self._tokens = min(self._tokens, float(remaining))
+            self._reset_at = now + max(reset_in, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. after a 429)."""
+        self.sync(0, seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> bool:
+        """Refill from rate-limit response headers, if present.
+
+        Understands x-rate-limit-remaining/x-rate-limit-reset (Twitter),
+        Retry-After, and Meta's x-app-usage percentage header (Threads).
+        Returns False if the headers carried no rate-limit information.
+        """
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        if remaining is not None and reset is not None:
+            self.sync(int(remaining), float(reset) - time.time())
+            return True
+
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                self.pause(float(retry_after))
+            except ValueError:
+                self.pause(DEFAULT_BACKOFF)
+            return True
+
+        usage = headers.get("x-app-usage")
+        if usage is not None:
+            try:
+                percent = max(float(v) for v in json.loads(usage).values())
+            except (ValueError, TypeError, AttributeError):
+                return False
+            if percent >= 100:
+                self.pause(DEFAULT_BACKOFF)
+            return True
+
+        return False
+
+    def throttled(self, headers: Mapping[str, str]) -> None:
+        """Record a rate-limit rejection, backing off by default if headers don't say how long."""
+        if not self.update_from_headers(headers):
+            self.pause(DEFAULT_BACKOFF)
+
+    def _refill(self) -> float:
+        now = self._clock()
+        if self._reset_at is not None:
+            if now < self._reset_at:
+                self._updated = now
+                return now
+            # Window rolled over: a full window's worth of calls, less
+            # any reservations still waiting on it.
+            self._tokens = self.capacity + min(self._tokens, 0.0)
+            self._reset_at = None
+            self._updated = now
+            return now
+        self._tokens = min(float(self.capacity), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        return now
+
+    def _delay_for(self, tokens: float, now: float) -> float:
+        if tokens >= 0:
+            return 0.0
+        if self._reset_at is None:
+            return -tokens / self._rate
+        after_reset = self.capacity + tokens
+        wait = self._reset_at - now
+        if after_reset < 0:
+            wait += -after_reset / self._rate
+        return wait
+
+
+class RateLimiter:
+    """Shared token buckets, one per (platform, account)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, platform: str, account: str, capacity: int, period: float) -> TokenBucket:
+        key = (platform, account)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or (bucket.capacity, bucket.period) != (capacity, period):
+                bucket = TokenBucket(capacity, period)
+                self._buckets[key] = bucket
+            return bucket
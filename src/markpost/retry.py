@@ -0,0 +1,61 @@
+# src/markpost/retry.py
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import TypeVar
+
+T = TypeVar("T")
+
+ATTEMPTS = 4
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+
+def backoff_delays(attempts: int = ATTEMPTS, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> Iterator[float]:
+    """Yield attempts - 1 sleep durations using exponential backoff with full jitter."""
+    for attempt in range(attempts - 1):
+        yield random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry(
+    func: Callable[[], T],
+    is_transient: Callable[[Exception], bool],
+    attempts: int = ATTEMPTS,
+    on_retry: Callable[[Exception], None] | None = None,
+) -> T:
+    """Call func, retrying transient failures with jittered backoff.
+
+    on_retry, if given, is called with each failure that will be retried.
+    """
+    for delay in backoff_delays(attempts):
+        try:
+            return func()
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            if on_retry is not None:
+                on_retry(e)
+        time.sleep(delay)
+    return func()
+
+
+async def aretry(
+    func: Callable[[], Awaitable[T]],
+    is_transient: Callable[[Exception], bool],
+    attempts: int = ATTEMPTS,
+    on_retry: Callable[[Exception], None] | None = None,
+) -> T:
+    """Async version of retry()."""
+    for delay in backoff_delays(attempts):
+        try:
+            return await func()
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            if on_retry is not None:
+                on_retry(e)
+        await asyncio.sleep(delay)
+    return await func()
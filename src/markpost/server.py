@@ -1,18 +1,104 @@
 # src/markpost/server.py
 from __future__ import annotations
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from pathlib import Path
 from typing import Annotated
 
-from fastmcp import FastMCP
-from pydantic import Field
+from fastmcp import Context, FastMCP
+from fastmcp.server.dependencies import get_context
+from pydantic import BaseModel, Field
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
-from markpost.config import load_config
-from markpost.formatter import markdown_to_plain, markdown_to_html, split_into_thread
-from markpost.publishers.twitter import post_to_twitter, TWITTER_CHAR_LIMIT
-from markpost.publishers.threads import post_to_threads, THREADS_CHAR_LIMIT
-from markpost.publishers.blog import publish_to_blog
+from markpost import fanout
+from markpost.blogindex import PostIndex, site_files
+from markpost.checkpoint import CheckpointStore, account_key, thread_digest
+from markpost.clients import ClientRegistry
+from markpost.config import BlogConfig, ConfigService, ThreadsConfig, TwitterConfig
+from markpost.fanout import fan_out, run_blocking
+from markpost.jobs import JobProgress, JobQueue, JobStore
+from markpost.manifest import BlogManifest
+from markpost.metrics import cache_hit_rates, cache_requests, registry, span
+from markpost.ratelimit import RateLimiter, TokenBucket
+from markpost.store import SQLiteStore
+from markpost.idempotency import IdempotencyCache, request_key
+from markpost.formatter import render_cache
+from markpost.templates import layouts, render_blog_page
+from markpost.length import TextLength
+from markpost.publishers.twitter import post_to_twitter, TWITTER_CHAR_LIMIT, TWITTER_LENGTH
+from markpost.publishers.threads import post_to_threads, THREADS_CHAR_LIMIT, THREADS_LENGTH
+from markpost.publishers.blog import apublish_to_blog, aupload_to_blog, s3_pool, slugify
 
-mcp = FastMCP(name="Markpost")
+logger = logging.getLogger(__name__)
+
+JOBS_DB = "jobs.sqlite3"
+CHECKPOINTS_DB = "checkpoints.sqlite3"
+IDEMPOTENCY_DB = "idempotency.sqlite3"
+BLOG_MANIFEST_DB = "blog_manifest.sqlite3"
+POST_INDEX_DB = "posts.sqlite3"
+# Posts from one publish_batch call published at once. Each can occupy an
+# S3 upload thread, so this stays below blog.S3_WORKERS to leave room for
+# other requests.
+BATCH_CONCURRENCY = 4
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Resume unfinished jobs on startup; release shared resources on shutdown."""
+    try:
+        config = config_service.get()
+        _get_job_queue(config)
+        _open_store(IdempotencyCache, config, IDEMPOTENCY_DB).prune(config.idempotency_ttl)
+        _preload_layout(config.blog)
+    except Exception:
+        logger.warning("Could not load config at startup; unfinished jobs resume on next submit", exc_info=True)
+    try:
+        yield
+    finally:
+        if _job_queue is not None:
+            await _job_queue.stop()
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+        await clients.aclose()
+        fanout.shutdown()
+        s3_pool.shutdown()
+
+
+mcp = FastMCP(name="Markpost", lifespan=lifespan)
+
+
+class BatchPost(BaseModel):
+    """One post in a publish_batch call."""
+
+    content: str = Field(description="Markdown-formatted content to publish")
+    title: str | None = Field(None, description="Post title (used for blog HTML <title>)")
+    slug: str | None = Field(None, description="URL slug for blog post (e.g. 'my-first-post')")
+    platforms: list[str] | None = Field(None, description="Platforms for this post. Defaults to the batch's platforms.")
+    idempotency_key: str | None = Field(None, description="Optional key identifying this publish")
+
+config_service = ConfigService()
+clients = ClientRegistry()
+rate_limits = RateLimiter()
+_job_queue: JobQueue | None = None
+# stop() tasks of queues replaced after a state_dir change; held so they aren't collected mid-run.
+_retired_queues: set[asyncio.Task] = set()
+_stores: dict[tuple[type, Path], SQLiteStore] = {}
+# Publishes currently running, by request key, so identical concurrent calls share one.
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def _collect_render_cache() -> None:
+    stats = render_cache.stats()
+    cache_requests.set(stats["hits"], cache="render", result="hit")
+    cache_requests.set(stats["misses"], cache="render", result="miss")
+
+
+registry.on_collect(_collect_render_cache)
 
 
 @mcp.tool
@@ -21,6 +107,38 @@ def ping() -> str:
     return "pong"
 
 
+@mcp.tool
+def metrics() -> dict:
+    """Report publishing counters and latency histograms.
+
+    Covers time spent in each publish stage (format, split, render,
+    client_setup, publish), every platform API call, retries, rate-limit
+    waits and cache lookups, with each cache's hit rate. Histograms give
+    count, sum (seconds) and cumulative bucket counts. In HTTP mode the
+    same data is served for Prometheus at /metrics.
+    """
+    return {"metrics": registry.snapshot(), "cache_hit_rates": cache_hit_rates()}
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (HTTP transport only)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.tool
+def reload_config() -> dict:
+    """Re-read the config file now instead of waiting for it to change on disk.
+
+    If the file is invalid, the error is raised and the previous config stays active.
+    """
+    config = config_service.reload()
+    return {
+        "path": str(config_service.path),
+        "platforms": _configured_platforms(config),
+    }
+
+
 @mcp.tool
 async def publish_post(
     content: Annotated[str, Field(description="Markdown-formatted content to publish")],
@@ -30,6 +148,10 @@ async def publish_post(
         list[str],
         Field(description="Platforms to publish to: 'twitter', 'threads', 'blog'. Defaults to all."),
     ] = None,
+    idempotency_key: Annotated[
+        str | None,
+        Field(description="Optional key identifying this publish; retries with the same key return the first result"),
+    ] = None,
 ) -> dict:
     """Publish Markdown content to social media and/or a static blog.
 
@@ -37,36 +159,503 @@ async def publish_post(
     - Twitter/X: Converts to plain text, auto-splits into threads at 280 chars
     - Threads: Converts to plain text, auto-splits into threads at 500 chars
     - Blog: Renders full HTML and uploads to S3
+
+    Platforms are published concurrently. If some platforms fail, the
+    others still complete; failures are reported under "errors".
+
+    Safe to retry: a call identical to one that already succeeded (or with
+    the same idempotency_key) returns the stored result, marked
+    "replayed", without publishing again.
     """
-    config = load_config()
+    config = config_service.get()
 
     if platforms is None:
         platforms = _configured_platforms(config)
+    _require_configured(platforms, config)
+
+    return await _publish_idempotent(content, title, slug, platforms, idempotency_key, config)
+
+
+@mcp.tool
+async def publish_batch(
+    posts: Annotated[list[BatchPost], Field(description="Posts to publish")],
+    platforms: Annotated[
+        list[str],
+        Field(description="Platforms for posts that don't list their own. Defaults to all configured."),
+    ] = None,
+) -> dict:
+    """Publish many posts in one call.
+
+    All posts share one config load, the pooled platform clients and the
+    per-account rate limits. They are rendered up front and then published
+    concurrently, a few at a time, so one slow post never holds up the
+    rest. Each post is idempotent exactly like publish_post. Progress and
+    each post's result are reported as soon as that post finishes; the
+    response lists every result in input order, with failures under "error".
+    """
+    config = config_service.get()
+    ctx = _request_context()
+
+    if platforms is None:
+        platforms = _configured_platforms(config)
+
+    await asyncio.gather(
+        *(run_blocking(_render, post.content, post.title, post.platforms or platforms, config) for post in posts)
+    )
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def publish_one(index: int, post: BatchPost) -> tuple[int, dict]:
+        post_platforms = post.platforms or platforms
+        entry: dict = {"index": index, "title": post.title}
+        async with semaphore:
+            try:
+                _require_configured(post_platforms, config)
+                entry.update(
+                    await _publish_idempotent(
+                        post.content, post.title, post.slug, post_platforms, post.idempotency_key, config
+                    )
+                )
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+        return index, entry
+
+    finished: dict[int, dict] = {}
+    pending = [publish_one(index, post) for index, post in enumerate(posts)]
+    for next_done in asyncio.as_completed(pending):
+        index, entry = await next_done
+        finished[index] = entry
+        if ctx is not None:
+            await ctx.report_progress(len(finished), len(posts), f"Post {index} finished")
+            await ctx.info(f"Post {index} finished", extra=entry)
+
+    results = [finished[index] for index in range(len(posts))]
+    failed = sum(1 for entry in results if "error" in entry or "errors" in entry)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
+@mcp.tool
+async def submit_post(
+    content: Annotated[str, Field(description="Markdown-formatted content to publish")],
+    title: Annotated[str | None, Field(description="Post title (used for blog HTML <title>)")] = None,
+    slug: Annotated[str | None, Field(description="URL slug for blog post (e.g. 'my-first-post')")] = None,
+    platforms: Annotated[
+        list[str],
+        Field(description="Platforms to publish to: 'twitter', 'threads', 'blog'. Defaults to all."),
+    ] = None,
+) -> dict:
+    """Queue a post for publishing in the background and return a job ID immediately.
+
+    Same formatting as publish_post. Use get_job_status to follow progress.
+    Jobs are stored on disk and resume after a server restart. The response
+    includes each platform's predicted wait, in seconds, under the current
+    rate limits.
+    """
+    config = config_service.get()
+
+    if platforms is None:
+        platforms = _configured_platforms(config)
+    _require_configured(platforms, config)
+
+    job_id = _get_job_queue(config).submit(
+        {"content": content, "title": title, "slug": slug, "platforms": platforms}
+    )
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "estimated_wait_seconds": _estimate_waits(content, platforms, config),
+    }
+
+
+@mcp.tool
+async def schedule_post(
+    content: Annotated[str, Field(description="Markdown-formatted content to publish")],
+    publish_at: Annotated[
+        str,
+        Field(description="When to publish, as an ISO 8601 datetime (e.g. '2025-03-01T09:00:00+00:00'). "
+                          "Times without an offset are in the server's local time zone."),
+    ],
+    title: Annotated[str | None, Field(description="Post title (used for blog HTML <title>)")] = None,
+    slug: Annotated[str | None, Field(description="URL slug for blog post (e.g. 'my-first-post')")] = None,
+    platforms: Annotated[
+        list[str],
+        Field(description="Platforms to publish to: 'twitter', 'threads', 'blog'. Defaults to all."),
+    ] = None,
+) -> dict:
+    """Schedule a post to be published at a given time and return a job ID.
+
+    The job is stored on disk with status "scheduled" and survives server
+    restarts; a job whose time passed while the server was down runs as
+    soon as it starts again. When due, it is queued like submit_post and
+    can be followed with get_job_status.
+    """
+    config = config_service.get()
+
+    run_at = _parse_publish_at(publish_at)
+    if platforms is None:
+        platforms = _configured_platforms(config)
+    _require_configured(platforms, config)
+
+    job_id = _get_job_queue(config).schedule(
+        {"content": content, "title": title, "slug": slug, "platforms": platforms},
+        run_at.timestamp(),
+    )
+    return {"job_id": job_id, "status": "scheduled", "publish_at": run_at.isoformat()}
 
-    results: dict = {}
-    plain = markdown_to_plain(content)
+
+@mcp.tool
+async def get_job_status(
+    job_id: Annotated[str, Field(description="Job ID returned by submit_post")],
+) -> dict:
+    """Report a background job's overall status and per-platform progress."""
+    job = _get_job_queue(config_service.get()).store.get(job_id)
+    if job is None:
+        raise ValueError(f"Unknown job: {job_id}")
+    return job
+
+
+@mcp.tool
+async def list_jobs(
+    status: Annotated[
+        str | None,
+        Field(description="Only list jobs in this state: scheduled, queued, running, succeeded, partial, failed"),
+    ] = None,
+    limit: Annotated[int, Field(description="Maximum number of jobs to return, newest first")] = 20,
+) -> dict:
+    """List background publish jobs, newest first."""
+    return {"jobs": _get_job_queue(config_service.get()).store.list(status=status, limit=limit)}
+
+
+def _parse_publish_at(publish_at: str) -> datetime:
+    if publish_at.endswith("Z"):
+        # Python 3.10's fromisoformat() does not accept a trailing "Z".
+        publish_at = publish_at[:-1] + "+00:00"
+    try:
+        run_at = datetime.fromisoformat(publish_at)
+    except ValueError:
+        raise ValueError(f"publish_at is not an ISO 8601 datetime: {publish_at!r}") from None
+    # Naive times are local; astimezone() attaches the local offset.
+    run_at = run_at.astimezone()
+    if run_at <= datetime.now(run_at.tzinfo):
+        raise ValueError(f"publish_at is in the past: {publish_at}")
+    return run_at
+
+
+def _get_job_queue(config) -> JobQueue:
+    """Return the job queue for config.state_dir, starting its workers if needed."""
+    global _job_queue
+    path = config.state_dir / JOBS_DB
+    loop = asyncio.get_running_loop()
+    if _job_queue is not None and _job_queue.path == path and _job_queue.loop is loop:
+        return _job_queue
+
+    if _job_queue is not None and _job_queue.loop is loop:
+        unfinished = _job_queue.store.unfinished()
+        if unfinished:
+            logger.warning(
+                "state_dir changed; stopping the job queue at %s with unfinished jobs %s. "
+                "They resume when that state_dir is used again.",
+                _job_queue.path,
+                ", ".join(unfinished),
+            )
+        task = loop.create_task(_job_queue.stop())
+        _retired_queues.add(task)
+        task.add_done_callback(_retired_queues.discard)
+    _job_queue = JobQueue(JobStore(path), _run_job)
+    _job_queue.start()
+    return _job_queue
+
+
+async def _run_job(request: dict, progress: JobProgress) -> dict[str, str]:
+    """Publish a queued job, skipping platforms a previous attempt finished."""
+    config = config_service.get()
+    platforms: list[str] = []
+    errors: dict[str, str] = {}
+
+    for platform in request["platforms"]:
+        if progress.completed(platform):
+            continue
+        try:
+            _require_configured([platform], config)
+        except ValueError as e:
+            errors[platform] = str(e)
+            progress.failed(platform, str(e))
+            continue
+        platforms.append(platform)
+        progress.started(platform)
+
+    results, publish_errors = await _publish(
+        request["content"], request["title"], request["slug"], platforms, config, progress
+    )
+    for platform, result in results.items():
+        progress.succeeded(platform, result)
+    for platform, error in publish_errors.items():
+        progress.failed(platform, error)
+
+    errors.update(publish_errors)
+    return errors
+
+
+async def _publish_idempotent(
+    content: str,
+    title: str | None,
+    slug: str | None,
+    platforms: list[str],
+    idempotency_key: str | None,
+    config,
+) -> dict:
+    """Publish once per request key, replaying stored or in-flight results for repeats."""
+    key = request_key(content, title, slug, platforms, idempotency_key)
+    cache = _open_store(IdempotencyCache, config, IDEMPOTENCY_DB)
+    cached = cache.get(key, ttl=config.idempotency_ttl)
+    if cached is not None:
+        cache_requests.inc(cache="idempotency", result="hit")
+        return {**cached, "replayed": True}
+
+    running = _in_flight.get(key)
+    if running is not None:
+        cache_requests.inc(cache="idempotency", result="hit")
+        return {**await asyncio.shield(running), "replayed": True}
+
+    cache_requests.inc(cache="idempotency", result="miss")
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        results, errors = await _publish(content, title, slug, platforms, config)
+        if errors:
+            results["errors"] = errors
+        else:
+            cache.put(key, results)
+        future.set_result(results)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody may be waiting on it; don't warn about an unretrieved exception.
+        future.exception()
+        raise
+    finally:
+        del _in_flight[key]
+
+    return results
+
+
+def _request_context() -> Context | None:
+    """The MCP request context, or None when called outside a request."""
+    # Taken from here rather than as a tool parameter: FastMCP can't resolve
+    # this module's postponed annotations on tools that declare a Context.
+    try:
+        return get_context()
+    except RuntimeError:
+        return None
+
+
+def _render(content: str, title: str | None, platforms: list[str], config) -> None:
+    """Warm the render cache with everything publishing to these platforms will need."""
+    if "twitter" in platforms:
+        render_cache.thread(content, TWITTER_CHAR_LIMIT, TWITTER_LENGTH)
+    if "threads" in platforms:
+        render_cache.thread(content, THREADS_CHAR_LIMIT, THREADS_LENGTH)
+    if "blog" in platforms:
+        render_cache.html(content, title, config.blog.markdown_extensions)
+
+
+async def _publish(
+    content: str,
+    title: str | None,
+    slug: str | None,
+    platforms: list[str],
+    config,
+    progress: JobProgress | None = None,
+) -> tuple[dict, dict[str, str]]:
+    """Publish to every requested platform concurrently.
+
+    Returns (results, errors) keyed by platform.
+    """
+    jobs: dict = {}
+    checkpoints = _open_store(CheckpointStore, config, CHECKPOINTS_DB)
 
     if "twitter" in platforms:
-        if config.twitter is None:
-            raise ValueError("Twitter is not configured. Add a [twitter] section to your config.")
-        parts = split_into_thread(plain, max_chars=TWITTER_CHAR_LIMIT)
-        tweet_ids = post_to_twitter(parts, config.twitter)
-        results["twitter"] = {"tweet_ids": tweet_ids, "parts": len(parts)}
+        jobs["twitter"] = _publish_twitter(content, config.twitter, checkpoints, progress)
 
     if "threads" in platforms:
-        if config.threads is None:
-            raise ValueError("Threads is not configured. Add a [threads] section to your config.")
-        parts = split_into_thread(plain, max_chars=THREADS_CHAR_LIMIT)
-        post_ids = await post_to_threads(parts, config.threads)
-        results["threads"] = {"post_ids": post_ids, "parts": len(parts)}
+        jobs["threads"] = _publish_threads(content, config.threads, checkpoints, progress)
 
     if "blog" in platforms:
-        html = markdown_to_html(content, title=title)
-        post_slug = slug or _slugify(title or "post")
-        url = publish_to_blog(html, post_slug, config.blog)
-        results["blog"] = {"url": url}
+        manifest = _open_store(BlogManifest, config, BLOG_MANIFEST_DB)
+        index = _open_store(PostIndex, config, POST_INDEX_DB) if config.blog.site_index else None
+        jobs["blog"] = _publish_blog(content, title, slug, config.blog, manifest, index)
+
+    return await fan_out(jobs)
+
+
+async def _publish_twitter(
+    content: str,
+    config: TwitterConfig,
+    checkpoints: CheckpointStore,
+    progress: JobProgress | None = None,
+) -> dict:
+    with span("publish", "twitter"):
+        parts = _thread_parts(content, TWITTER_CHAR_LIMIT, TWITTER_LENGTH, "twitter")
+        resume = _resume_kwargs(parts, "twitter", account_key(config.access_token), checkpoints, progress)
+        with span("client_setup", "twitter"):
+            client = clients.http()
+        tweet_ids = await post_to_twitter(parts, config, client=client, bucket=_twitter_bucket(config), **resume)
+    return {"tweet_ids": tweet_ids, "parts": len(parts)}
+
+
+async def _publish_threads(
+    content: str,
+    config: ThreadsConfig,
+    checkpoints: CheckpointStore,
+    progress: JobProgress | None = None,
+) -> dict:
+    with span("publish", "threads"):
+        parts = _thread_parts(content, THREADS_CHAR_LIMIT, THREADS_LENGTH, "threads")
+        resume = _resume_kwargs(parts, "threads", config.user_id, checkpoints, progress)
+        with span("client_setup", "threads"):
+            client = clients.http()
+        post_ids = await post_to_threads(
+            parts,
+            config,
+            client=client,
+            bucket=_threads_bucket(config),
+            **resume,
+        )
+    return {"post_ids": post_ids, "parts": len(parts)}
+
+
+async def _publish_blog(
+    content: str,
+    title: str | None,
+    slug: str | None,
+    config: BlogConfig,
+    manifest: BlogManifest,
+    index: PostIndex | None = None,
+) -> dict:
+    """Upload the post and, with a post index, refresh the site's index, feed and sitemaps."""
+    with span("publish", "blog"):
+        post_slug = slug or slugify(title or "post")
+        today = date.today()
+        with span("render", "blog"):
+            html = _blog_html(content, title, post_slug, config, today)
+        with span("client_setup", "blog"):
+            s3 = clients.s3(config)
+        url = await apublish_to_blog(html, post_slug, config, client=s3, manifest=manifest, published=today)
+        if index is None:
+            return {"url": url}
+
+        month = index.add(config.s3_bucket, url, title or post_slug, today)
+        with span("site_files", "blog"):
+            files = await run_blocking(site_files, index, config, {month})
+        uploaded = await aupload_to_blog(files, config, client=s3, manifest=manifest)
+    result: dict = {"url": url}
+    site_errors = {key: entry["error"] for key, entry in uploaded.items() if "error" in entry}
+    if site_errors:
+        result["site_errors"] = site_errors
+    return result
+
+
+def _thread_parts(content: str, max_chars: int, length: TextLength, platform: str) -> list[str]:
+    """Thread parts for a platform, timing the format and split stages separately."""
+    with span("format", platform):
+        render_cache.plain(content)
+    with span("split", platform):
+        return render_cache.thread(content, max_chars, length)
+
+
+def _twitter_bucket(config: TwitterConfig) -> TokenBucket:
+    return rate_limits.bucket("twitter", config.access_token, config.rate_limit, config.rate_window)
+
+
+def _threads_bucket(config: ThreadsConfig) -> TokenBucket:
+    return rate_limits.bucket("threads", config.user_id, config.rate_limit, config.rate_window)
+
+
+def _estimate_waits(content: str, platforms: list[str], config) -> dict[str, float]:
+    """Predict, per platform, how long until every part of this post could be sent."""
+    waits: dict[str, float] = {}
+    if "twitter" in platforms:
+        parts = render_cache.thread(content, TWITTER_CHAR_LIMIT, TWITTER_LENGTH)
+        waits["twitter"] = round(_twitter_bucket(config.twitter).eta(len(parts)), 1)
+    if "threads" in platforms:
+        parts = render_cache.thread(content, THREADS_CHAR_LIMIT, THREADS_LENGTH)
+        waits["threads"] = round(_threads_bucket(config.threads).eta(len(parts)), 1)
+    if "blog" in platforms:
+        waits["blog"] = 0.0
+    return waits
 
-    return results
+
+def _resume_kwargs(
+    parts: list[str],
+    platform: str,
+    account: str,
+    checkpoints: CheckpointStore,
+    progress: JobProgress | None,
+) -> dict:
+    """Publisher arguments that continue a thread from its last posted part.
+
+    Parts already posted for the same content (by an earlier call or by
+    this job before a restart) are skipped; each new part is checkpointed.
+    """
+    digest = thread_digest(parts)
+    posted = checkpoints.posted(platform, account, digest)
+    record_job_part = None
+    if progress is not None:
+        job_posted = progress.posted(platform)
+        if len(job_posted) > len(posted):
+            posted = job_posted
+        record_job_part = progress.recorder(platform)
+
+    def on_posted(index: int, post_id: str) -> None:
+        checkpoints.record(platform, account, digest, index, post_id)
+        if record_job_part is not None:
+            record_job_part(index, post_id)
+
+    return {"resume_from": posted, "on_posted": on_posted}
+
+
+def _open_store(cls: type, config, filename: str):
+    """Return the process-wide store of this type under config.state_dir."""
+    path = config.state_dir / filename
+    store = _stores.get((cls, path))
+    if store is None:
+        store = _stores[(cls, path)] = cls(path)
+    return store
+
+
+def _blog_html(content: str, title: str | None, slug: str, config: BlogConfig | None, published: date) -> str:
+    """Full blog page HTML; without a usable config, the built-in page with no extensions."""
+    if config is None:
+        return render_cache.html(content, title)
+    return render_blog_page(content, title, slug, published, config)
+
+
+def _preload_layout(config: BlogConfig) -> None:
+    """Compile the blog layout now so the first publish doesn't pay for it."""
+    if not config.layout:
+        return
+    try:
+        layouts.get(config.layout)
+    except Exception:
+        logger.warning("Could not compile blog layout %s", config.layout, exc_info=True)
+
+
+def _preview_blog_config() -> BlogConfig | None:
+    """Blog config for previews, or None if there is no usable config."""
+    try:
+        return config_service.get().blog
+    except (OSError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _require_configured(platforms: list[str], config) -> None:
+    if "twitter" in platforms and config.twitter is None:
+        raise ValueError("Twitter is not configured. Add a [twitter] section to your config.")
+    if "threads" in platforms and config.threads is None:
+        raise ValueError("Threads is not configured. Add a [threads] section to your config.")
 
 
 def _configured_platforms(config) -> list[str]:
@@ -79,18 +668,6 @@ def _configured_platforms(config) -> list[str]:
     return platforms
 
 
-import re
-
-
-def _slugify(text: str) -> str:
-    """Convert text to a URL-safe slug."""
-    slug = text.lower().strip()
-    slug = re.sub(r"[^\w\s-]", "", slug)
-    slug = re.sub(r"[\s_]+", "-", slug)
-    slug = re.sub(r"-+", "-", slug)
-    return slug.strip("-")
-
-
 @mcp.tool
 def preview_post(
     content: Annotated[str, Field(description="Markdown-formatted content to preview")],
@@ -103,30 +680,31 @@ def preview_post(
     """Preview how content will be formatted for each platform.
 
     Returns the formatted text and thread splits without actually publishing.
-    Use this to verify formatting before calling publish_post.
+    Use this to verify formatting before calling publish_post. char_counts
+    are what each platform counts against its limit: Twitter's weighted
+    length, with every link as 23, and user-perceived characters on Threads.
     """
     if platforms is None:
         platforms = ["twitter", "threads", "blog"]
 
     results: dict = {}
-    plain = markdown_to_plain(content)
 
     if "twitter" in platforms:
-        parts = split_into_thread(plain, max_chars=TWITTER_CHAR_LIMIT)
+        parts = render_cache.thread(content, TWITTER_CHAR_LIMIT, TWITTER_LENGTH)
         results["twitter"] = {
             "parts": parts,
-            "char_counts": [len(p) for p in parts],
+            "char_counts": [TWITTER_LENGTH(p) for p in parts],
         }
 
     if "threads" in platforms:
-        parts = split_into_thread(plain, max_chars=THREADS_CHAR_LIMIT)
+        parts = render_cache.thread(content, THREADS_CHAR_LIMIT, THREADS_LENGTH)
         results["threads"] = {
             "parts": parts,
-            "char_counts": [len(p) for p in parts],
+            "char_counts": [THREADS_LENGTH(p) for p in parts],
         }
 
     if "blog" in platforms:
-        html = markdown_to_html(content, title=title)
+        html = _blog_html(content, title, slugify(title or "post"), _preview_blog_config(), date.today())
         results["blog"] = {"html": html}
 
     return results
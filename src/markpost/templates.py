@@ -0,0 +1,115 @@
+# src/markpost/templates.py
+from __future__ import annotations
+
+import threading
+from datetime import date
+from pathlib import Path
+
+from markpost.config import BlogConfig
+from markpost.formatter import render_cache
+
+try:
+    import jinja2
+    from markupsafe import Markup
+except ModuleNotFoundError:
+    jinja2 = None
+
+# Characters of plain text kept for a post's excerpt.
+EXCERPT_CHARS = 200
+
+
+class LayoutCache:
+    """Compiled Jinja2 layouts, one environment per template directory.
+
+    A layout is parsed and compiled the first time it is used (or when
+    preloaded at startup) and then reused for every page; Jinja2 only
+    stats the file to notice edits. Layouts may extend or include other
+    templates from their own directory. Output is autoescaped, and the
+    post body is passed in as already-safe HTML.
+    """
+
+    def __init__(self) -> None:
+        self._environments: dict[Path, jinja2.Environment] = {}
+        self._lock = threading.Lock()
+
+    def get(self, layout: str | Path) -> jinja2.Template:
+        if jinja2 is None:
+            raise RuntimeError('Blog layouts need Jinja2: pip install "markpost[templates]"')
+        path = Path(layout).expanduser().resolve()
+        with self._lock:
+            env = self._environments.get(path.parent)
+            if env is None:
+                env = self._environments[path.parent] = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(path.parent),
+                    autoescape=True,
+                    auto_reload=True,
+                )
+        return env.get_template(path.name)
+
+    def render(self, layout: str | Path, body: str, **context) -> str:
+        """Render a post body into a layout; context is passed to the template as-is."""
+        return self.get(layout).render(content=Markup(body), **context)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._environments.clear()
+
+
+def layout_files(layout: str | Path) -> list[Path]:
+    """The layout file and every template it extends, includes or imports.
+
+    Only templates named by a string literal can be followed; the rest
+    of the layout's directory is never read. Missing templates are left
+    out, so rendering reports them instead.
+    """
+    path = Path(layout).expanduser().resolve()
+    if jinja2 is None:
+        return [path] if path.is_file() else []
+    from jinja2 import meta
+
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(path.parent))
+    found: dict[str, Path] = {}
+    pending = [path.name]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        try:
+            source, filename, _ = env.loader.get_source(env, name)
+        except jinja2.TemplateNotFound:
+            continue
+        found[name] = Path(filename)
+        try:
+            referenced = meta.find_referenced_templates(env.parse(source))
+        except jinja2.TemplateSyntaxError:
+            continue
+        pending.extend(ref for ref in referenced if ref is not None)
+    return sorted(found.values())
+
+
+def render_blog_page(content: str, title: str | None, slug: str, published: date, config: BlogConfig) -> str:
+    """Full HTML page for a post: the config's layout if it has one, else the built-in page."""
+    if not config.layout:
+        return render_cache.html(content, title, config.markdown_extensions)
+    return layouts.render(
+        config.layout,
+        render_cache.html(content, None, config.markdown_extensions),
+        title=title,
+        date=published.isoformat(),
+        slug=slug,
+        excerpt=excerpt(render_cache.plain(content)),
+        site_title=config.site_title,
+        base_url=config.base_url,
+    )
+
+
+def excerpt(plain: str, limit: int = EXCERPT_CHARS) -> str:
+    """The first paragraph of plain text, cut at a word boundary within limit."""
+    first = plain.strip().split("\n\n", 1)[0].replace("\n", " ")
+    if len(first) <= limit:
+        return first
+    cut = first.rfind(" ", 0, limit)
+    return first[: cut if cut > 0 else limit].rstrip() + "…"
+
+
+layouts = LayoutCache()
@@ -3,6 +3,22 @@ from unittest.mock import patch, MagicMock
 from datetime import date
 
 
+def _recording_s3():
+    """A mock S3 client that records every put or streamed upload; uploads are kept by key."""
+    s3 = MagicMock()
+    s3.uploads = {}
+
+    def put(Key, **kwargs):
+        s3.uploads[Key] = kwargs
+
+    def upload(body, bucket, key, ExtraArgs=None, **kwargs):
+        s3.uploads[key] = {"Bucket": bucket, "Body": body.read(), **(ExtraArgs or {})}
+
+    s3.put_object.side_effect = put
+    s3.upload_fileobj.side_effect = upload
+    return s3
+
+
 def test_publish_to_blog():
     from markpost.config import BlogConfig
     from markpost.publishers.blog import publish_to_blog
@@ -15,7 +31,7 @@ def test_publish_to_blog():
     )
 
     with patch("markpost.publishers.blog.boto3.client") as mock_boto:
-        mock_s3 = MagicMock()
+        mock_s3 = _recording_s3()
         mock_boto.return_value = mock_s3
 
         url = publish_to_blog(
@@ -24,13 +40,12 @@ def test_publish_to_blog():
             config=config,
         )
 
-    mock_s3.put_object.assert_called_once()
-    call_kwargs = mock_s3.put_object.call_args[1]
-    assert call_kwargs["Bucket"] == "my-blog"
-    assert call_kwargs["Key"].startswith("posts/")
-    assert call_kwargs["Key"].endswith("my-first-post.html")
-    assert call_kwargs["ContentType"] == "text/html"
-    assert call_kwargs["Body"] == "<h1>Test</h1>"
+    [(key, upload)] = mock_s3.uploads.items()
+    assert upload["Bucket"] == "my-blog"
+    assert key.startswith("posts/")
+    assert key.endswith("my-first-post.html")
+    assert upload["ContentType"] == "text/html"
+    assert upload["Body"] == b"<h1>Test</h1>"
     assert "blog.example.com" in url
 
 
@@ -53,5 +68,352 @@ def test_publish_to_blog_generates_slug_from_title():
             config=config,
         )
 
-    call_kwargs = mock_s3.put_object.call_args[1]
-    assert "hello-world.html" in call_kwargs["Key"]
+    key = mock_s3.put_object.call_args.kwargs["Key"]
+    assert "hello-world.html" in key
+
+
+def test_upload_to_blog_reports_each_key():
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com/", s3_prefix="posts/")
+
+    def put(Key, **kwargs):
+        if Key.endswith("bad.html"):
+            raise RuntimeError("denied")
+
+    s3 = MagicMock()
+    s3.put_object.side_effect = put
+
+    manifest = upload_to_blog(
+        [BlogObject("a.html", "<p>a</p>"), BlogObject("bad.html", "x"), BlogObject("c.css", b"body{}", "text/css")],
+        config,
+        client=s3,
+    )
+
+    assert manifest == {
+        "posts/a.html": {"url": "https://example.com/posts/a.html", "bytes": 8},
+        "posts/bad.html": {"error": "RuntimeError: denied"},
+        "posts/c.css": {"url": "https://example.com/posts/c.css", "bytes": 6},
+    }
+    content_types = {c.kwargs["Key"]: c.kwargs["ContentType"] for c in s3.put_object.call_args_list}
+    assert content_types["posts/c.css"] == "text/css"
+
+
+def test_upload_to_blog_runs_uploads_concurrently():
+    import threading
+    import time
+
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    threads = set()
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def slow_put(**kwargs):
+        nonlocal running, peak
+        with lock:
+            threads.add(threading.get_ident())
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    s3 = MagicMock()
+    s3.put_object.side_effect = slow_put
+
+    manifest = upload_to_blog([BlogObject(f"{i}.html", "x") for i in range(8)], config, client=s3, workers=8)
+
+    assert len(manifest) == 8
+    assert len(threads) > 1
+    assert peak > 1
+
+
+def test_upload_to_blog_against_moto():
+    import pytest
+
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    from markpost.config import BlogConfig
+    from markpost.publishers import blog
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="my-blog", base_url="https://blog.example.com", s3_prefix="posts/")
+    large = b"x" * (6 * 1024 * 1024)
+    objects = [BlogObject(f"post-{i}.html", f"<p>{i}</p>") for i in range(20)]
+    objects.append(BlogObject("big.bin", large, "application/octet-stream"))
+    # S3's minimum part size is 5 MiB
+    transfer = blog.TransferConfig(
+        multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024, use_threads=False
+    )
+
+    with moto.mock_aws(), patch.object(blog, "TRANSFER_CONFIG", transfer):
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my-blog")
+
+        manifest = upload_to_blog(objects, config, client=s3)
+
+        assert all("error" not in entry for entry in manifest.values())
+        assert manifest["posts/big.bin"]["bytes"] == len(large)
+        listed = s3.list_objects_v2(Bucket="my-blog", Prefix="posts/")
+        assert listed["KeyCount"] == 21
+        big = s3.head_object(Bucket="my-blog", Key="posts/big.bin")
+        # Multipart ETags carry a "-<parts>" suffix
+        assert big["ETag"].strip('"').endswith("-2")
+        post = s3.get_object(Bucket="my-blog", Key="posts/post-3.html")
+        assert post["Body"].read() == b"<p>3</p>"
+        assert post["ContentType"] == "text/html"
+
+
+def test_publish_to_blog_skips_unchanged_html(tmp_path):
+    from markpost.config import BlogConfig
+    from markpost.manifest import BlogManifest
+    from markpost.publishers.blog import publish_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+    s3 = MagicMock()
+
+    first = publish_to_blog("<h1>Test</h1>", "post", config, client=s3, manifest=manifest)
+    second = publish_to_blog("<h1>Test</h1>", "post", config, client=s3, manifest=manifest)
+    assert first == second
+    assert s3.put_object.call_count == 1
+
+    publish_to_blog("<h1>Edited</h1>", "post", config, client=s3, manifest=manifest)
+    assert s3.put_object.call_count == 2
+
+
+def test_upload_to_blog_sends_only_changed_objects(tmp_path):
+    from markpost.config import BlogConfig
+    from markpost.manifest import BlogManifest
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+    s3 = MagicMock()
+
+    upload_to_blog([BlogObject("a.html", "a"), BlogObject("b.html", "b")], config, client=s3, manifest=manifest)
+    s3.put_object.reset_mock()
+
+    result = upload_to_blog([BlogObject("a.html", "a"), BlogObject("b.html", "b2")], config, client=s3, manifest=manifest)
+
+    assert result["a.html"]["skipped"] is True
+    assert "skipped" not in result["b.html"]
+    assert [c.kwargs["Key"] for c in s3.put_object.call_args_list] == ["b.html"]
+
+
+def test_failed_upload_is_retried_on_next_sync(tmp_path):
+    from markpost.config import BlogConfig
+    from markpost.manifest import BlogManifest
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+    s3 = MagicMock()
+    s3.put_object.side_effect = [RuntimeError("down"), None]
+
+    assert "error" in upload_to_blog([BlogObject("a.html", "a")], config, client=s3, manifest=manifest)["a.html"]
+    assert "skipped" not in upload_to_blog([BlogObject("a.html", "a")], config, client=s3, manifest=manifest)["a.html"]
+    assert s3.put_object.call_count == 2
+
+
+def test_publish_to_blog_precompresses_with_cache_control():
+    import gzip
+
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import publish_to_blog
+
+    config = BlogConfig(
+        s3_bucket="b",
+        base_url="https://example.com",
+        content_encoding="gzip",
+        cache_control="public, max-age=3600",
+    )
+    s3 = _recording_s3()
+
+    publish_to_blog("<h1>Test</h1>", "post", config, client=s3)
+
+    [call_kwargs] = s3.uploads.values()
+    assert gzip.decompress(call_kwargs["Body"]) == b"<h1>Test</h1>"
+    assert call_kwargs["ContentEncoding"] == "gzip"
+    assert call_kwargs["CacheControl"] == "public, max-age=3600"
+    assert call_kwargs["ContentType"] == "text/html"
+
+
+def test_upload_to_blog_only_compresses_text():
+    import gzip
+
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", content_encoding="gzip")
+    uploaded = {}
+
+    def put(Bucket, Key, Body, **headers):
+        uploaded[Key] = (Body, headers)
+
+    s3 = MagicMock()
+    s3.put_object.side_effect = put
+
+    upload_to_blog(
+        [BlogObject("feed.xml", "<rss/>", "application/rss+xml"), BlogObject("a.png", b"\x89PNG", "image/png")],
+        config,
+        client=s3,
+    )
+
+    body, headers = uploaded["feed.xml"]
+    assert gzip.decompress(body) == b"<rss/>"
+    assert headers["ContentEncoding"] == "gzip"
+    assert uploaded["a.png"] == (b"\x89PNG", {"ContentType": "image/png"})
+
+
+def test_gzip_output_is_stable_for_manifest_skips(tmp_path):
+    from markpost.config import BlogConfig
+    from markpost.manifest import BlogManifest
+    from markpost.publishers.blog import publish_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+    s3 = MagicMock()
+
+    publish_to_blog("<p>x</p>", "post", config, client=s3, manifest=manifest)
+    # Turning compression on changes the stored object, so it is re-uploaded once
+    gzipped = BlogConfig(s3_bucket="b", base_url="https://example.com", content_encoding="gzip")
+    publish_to_blog("<p>x</p>", "post", gzipped, client=s3, manifest=manifest)
+    publish_to_blog("<p>x</p>", "post", gzipped, client=s3, manifest=manifest)
+
+    assert s3.put_object.call_count == 2
+
+
+def test_brotli_requires_optional_dependency():
+    import pytest
+
+    from markpost.config import BlogConfig
+    from markpost.publishers import blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", content_encoding="br")
+    s3 = MagicMock()
+
+    with patch.object(blog, "brotli", None), pytest.raises(RuntimeError, match="brotli"):
+        blog.publish_to_blog("<p>x</p>", "post", config, client=s3)
+    s3.put_object.assert_not_called()
+
+
+def test_publish_to_blog_brotli():
+    import pytest
+
+    brotli = pytest.importorskip("brotli")
+
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import publish_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", content_encoding="br")
+    s3 = _recording_s3()
+
+    publish_to_blog("<h1>Test</h1>", "post", config, client=s3)
+
+    [call_kwargs] = s3.uploads.values()
+    assert brotli.decompress(call_kwargs["Body"]) == b"<h1>Test</h1>"
+    assert call_kwargs["ContentEncoding"] == "br"
+
+
+def test_large_bodies_are_streamed_in_chunks():
+    import gzip
+    import os
+
+    from markpost.config import BlogConfig
+    from markpost.publishers import blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", content_encoding="gzip")
+    html = "<p>é" + os.urandom(3 * blog.STREAM_CHUNK).hex() + "</p>"
+    reads = []
+
+    def upload(body, bucket, key, **kwargs):
+        while chunk := body.read(64 * 1024):
+            reads.append(chunk)
+
+    s3 = MagicMock()
+    s3.upload_fileobj.side_effect = upload
+    transfer = blog.TransferConfig(multipart_threshold=blog.STREAM_CHUNK, use_threads=False)
+
+    with patch.object(blog, "TRANSFER_CONFIG", transfer):
+        entry = blog.upload_to_blog([blog.BlogObject("big.html", html)], config, client=s3)["big.html"]
+
+    s3.put_object.assert_not_called()
+    assert s3.upload_fileobj.call_args.kwargs["Config"] is transfer
+    assert len(reads) > 1
+    assert gzip.decompress(b"".join(reads)) == html.encode()
+    assert entry["bytes"] == len(html.encode())
+
+
+def test_async_uploads_share_the_bounded_s3_pool():
+    import asyncio
+    import threading
+    import time
+
+    from markpost.config import BlogConfig
+    from markpost.publishers import blog
+    from markpost.publishers.blog import BlogObject, aupload_to_blog, apublish_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com")
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_put(Key, **kwargs):
+        with lock:
+            running.append(Key)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(Key)
+
+    s3 = MagicMock()
+    s3.put_object.side_effect = slow_put
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(
+            aupload_to_blog([BlogObject(f"{i}.html", "x") for i in range(6)], config, client=s3),
+            aupload_to_blog([BlogObject(f"{i}.css", "y", "text/css") for i in range(6)], config, client=s3),
+            apublish_to_blog("<p>post</p>", "post", config, client=s3),
+        )
+        task.cancel()
+        return results, ticks
+
+    with patch.object(blog, "s3_pool", blog.WorkerPool(4, "test-s3")):
+        (pages, styles, url), ticks = asyncio.run(main())
+
+    assert len(pages) == len(styles) == 6
+    assert url.endswith("-post.html")
+    assert max(peak) <= 4
+    # The event loop kept running while uploads were in progress
+    assert ticks >= 5
+
+
+def test_small_bodies_are_sent_with_one_put():
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import BlogObject, upload_to_blog
+
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", cache_control="no-cache")
+    s3 = MagicMock()
+
+    upload_to_blog([BlogObject(f"{i}.html", f"<p>{i}</p>") for i in range(3)], config, client=s3)
+
+    # No transfer manager, and so no extra threads, for bodies below the multipart threshold
+    s3.upload_fileobj.assert_not_called()
+    assert sorted(c.kwargs["Key"] for c in s3.put_object.call_args_list) == ["0.html", "1.html", "2.html"]
+    assert s3.put_object.call_args.kwargs["CacheControl"] == "no-cache"
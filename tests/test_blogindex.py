@@ -0,0 +1,64 @@
+# tests/test_blogindex.py
+from datetime import date
+
+
+def _config(**kwargs):
+    from markpost.config import BlogConfig
+
+    return BlogConfig(s3_bucket="b", base_url="https://example.com/", s3_prefix="posts/", **kwargs)
+
+
+def test_post_index_orders_recent_posts_and_tracks_months(tmp_path):
+    from markpost.blogindex import PostIndex
+
+    index = PostIndex(tmp_path / "posts.sqlite3")
+    assert index.add("b", "https://example.com/posts/1.html", "One", date(2024, 1, 5)) == "2024-01"
+    index.add("b", "https://example.com/posts/2.html", "Two", date(2024, 2, 1))
+    index.add("b", "https://example.com/posts/3.html", "Three", date(2024, 2, 9))
+    index.add("other", "https://other.example.com/x.html", "Other", date(2024, 3, 1))
+    # Re-publishing the same URL replaces the entry
+    index.add("b", "https://example.com/posts/1.html", "One (edited)", date(2024, 1, 5))
+
+    assert [p["title"] for p in index.recent("b", 2)] == ["Three", "Two"]
+    assert index.months("b") == ["2024-01", "2024-02"]
+    assert [p["title"] for p in index.in_month("b", "2024-01")] == ["One (edited)"]
+
+
+def test_site_files_only_rebuild_requested_months(tmp_path):
+    from markpost.blogindex import PostIndex, site_files
+
+    config = _config(site_title="Notes & Things")
+    index = PostIndex(tmp_path / "posts.sqlite3")
+    index.add("b", "https://example.com/posts/old.html", "Old", date(2023, 12, 24))
+    month = index.add("b", "https://example.com/posts/new.html", "New <post>", date(2024, 1, 2))
+
+    files = {f.key: f for f in site_files(index, config, {month})}
+
+    assert set(files) == {"index.html", "feed.xml", "sitemap.xml", "sitemaps/2024-01.xml"}
+    page = files["index.html"].body
+    assert page.index("New &lt;post&gt;") < page.index("Old")
+    assert "<title>Notes &amp; Things</title>" in page
+    feed = files["feed.xml"]
+    assert feed.content_type == "application/rss+xml"
+    assert "<pubDate>Tue, 02 Jan 2024 00:00:00 +0000</pubDate>" in feed.body
+    sitemap_index = files["sitemap.xml"].body
+    assert "https://example.com/posts/sitemaps/2023-12.xml" in sitemap_index
+    assert "https://example.com/posts/sitemaps/2024-01.xml" in sitemap_index
+    month_sitemap = files["sitemaps/2024-01.xml"].body
+    assert "<loc>https://example.com/posts/new.html</loc>" in month_sitemap
+    assert "old.html" not in month_sitemap
+
+
+def test_index_and_feed_are_capped(tmp_path):
+    from markpost import blogindex
+    from markpost.blogindex import PostIndex, site_files
+
+    index = PostIndex(tmp_path / "posts.sqlite3")
+    for day in range(1, 29):
+        index.add("b", f"https://example.com/posts/{day}.html", f"Post {day}", date(2024, 2, day))
+
+    files = {f.key: f.body for f in site_files(index, _config(), set())}
+
+    assert files["feed.xml"].count("<item>") == blogindex.FEED_SIZE
+    assert files["index.html"].count("<li>") == 28
+    assert "sitemaps/2024-02.xml" not in files
@@ -0,0 +1,46 @@
+# tests/test_checkpoint.py
+
+
+def test_checkpoint_round_trip(tmp_path):
+    from markpost.checkpoint import CheckpointStore, thread_digest
+
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite3")
+    digest = thread_digest(["one", "two", "three"])
+
+    store.record("twitter", "acct", digest, 0, "111")
+    store.record("twitter", "acct", digest, 1, "222")
+
+    assert store.posted("twitter", "acct", digest) == ["111", "222"]
+    assert store.posted("threads", "acct", digest) == []
+    assert store.posted("twitter", "other", digest) == []
+
+
+def test_checkpoint_only_returns_contiguous_prefix(tmp_path):
+    from markpost.checkpoint import CheckpointStore
+
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite3")
+    store.record("twitter", "acct", "d", 0, "111")
+    store.record("twitter", "acct", "d", 2, "333")
+
+    assert store.posted("twitter", "acct", "d") == ["111"]
+
+
+def test_prune_drops_whole_stale_threads(tmp_path):
+    from markpost.checkpoint import CheckpointStore
+
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite3")
+    store.record("twitter", "acct", "old", 0, "111")
+    store.record("twitter", "acct", "new", 0, "222")
+    store.execute("UPDATE checkpoints SET posted_at = 0 WHERE digest = 'old'")
+
+    store.prune(max_age=3600)
+
+    assert store.posted("twitter", "acct", "old") == []
+    assert store.posted("twitter", "acct", "new") == ["222"]
+
+
+def test_thread_digest_depends_on_part_boundaries():
+    from markpost.checkpoint import thread_digest
+
+    assert thread_digest(["ab", "c"]) != thread_digest(["a", "bc"])
+    assert thread_digest(["ab", "c"]) == thread_digest(["ab", "c"])
@@ -0,0 +1,250 @@
+# tests/test_cli.py
+from unittest.mock import MagicMock, patch
+
+
+def _write_posts(root, count):
+    (root / "2024").mkdir(parents=True, exist_ok=True)
+    for i in range(1, count + 1):
+        (root / "2024" / f"2024-01-{i:02d}-post-{i}.md").write_text(f"# Post {i}\n\nBody *{i}*.\n")
+
+
+def _set_mtime(path):
+    """Set path's modification time to noon on 2024-03-01, local time."""
+    import os
+    from datetime import datetime
+
+    stamp = datetime(2024, 3, 1, 12).timestamp()
+    os.utime(path, (stamp, stamp))
+
+
+def test_build_writes_pages_and_skips_unchanged_sources(tmp_path):
+    import os
+
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_posts(src, 3)
+    (src / "notes.txt").write_text("not markdown")
+    config = BlogConfig(s3_bucket="", base_url="")
+    state = BuildState(tmp_path / "build.sqlite3")
+
+    first = build(src, config, state, out=out)
+    assert first["built"] == ["2024-01-01-post-1.html", "2024-01-02-post-2.html", "2024-01-03-post-3.html"]
+    page = (out / "2024-01-02-post-2.html").read_text()
+    assert "<title>Post 2</title>" in page
+    assert "<em>2</em>" in page
+
+    assert build(src, config, state, out=out)["built"] == []
+
+    # Touched but unchanged: skipped on its hash. Edited: rebuilt.
+    touched = src / "2024" / "2024-01-01-post-1.md"
+    os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10**9))
+    (src / "2024" / "2024-01-03-post-3.md").write_text("# Post 3\n\nEdited.\n")
+    third = build(src, config, state, out=out)
+    assert third["built"] == ["2024-01-03-post-3.html"]
+    assert len(third["skipped"]) == 2
+
+    # A deleted output is rebuilt even though its source is unchanged
+    (out / "2024-01-02-post-2.html").unlink()
+    assert build(src, config, state, out=out)["built"] == ["2024-01-02-post-2.html"]
+
+
+def test_build_rebuilds_everything_when_layout_changes(tmp_path):
+    import pytest
+
+    pytest.importorskip("jinja2")
+
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_posts(src, 2)
+    layout = tmp_path / "layouts" / "post.html"
+    layout.parent.mkdir()
+    layout.write_text("<main>{{ content }}</main>")
+    config = BlogConfig(s3_bucket="", base_url="", layout=str(layout))
+    state = BuildState(tmp_path / "build.sqlite3")
+
+    build(src, config, state, out=out)
+    assert build(src, config, state, out=out)["built"] == []
+
+    layout.write_text("<article>{{ title }} {{ content }}</article>")
+    assert len(build(src, config, state, out=out)["built"]) == 2
+    assert (out / "2024-01-01-post-1.html").read_text().startswith("<article>Post 1 <h1>")
+
+
+def test_build_ignores_output_next_to_the_layout(tmp_path):
+    import pytest
+
+    pytest.importorskip("jinja2")
+
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    # The layout sits in the project root, next to the sources and the built site
+    src, out = tmp_path / "posts", tmp_path / "site"
+    _write_posts(src, 2)
+    (tmp_path / "base.html").write_text("<body>{% block main %}{% endblock %}</body>")
+    (tmp_path / "nav.html").write_text("<nav></nav>")
+    layout = tmp_path / "layout.html"
+    layout.write_text('{% extends "base.html" %}{% block main %}{% include "nav.html" %}{{ content }}{% endblock %}')
+    config = BlogConfig(s3_bucket="", base_url="", layout=str(layout))
+    state = BuildState(tmp_path / "build.sqlite3")
+
+    assert len(build(src, config, state, out=out)["built"]) == 2
+    assert build(src, config, state, out=out)["built"] == []
+
+    # Templates the layout pulls in still count
+    (tmp_path / "nav.html").write_text("<nav>Home</nav>")
+    assert len(build(src, config, state, out=out)["built"]) == 2
+    assert "<nav>Home</nav>" in (out / "2024-01-01-post-1.html").read_text()
+
+
+def test_build_strips_only_a_leading_date(tmp_path):
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    for name in ("changelog-2024-05-01.md", "changelog-2024-06-01.md"):
+        (src / name).write_text("# Changes\n")
+        _set_mtime(src / name)
+
+    result = build(src, BlogConfig(s3_bucket="", base_url=""), BuildState(tmp_path / "build.sqlite3"), out=out)
+
+    assert result["errors"] == {}
+    assert result["built"] == ["2024-03-01-changelog-2024-05-01.html", "2024-03-01-changelog-2024-06-01.html"]
+
+
+def test_undated_sources_keep_their_first_date(tmp_path):
+    import os
+
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    post = src / "hello.md"
+    post.write_text("# Hello\n")
+    _set_mtime(post)
+    config = BlogConfig(s3_bucket="", base_url="")
+    state = BuildState(tmp_path / "build.sqlite3")
+
+    assert build(src, config, state, out=out)["built"] == ["2024-03-01-hello.html"]
+
+    # Edited days later: the same page is rebuilt, not a second one under the new date
+    post.write_text("# Hello\n\nEdited.\n")
+    os.utime(post, (1718000000, 1718000000))
+    assert build(src, config, state, out=out)["built"] == ["2024-03-01-hello.html"]
+    assert sorted(p.name for p in out.glob("*.html")) == ["2024-03-01-hello.html"]
+
+
+def test_build_renders_across_processes(tmp_path):
+    from markpost import cli
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_posts(src, 12)
+    state = BuildState(tmp_path / "build.sqlite3")
+
+    with patch.object(cli, "PARALLEL_THRESHOLD", 0):
+        result = build(src, BlogConfig(s3_bucket="", base_url=""), state, out=out, workers=2)
+
+    assert len(result["built"]) == 12
+    assert result["errors"] == {}
+    assert "<em>12</em>" in (out / "2024-01-12-post-12.html").read_text()
+
+
+def test_build_uploads_to_blog_and_retries_failures(tmp_path):
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+    from markpost.manifest import BlogManifest
+
+    src = tmp_path / "src"
+    _write_posts(src, 2)
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", s3_prefix="posts/")
+    state = BuildState(tmp_path / "build.sqlite3")
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+
+    def put(Key, **kwargs):
+        if Key.endswith("post-2.html"):
+            raise RuntimeError("denied")
+
+    s3 = MagicMock()
+    s3.put_object.side_effect = put
+
+    result = build(src, config, state, client=s3, manifest=manifest)
+    assert result["built"] == ["2024-01-01-post-1.html"]
+    assert result["errors"] == {"2024-01-02-post-2.html": "RuntimeError: denied"}
+
+    s3.put_object.side_effect = None
+    s3.put_object.reset_mock()
+    assert build(src, config, state, client=s3, manifest=manifest)["built"] == ["2024-01-02-post-2.html"]
+    assert [c.kwargs["Key"] for c in s3.put_object.call_args_list] == ["posts/2024-01-02-post-2.html"]
+
+
+def test_main_builds_locally_without_config(tmp_path, monkeypatch, capsys):
+    from markpost.cli import main
+
+    monkeypatch.setenv("MARKPOST_CONFIG", str(tmp_path / "missing.toml"))
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_posts(src, 2)
+
+    assert main(["build", str(src), "--out", str(out)]) == 0
+    assert "Built 2, skipped 0 unchanged, 0 failed." in capsys.readouterr().out
+    assert (out / "build.sqlite3").exists()
+
+    # Uploading needs a config
+    assert main(["build", str(src)]) == 2
+
+
+def test_build_replaces_published_pages_and_refreshes_site_index(tmp_path):
+    from datetime import date
+
+    from markpost.blogindex import PostIndex
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+    from markpost.publishers.blog import publish_to_blog
+
+    src = tmp_path / "src"
+    _write_posts(src, 2)
+    config = BlogConfig(s3_bucket="b", base_url="https://example.com", s3_prefix="posts/", site_index=True)
+    index = PostIndex(tmp_path / "posts.sqlite3")
+    s3 = MagicMock()
+
+    publish_to_blog("<p>old</p>", "post-1", config, client=s3, published=date(2024, 1, 1))
+    published_key = s3.put_object.call_args.kwargs["Key"]
+    s3.put_object.reset_mock()
+
+    result = build(src, config, BuildState(tmp_path / "build.sqlite3"), client=s3, index=index)
+
+    assert result["errors"] == {}
+    keys = [c.kwargs["Key"] for c in s3.put_object.call_args_list]
+    # The rebuilt page overwrites the one publish_post wrote
+    assert published_key in keys
+    assert sorted(keys) == [
+        "posts/2024-01-01-post-1.html",
+        "posts/2024-01-02-post-2.html",
+        "posts/feed.xml",
+        "posts/index.html",
+        "posts/sitemap.xml",
+        "posts/sitemaps/2024-01.xml",
+    ]
+    assert [post["title"] for post in index.recent("b", 10)] == ["Post 2", "Post 1"]
+    assert index.recent("b", 1)[0]["url"] == "https://example.com/posts/2024-01-02-post-2.html"
+
+
+def test_build_reports_sources_that_map_to_the_same_page(tmp_path):
+    from markpost.cli import BuildState, build
+    from markpost.config import BlogConfig
+
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_posts(src, 1)
+    (src / "2024-01-01-Post 1.md").write_text("# Duplicate\n")
+
+    result = build(src, BlogConfig(s3_bucket="", base_url=""), BuildState(tmp_path / "build.sqlite3"), out=out)
+
+    assert result["built"] == ["2024-01-01-post-1.html"]
+    assert list(result["errors"]) == ["2024/2024-01-01-post-1.md"]
@@ -0,0 +1,34 @@
+# tests/test_clients.py
+from unittest.mock import patch
+
+import pytest
+
+
+def test_s3_client_is_keyed_on_region():
+    from markpost.clients import ClientRegistry
+    from markpost.config import BlogConfig
+
+    registry = ClientRegistry()
+    with patch("markpost.clients.boto3.client") as mock_boto:
+        mock_boto.side_effect = lambda *args, **kwargs: object()
+        a = registry.s3(BlogConfig(s3_bucket="a", base_url="https://a"))
+        b = registry.s3(BlogConfig(s3_bucket="b", base_url="https://b"))
+        c = registry.s3(BlogConfig(s3_bucket="b", base_url="https://b", aws_region="eu-west-1"))
+
+    assert a is b
+    assert c is not a
+    assert mock_boto.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_and_closed():
+    from markpost.clients import ClientRegistry
+
+    registry = ClientRegistry()
+    client = registry.http()
+    assert registry.http() is client
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.http() is not client
+    await registry.aclose()
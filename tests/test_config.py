@@ -84,6 +84,7 @@ base_url = "https://example.com"
     config = load_config(config_file)
     assert config.blog.s3_prefix == ""
     assert config.blog.aws_region == "us-east-1"
+    assert config.state_dir == tmp_path
 
 
 def test_config_blog_only(tmp_path):
@@ -99,6 +100,21 @@ base_url = "https://blog.example.com"
     assert config.twitter is None
     assert config.threads is None
     assert config.blog.s3_bucket == "my-blog"
+    assert config.blog.markdown_extensions == ()
+
+
+def test_config_markdown_extensions(tmp_path):
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("""
+[blog]
+s3_bucket = "my-blog"
+base_url = "https://blog.example.com"
+markdown_extensions = ["tables", "toc"]
+""")
+    from markpost.config import load_config
+
+    config = load_config(config_file)
+    assert config.blog.markdown_extensions == ("tables", "toc")
 
 
 def test_config_partial_platforms(tmp_path):
@@ -120,3 +136,121 @@ base_url = "https://example.com"
     assert config.twitter is not None
     assert config.threads is None
     assert config.blog is not None
+
+
+BLOG_ONLY = """
+[blog]
+s3_bucket = "b"
+base_url = "https://example.com"
+"""
+
+WITH_THREADS = BLOG_ONLY + """
+[threads]
+access_token = "t"
+user_id = "1"
+"""
+
+
+def _touch_later(path, seconds=10):
+    import os
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_config_service_caches_until_file_changes(tmp_path):
+    from markpost.config import ConfigService
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(BLOG_ONLY)
+    service = ConfigService(config_file)
+
+    first = service.get()
+    assert service.get() is first
+    assert first.threads is None
+
+    config_file.write_text(WITH_THREADS)
+    _touch_later(config_file)
+
+    second = service.get()
+    assert second is not first
+    assert second.threads.user_id == "1"
+
+
+def test_config_service_keeps_last_good_config(tmp_path):
+    import pytest
+
+    from markpost.config import ConfigService
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(BLOG_ONLY)
+    service = ConfigService(config_file)
+    good = service.get()
+
+    config_file.write_text("[blog]\ns3_bucket = ")
+    _touch_later(config_file)
+
+    assert service.get() is good
+    with pytest.raises(Exception):
+        service.reload()
+    assert service.get() is good
+
+
+def test_config_service_follows_env_var(tmp_path, monkeypatch):
+    from markpost.config import ConfigService
+
+    first_file = tmp_path / "a.toml"
+    first_file.write_text(BLOG_ONLY)
+    second_file = tmp_path / "b.toml"
+    second_file.write_text(WITH_THREADS)
+    service = ConfigService()
+
+    monkeypatch.setenv("MARKPOST_CONFIG", str(first_file))
+    assert service.get().threads is None
+
+    monkeypatch.setenv("MARKPOST_CONFIG", str(second_file))
+    assert service.get().threads is not None
+
+
+def test_config_blog_compression_options(tmp_path):
+    import pytest
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("""
+[blog]
+s3_bucket = "my-blog"
+base_url = "https://blog.example.com"
+content_encoding = "gzip"
+cache_control = "public, max-age=600"
+""")
+    from markpost.config import load_config
+
+    config = load_config(config_file)
+    assert config.blog.content_encoding == "gzip"
+    assert config.blog.cache_control == "public, max-age=600"
+
+    config_file.write_text(config_file.read_text().replace('"gzip"', '"zstd"'))
+    with pytest.raises(ValueError, match="content_encoding"):
+        load_config(config_file)
+
+
+def test_brotli_encoding_is_rejected_without_brotli(tmp_path):
+    from unittest.mock import patch
+
+    import pytest
+
+    from markpost import config as config_module
+    from markpost.config import ConfigService
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(BLOG_ONLY)
+    service = ConfigService(config_file)
+    good = service.get()
+
+    config_file.write_text(BLOG_ONLY.replace("[blog]", '[blog]\ncontent_encoding = "br"'))
+    _touch_later(config_file)
+
+    with patch.object(config_module, "find_spec", return_value=None):
+        with pytest.raises(ValueError, match="brotli"):
+            service.reload()
+        assert service.get() is good
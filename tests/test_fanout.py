@@ -0,0 +1,71 @@
+# tests/test_fanout.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_uses_worker_thread():
+    from markpost.fanout import run_blocking
+
+    thread_name = await run_blocking(lambda: threading.current_thread().name)
+    assert thread_name.startswith("markpost-worker")
+
+
+@pytest.mark.asyncio
+async def test_fan_out_runs_jobs_concurrently():
+    from markpost.fanout import fan_out, run_blocking
+
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def enter():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+
+    def leave():
+        nonlocal running
+        with lock:
+            running -= 1
+
+    def blocking_job():
+        enter()
+        time.sleep(0.1)
+        leave()
+
+    async def async_job():
+        enter()
+        await asyncio.sleep(0.1)
+        leave()
+        return "async"
+
+    results, errors = await fan_out({
+        "a": run_blocking(blocking_job),
+        "b": async_job(),
+        "c": run_blocking(blocking_job),
+    })
+
+    assert errors == {}
+    assert results == {"a": None, "b": "async", "c": None}
+    assert peak > 1
+
+
+@pytest.mark.asyncio
+async def test_fan_out_collects_partial_results():
+    from markpost.fanout import fan_out
+
+    async def ok():
+        return 1
+
+    async def boom():
+        raise RuntimeError("rate limited")
+
+    results, errors = await fan_out({"ok": ok(), "bad": boom()})
+
+    assert results == {"ok": 1}
+    assert errors == {"bad": "RuntimeError: rate limited"}
@@ -82,6 +82,114 @@ def test_split_respects_separator_over_limit():
     assert len(parts) == 2
 
 
+def test_split_packs_sentences_greedily():
+    from markpost.formatter import split_into_thread
+
+    text = "One two. Three four.\nFive six! Seven eight? Nine."
+    parts = split_into_thread(text, max_chars=22)
+    # Whitespace between packed sentences is collapsed to a single space
+    assert parts == ["One two. Three four.", "Five six! Seven eight?", "Nine."]
+
+
+def test_split_falls_back_to_words_and_hard_splits():
+    from markpost.formatter import split_into_thread
+
+    text = "Short. " + "word " * 5 + "x" * 12 + " end"
+    parts = split_into_thread(text, max_chars=10)
+    assert parts == ["Short.", "word word", "word word", "word", "xxxxxxxxxx", "xx end"]
+
+
+def test_iter_thread_is_lazy():
+    from markpost.formatter import iter_thread
+
+    parts = iter_thread("First part.\n\n---\n\nSecond part.")
+    assert next(parts) == "First part."
+    assert list(parts) == ["Second part."]
+
+
+def test_split_is_linear_on_long_input():
+    from markpost.formatter import split_into_thread
+
+    def split(n):
+        split_into_thread("word " * n, max_chars=280)
+        split_into_thread("A sentence.\n" * (n // 2), max_chars=280)
+        split_into_thread("x" * (5 * n), max_chars=280)
+
+    assert _growth(split, 50_000) < 8
+
+
+def test_split_measures_parts_with_platform_length():
+    from markpost.formatter import split_into_thread
+    from markpost.length import GraphemeLength, TwitterLength
+
+    url = "https://example.com/" + "a" * 100
+    text = " ".join(f"Link {i}: {url}." for i in range(10))
+    parts = split_into_thread(text, max_chars=280, length=TwitterLength())
+
+    # Each sentence is 32 weighted characters, so eight fit in a tweet
+    assert len(parts) == 2
+    assert all(TwitterLength()(part) <= 280 for part in parts)
+    assert len(split_into_thread(text, max_chars=280)) == 5
+
+    cjk = "日本語のテキスト。" * 50
+    parts = split_into_thread(cjk, max_chars=280, length=TwitterLength())
+    assert [TwitterLength()(part) for part in parts] == [280, 280, 280, 60]
+    assert "".join(parts) == cjk
+
+    emoji = "👩‍💻 " * 300
+    parts = split_into_thread(emoji, max_chars=500, length=GraphemeLength())
+    assert [GraphemeLength()(part) for part in parts] == [499, 99]
+
+
+def test_hard_split_never_cuts_through_a_link():
+    from markpost.formatter import split_into_thread
+    from markpost.length import TwitterLength
+
+    length = TwitterLength()
+    text = "x" * 265 + "!https://example.com/" + "p" * 60
+    parts = split_into_thread(text, max_chars=280, length=length)
+
+    assert parts == ["x" * 265 + "!", "https://example.com/" + "p" * 60]
+    assert [length(part) for part in parts] == [266, 23]
+
+
+def test_weighted_split_is_linear_on_long_input():
+    from markpost.formatter import split_into_thread
+    from markpost.length import GraphemeLength, TwitterLength
+
+    def split(n):
+        split_into_thread("日本語 https://example.com. " * n, max_chars=280, length=TwitterLength())
+        split_into_thread("x.y" * (10 * n), max_chars=280, length=TwitterLength())
+        split_into_thread("👍🏽 é. " * (n * 5 // 2), max_chars=500, length=GraphemeLength())
+
+    assert _growth(split, 2_500) < 8
+
+
+def _growth(run, n: int) -> float:
+    """How many times longer run(4 * n) takes than run(n): about 4 if linear, 16 if quadratic.
+
+    Each size takes its best of three runs with the garbage collector
+    off, so a collection or a busy machine doesn't skew the ratio.
+    """
+    import gc
+    import time
+
+    def best(size: int) -> float:
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            run(size)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    gc.collect()
+    gc.disable()
+    try:
+        return best(4 * n) / best(n)
+    finally:
+        gc.enable()
+
+
 def test_markdown_to_html_basic():
     from markpost.formatter import markdown_to_html
 
@@ -99,3 +207,168 @@ def test_markdown_to_html_wraps_in_template():
     assert "<title>My Post</title>" in html
     assert "<!DOCTYPE html>" in html
     assert "<h1>Title</h1>" in html
+
+
+def test_markdown_to_html_with_extensions():
+    from markpost.formatter import markdown_to_html
+
+    md = "| a | b |\n|---|---|\n| 1 | 2 |"
+    assert "<table>" not in markdown_to_html(md)
+    assert "<table>" in markdown_to_html(md, extensions=["tables"])
+
+
+def test_markdown_pool_reuses_reset_converters():
+    from markpost.formatter import MarkdownPool
+
+    pool = MarkdownPool(["footnotes"])
+    first = pool.convert("Text[^1]\n\n[^1]: A note.")
+    assert "A note." in first
+    # State from the previous document must not leak into the next one
+    assert pool.convert("Plain text.") == "<p>Plain text.</p>"
+    assert len(pool._idle) == 1
+
+
+def test_markdown_pool_is_shared_per_extension_set():
+    from markpost.formatter import markdown_pool
+
+    assert markdown_pool(["tables"]) is markdown_pool(("tables",))
+    assert markdown_pool(["tables"]) is not markdown_pool()
+
+
+def test_markdown_pool_is_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from markpost.formatter import MarkdownPool
+
+    pool = MarkdownPool(max_idle=2)
+    docs = [f"# Post {i}\n\nBody *{i}*." for i in range(50)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(pool.convert, docs))
+
+    assert results == [f"<h1>Post {i}</h1>\n<p>Body <em>{i}</em>.</p>" for i in range(50)]
+    assert len(pool._idle) <= 2
+
+
+def test_code_spans_are_kept_verbatim():
+    from markpost.formatter import markdown_to_plain
+
+    assert markdown_to_plain("Run `make **all**` now") == "Run make **all** now"
+    assert markdown_to_plain("Use ``a ` b`` here") == "Use a ` b here"
+
+
+def test_images_become_alt_and_url():
+    from markpost.formatter import markdown_to_plain
+
+    md = "See ![a diagram](https://example.com/d.png) below"
+    assert markdown_to_plain(md) == "See a diagram (https://example.com/d.png) below"
+
+
+def test_reference_links():
+    from markpost.formatter import markdown_to_plain
+
+    md = "Read [the docs][docs] or [Docs].\n\n[docs]: https://example.com/docs \"Docs\""
+    assert markdown_to_plain(md) == "Read the docs (https://example.com/docs) or Docs (https://example.com/docs)."
+
+
+def test_intraword_underscores_and_escapes_are_kept():
+    from markpost.formatter import markdown_to_plain
+
+    assert markdown_to_plain("call my_func_name now") == "call my_func_name now"
+    assert markdown_to_plain(r"2 \* 3 is \*not\* emphasis") == "2 * 3 is *not* emphasis"
+
+
+def test_nested_emphasis_runs_of_different_lengths():
+    from markpost.formatter import markdown_to_plain
+
+    assert markdown_to_plain("**a *b***") == "a b"
+    assert markdown_to_plain("*a **b***") == "a b"
+    assert markdown_to_plain("**bold with *italic end***") == "bold with italic end"
+    # Characters left over once the shorter run is used up stay in the text
+    assert markdown_to_plain("***a* b") == "**a b"
+    assert markdown_to_plain("*a**") == "a*"
+
+
+def test_fenced_code_blocks_keep_contents():
+    from markpost.formatter import markdown_to_plain
+
+    md = "Before\n\n```python\nx = a * b * c\n```\n\nAfter"
+    assert markdown_to_plain(md) == "Before\n\nx = a * b * c\n\nAfter"
+
+
+def test_markdown_to_plain_is_linear_on_pathological_input():
+    from markpost.formatter import markdown_to_plain
+
+    def convert(n):
+        markdown_to_plain("[" * n)
+        markdown_to_plain("*a" * n)
+        markdown_to_plain("` " * n)
+
+    assert _growth(convert, 12_500) < 8
+
+
+def test_render_cache_counts_hits_and_misses():
+    from markpost.formatter import RenderCache
+
+    cache = RenderCache()
+    text = "Hello *world*. Another sentence."
+
+    assert cache.thread(text, max_chars=20) == ["Hello world.", "Another sentence."]
+    # The plain text rendered for the split is cached too
+    assert cache.plain(text) == "Hello world. Another sentence."
+    assert cache.thread(text, max_chars=20) == ["Hello world.", "Another sentence."]
+    assert cache.thread(text, max_chars=280) == ["Hello world. Another sentence."]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 3)
+    assert stats["entries"] == 3
+
+
+def test_render_cache_keys_threads_by_length():
+    from markpost.formatter import RenderCache
+    from markpost.length import TwitterLength
+
+    cache = RenderCache()
+    text = "日本語。 日本語。"
+
+    assert cache.thread(text, max_chars=10) == ["日本語。 日本語。"]
+    assert cache.thread(text, max_chars=10, length=TwitterLength()) == ["日本語。", "日本語。"]
+
+
+def test_render_cache_returns_copies_of_thread_parts():
+    from markpost.formatter import RenderCache
+
+    cache = RenderCache()
+    cache.thread("One.", max_chars=280).append("mutated")
+    assert cache.thread("One.", max_chars=280) == ["One."]
+
+
+def test_render_cache_evicts_least_recently_used():
+    import sys
+
+    from markpost.formatter import RenderCache
+
+    entry = sys.getsizeof("x" * 100)
+    cache = RenderCache(max_bytes=2 * entry)
+    a, b, c = ("a" * 100, "b" * 100, "c" * 100)
+
+    cache.plain(a)
+    cache.plain(b)
+    cache.plain(a)  # a is now the most recently used
+    cache.plain(c)  # evicts b
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    misses = cache.misses
+    cache.plain(a)
+    assert cache.misses == misses
+    cache.plain(b)
+    assert cache.misses == misses + 1
+
+
+def test_render_cache_skips_entries_larger_than_the_cache():
+    from markpost.formatter import RenderCache
+
+    cache = RenderCache(max_bytes=10)
+    assert cache.html("Too big to cache") == "<p>Too big to cache</p>"
+    assert cache.stats()["entries"] == 0
+
@@ -0,0 +1,34 @@
+# tests/test_idempotency.py
+
+
+def test_request_key_covers_request_fields():
+    from markpost.idempotency import request_key
+
+    base = request_key("Hello", "T", "s", ["twitter", "blog"])
+
+    assert request_key("Hello", "T", "s", ["blog", "twitter"]) == base
+    assert request_key("Hello!", "T", "s", ["twitter", "blog"]) != base
+    assert request_key("Hello", "T", "other", ["twitter", "blog"]) != base
+    assert request_key("Hello", "T", "s", ["twitter"]) != base
+
+
+def test_caller_key_overrides_content_hash():
+    from markpost.idempotency import request_key
+
+    assert request_key("a", None, None, ["blog"], "k1") == request_key("b", None, None, ["twitter"], "k1")
+    assert request_key("a", None, None, ["blog"], "k1") != request_key("a", None, None, ["blog"], "k2")
+
+
+def test_cache_respects_ttl(tmp_path):
+    from markpost.idempotency import IdempotencyCache
+
+    cache = IdempotencyCache(tmp_path / "idempotency.sqlite3")
+    cache.put("k", {"blog": {"url": "https://example.com/p.html"}})
+
+    assert cache.get("k") == {"blog": {"url": "https://example.com/p.html"}}
+    assert cache.get("missing") is None
+
+    cache.execute("UPDATE results SET stored_at = 0")
+    assert cache.get("k", ttl=60) is None
+    cache.prune(ttl=60)
+    assert cache.execute("SELECT COUNT(*) AS n FROM results")[0]["n"] == 0
@@ -7,7 +7,14 @@ def test_server_exposes_all_tools():
     tool_names = [t.name for t in mcp._tool_manager._tools.values()]
     assert "ping" in tool_names
     assert "publish_post" in tool_names
+    assert "publish_batch" in tool_names
     assert "preview_post" in tool_names
+    assert "reload_config" in tool_names
+    assert "submit_post" in tool_names
+    assert "get_job_status" in tool_names
+    assert "list_jobs" in tool_names
+    assert "schedule_post" in tool_names
+    assert "metrics" in tool_names
 
 
 def test_server_name():
@@ -0,0 +1,167 @@
+# tests/test_jobs.py
+import asyncio
+
+import pytest
+
+
+REQUEST = {"content": "Hello", "title": None, "slug": None, "platforms": ["twitter", "blog"]}
+
+
+def test_job_store_tracks_platform_progress(tmp_path):
+    from markpost.jobs import JobProgress, JobStore
+
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create(REQUEST)
+    progress = JobProgress(store, job_id)
+
+    progress.started("twitter")
+    progress.recorder("twitter")(0, "tw1")
+    progress.recorder("twitter")(1, "tw2")
+    progress.succeeded("blog", {"url": "https://example.com/p.html"})
+
+    job = store.get(job_id)
+    assert job["status"] == "queued"
+    assert job["platforms"]["twitter"] == {"status": "running", "posted_ids": ["tw1", "tw2"]}
+    assert job["platforms"]["blog"]["result"] == {"url": "https://example.com/p.html"}
+    assert progress.completed("blog")
+    assert not progress.completed("twitter")
+    assert [j["job_id"] for j in store.list()] == [job_id]
+    assert store.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_job_queue_runs_submitted_jobs(tmp_path):
+    from markpost.jobs import JobQueue, JobStore
+
+    async def runner(request, progress):
+        progress.succeeded("twitter", {"tweet_ids": ["1"]})
+        progress.failed("blog", "boom")
+        return {"blog": "boom"}
+
+    queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), runner)
+    queue.start()
+    job_id = queue.submit(REQUEST)
+    await asyncio.wait_for(queue.join(), timeout=5)
+
+    job = queue.store.get(job_id)
+    assert job["status"] == "partial"
+    assert job["platforms"]["blog"]["error"] == "boom"
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_queue_resumes_unfinished_jobs(tmp_path):
+    from markpost.jobs import JobProgress, JobQueue, JobStore
+
+    # Simulate a process that crashed after posting two parts.
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create(REQUEST)
+    store.set_status(job_id, "running")
+    JobProgress(store, job_id).recorder("twitter")(0, "tw1")
+    JobProgress(store, job_id).recorder("twitter")(1, "tw2")
+    store.close()
+
+    seen = {}
+
+    async def runner(request, progress):
+        seen["posted"] = progress.posted("twitter")
+        return {}
+
+    queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), runner)
+    queue.start()
+    await asyncio.wait_for(queue.join(), timeout=5)
+
+    assert seen["posted"] == ["tw1", "tw2"]
+    assert queue.store.get(job_id)["status"] == "succeeded"
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_jobs_run_in_due_order(tmp_path):
+    import time
+
+    from markpost.jobs import JobQueue, JobStore
+
+    ran = []
+
+    async def runner(request, progress):
+        ran.append(request["content"])
+        return {}
+
+    queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), runner)
+    queue.start()
+    later = queue.schedule({**REQUEST, "content": "later"}, time.time() + 0.3)
+    queue.schedule({**REQUEST, "content": "sooner"}, time.time() + 0.1)
+
+    assert queue.store.get(later)["status"] == "scheduled"
+    await asyncio.sleep(0.05)
+    assert ran == []
+
+    await asyncio.wait_for(_until_status(queue.store, later, "succeeded"), timeout=5)
+    assert ran == ["sooner", "later"]
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_jobs_survive_restart(tmp_path):
+    import time
+
+    from markpost.jobs import JobQueue, JobStore
+
+    # Scheduled by a process that stopped before either was due.
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    overdue = store.create(REQUEST, run_at=time.time() - 60)
+    future = store.create(REQUEST, run_at=time.time() + 3600)
+    store.close()
+
+    async def runner(request, progress):
+        return {}
+
+    queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), runner)
+    queue.start()
+    await asyncio.wait_for(_until_status(queue.store, overdue, "succeeded"), timeout=5)
+
+    assert queue.store.get(future)["status"] == "scheduled"
+    assert queue.store.get(future)["run_at"] > time.time()
+    assert [job_id for _, job_id in queue.store.scheduled()] == [future]
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_survives_a_failed_release(tmp_path, caplog):
+    import time
+
+    from markpost.jobs import JobQueue, JobStore
+
+    ran = []
+
+    async def runner(request, progress):
+        ran.append(request["content"])
+        return {}
+
+    queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), runner)
+    release = queue.store.release
+    calls = 0
+
+    def flaky_release(job_id):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("database is locked")
+        return release(job_id)
+
+    queue.store.release = flaky_release
+    queue.start()
+    stuck = queue.schedule({**REQUEST, "content": "first"}, time.time())
+    due = queue.schedule({**REQUEST, "content": "second"}, time.time() + 0.05)
+
+    await asyncio.wait_for(_until_status(queue.store, due, "succeeded"), timeout=5)
+    assert ran == ["second"]
+    assert queue.store.get(stuck)["status"] == "scheduled"
+    assert "Could not release scheduled job" in caplog.text
+    await queue.stop()
+
+
+async def _until_status(store, job_id: str, status: str) -> None:
+    while store.get(job_id)["status"] != status:
+        await asyncio.sleep(0.01)
@@ -0,0 +1,91 @@
+# tests/test_length.py
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("hello", 5),
+        ("日本語", 6),
+        ("café — “quoted”", 15),
+        ("👩‍💻", 2),
+        ("👍🏽", 2),
+        ("🇺🇸🇬🇧", 4),
+        ("1️⃣", 2),
+    ],
+)
+def test_twitter_weights_characters(text, expected):
+    from markpost.length import TwitterLength
+
+    assert TwitterLength()(text) == expected
+
+
+def test_twitter_counts_links_as_shortened():
+    from markpost.length import TwitterLength
+
+    length = TwitterLength(url_length=23)
+    long_url = "https://example.com/" + "a" * 200
+
+    assert length(f"Read {long_url}.") == len("Read .") + 23
+    assert length("https://t.co") == 23
+    assert length("www.example.com/" + "a" * 50) == 23
+    # Bare domains are linked too
+    assert length("example.com") == 23
+    assert length("x.com") == 23
+    assert length("github.com/" + "a" * 50) == 23
+    # A name that may not be a domain counts as at least a link, never less
+    assert length("config.toml") == 23
+    assert length("see " + "sub." * 10 + "example.toml") == 4 + 52
+    # Email addresses are not links
+    assert length("me@example.com") == 14
+
+
+def test_twitter_never_undercounts_short_domains_near_the_limit():
+    from markpost.formatter import split_into_thread
+    from markpost.length import TwitterLength
+
+    length = TwitterLength()
+    text = "word " * 50 + "follow x.com github.com t.co/abc a.io"
+    parts = split_into_thread(text, max_chars=280, length=length)
+
+    # Four links at 23 each push the tail into a second part
+    assert len(parts) == 2
+    assert all(length(part) <= 280 for part in parts)
+    assert length(text) == 250 + len("follow    ") + 4 * 23
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("hello", 5),
+        ("日本語", 3),
+        ("café", 4),
+        ("👩‍💻 👍🏽", 3),
+        ("🇺🇸🇬🇧", 2),
+        ("a\r\nb", 3),
+    ],
+)
+def test_grapheme_length(text, expected):
+    from markpost.length import GraphemeLength
+
+    assert GraphemeLength()(text) == expected
+
+
+def test_plain_text_needs_no_weights():
+    from markpost.length import GraphemeLength, TwitterLength
+
+    assert TwitterLength().weights("Plain ASCII, no links.") is None
+    assert GraphemeLength().weights("Plain ASCII, no links.") is None
+
+
+def test_weighted_reach_stops_at_budget_and_keeps_clusters_whole():
+    from markpost.length import GraphemeLength
+
+    text = "ab👩‍💻cd"
+    measure = GraphemeLength().measure(text)
+
+    assert measure.cost(0, len(text)) == 5
+    # The ZWJ sequence's trailing code points cost nothing, so they come along
+    assert measure.reach(0, 3) == 5
+    assert measure.reach(0, 100) == len(text)
+    assert measure.reach(2, 0) == 3
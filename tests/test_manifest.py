@@ -0,0 +1,27 @@
+# tests/test_manifest.py
+
+
+def test_content_hash_covers_body_and_headers():
+    from markpost.manifest import content_hash
+
+    base = content_hash(b"<p>a</p>", {"ContentType": "text/html"})
+
+    assert content_hash(b"<p>a</p>", {"ContentType": "text/html"}) == base
+    assert content_hash(b"<p>b</p>", {"ContentType": "text/html"}) != base
+    assert content_hash(b"<p>a</p>", {"ContentType": "text/plain"}) != base
+
+
+def test_manifest_records_hash_per_bucket_and_key(tmp_path):
+    from markpost.manifest import BlogManifest
+
+    manifest = BlogManifest(tmp_path / "blog_manifest.sqlite3")
+    manifest.record("b", "posts/a.html", "h1")
+
+    assert manifest.get("b", "posts/a.html") == "h1"
+    assert manifest.get("other", "posts/a.html") is None
+
+    manifest.record("b", "posts/a.html", "h2")
+    assert manifest.get("b", "posts/a.html") == "h2"
+
+    manifest.forget("b", "posts/a.html")
+    assert manifest.get("b", "posts/a.html") is None
@@ -0,0 +1,132 @@
+# tests/test_metrics.py
+import pytest
+
+
+def test_counter_tracks_each_label_set():
+    from markpost.metrics import Registry
+
+    registry = Registry()
+    retries = registry.counter("retries_total", "Retries.", ("platform",))
+    retries.inc(platform="twitter")
+    retries.inc(2, platform="twitter")
+    retries.inc(platform="threads")
+
+    assert retries.value(platform="twitter") == 3
+    assert retries.value(platform="threads") == 1
+    assert retries.value(platform="blog") == 0
+
+
+def test_labels_must_match_declaration():
+    from markpost.metrics import Registry
+
+    counter = Registry().counter("calls_total", "Calls.", ("platform",))
+
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(platform="twitter", operation="create")
+
+
+def test_registering_a_name_twice_returns_the_same_family():
+    from markpost.metrics import Registry
+
+    registry = Registry()
+    first = registry.counter("calls_total", "Calls.", ("platform",))
+
+    assert registry.counter("calls_total", "Calls.", ("platform",)) is first
+    with pytest.raises(ValueError):
+        registry.histogram("calls_total", "Calls.", ("platform",))
+
+
+def test_histogram_buckets_are_cumulative():
+    from markpost.metrics import Registry
+
+    histogram = Registry().histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    [(labels, series)] = histogram.series()
+    assert labels == {}
+    assert series["buckets"] == {"0.1": 2, "1": 3, "+Inf": 4}
+    assert series["count"] == 4
+    assert series["sum"] == pytest.approx(3.65)
+
+
+def test_histogram_time_records_even_when_the_block_raises():
+    from markpost.metrics import Registry
+
+    histogram = Registry().histogram("stage_seconds", "Stages.", ("stage",))
+
+    with pytest.raises(RuntimeError):
+        with histogram.time(stage="split"):
+            raise RuntimeError("boom")
+
+    assert histogram.count(stage="split") == 1
+
+
+def test_render_prometheus_text_format():
+    from markpost.metrics import Registry
+
+    registry = Registry()
+    registry.counter("retries_total", "Retries.", ("platform",)).inc(platform='tw"itter')
+    registry.histogram("latency_seconds", "Latency.", buckets=(1.0,)).observe(0.5)
+
+    text = registry.render()
+
+    assert "# HELP retries_total Retries.\n# TYPE retries_total counter\n" in text
+    assert 'retries_total{platform="tw\\"itter"} 1\n' in text
+    assert "# TYPE latency_seconds histogram\n" in text
+    assert 'latency_seconds_bucket{le="1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "latency_seconds_sum 0.5\n" in text
+    assert "latency_seconds_count 1\n" in text
+
+
+def test_collectors_run_before_each_snapshot():
+    from markpost.metrics import Registry
+
+    registry = Registry()
+    hits = registry.counter("hits_total", "Hits.")
+    source = {"hits": 0}
+    registry.on_collect(lambda: hits.set(source["hits"]))
+
+    source["hits"] = 7
+    snapshot = registry.snapshot()
+
+    assert snapshot["hits_total"] == {"type": "counter", "help": "Hits.", "series": [{"labels": {}, "value": 7.0}]}
+
+
+def test_api_call_times_calls_and_counts_errors():
+    from markpost.metrics import api_call, api_errors, api_request_seconds
+
+    before = api_request_seconds.count(platform="test", operation="op")
+    errors_before = api_errors.value(platform="test", operation="op")
+
+    with api_call("test", "op"):
+        pass
+    with pytest.raises(ConnectionError):
+        with api_call("test", "op"):
+            raise ConnectionError("reset")
+
+    assert api_request_seconds.count(platform="test", operation="op") == before + 2
+    assert api_errors.value(platform="test", operation="op") == errors_before + 1
+
+
+def test_record_wait_only_observes_real_waits():
+    from markpost.metrics import rate_limit_wait_seconds, record_wait
+
+    before = rate_limit_wait_seconds.count(platform="test")
+
+    assert record_wait("test", 0.0) == 0.0
+    assert record_wait("test", 1.5) == 1.5
+
+    assert rate_limit_wait_seconds.count(platform="test") == before + 1
+
+
+def test_cache_hit_rates():
+    from markpost.metrics import cache_hit_rates, cache_requests
+
+    cache_requests.set(3, cache="test", result="hit")
+    cache_requests.set(1, cache="test", result="miss")
+
+    assert cache_hit_rates()["test"] == 0.75
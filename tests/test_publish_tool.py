@@ -31,7 +31,7 @@ async def test_publish_post_all_platforms(mock_config, monkeypatch):
     with (
         patch("markpost.server.post_to_twitter", return_value=["tw1"]) as mock_tw,
         patch("markpost.server.post_to_threads", new_callable=AsyncMock, return_value=["th1"]) as mock_th,
-        patch("markpost.server.publish_to_blog", return_value="https://example.com/post.html") as mock_blog,
+        patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html") as mock_blog,
     ):
         from markpost.server import publish_post
 
@@ -81,7 +81,7 @@ base_url = "https://example.com"
 async def test_publish_post_blog_only(blog_only_config, monkeypatch):
     monkeypatch.setenv("MARKPOST_CONFIG", blog_only_config)
 
-    with patch("markpost.server.publish_to_blog", return_value="https://example.com/post.html"):
+    with patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html"):
         from markpost.server import publish_post
 
         result = await publish_post.fn(
@@ -122,6 +122,21 @@ def test_preview_post():
     assert "**" not in result["twitter"]["parts"][0]
 
 
+def test_preview_post_counts_characters_like_each_platform():
+    from markpost.server import preview_post
+
+    result = preview_post.fn(
+        content="Read [this](https://example.com/some/very/long/path/to/an/article) 🎉",
+        platforms=["twitter", "threads"],
+    )
+
+    [text] = result["twitter"]["parts"]
+    assert text == "Read this (https://example.com/some/very/long/path/to/an/article) 🎉"
+    # The link counts as 23 and the emoji as 2
+    assert result["twitter"]["char_counts"] == [len("Read this () ") + 23 + 2]
+    assert result["threads"]["char_counts"] == [len(text)]
+
+
 def test_preview_post_blog():
     from markpost.server import preview_post
 
@@ -133,3 +148,468 @@ def test_preview_post_blog():
 
     assert "blog" in result
     assert "<h1>Title</h1>" in result["blog"]["html"]
+
+
+def test_repeated_preview_reuses_rendered_output():
+    from markpost.formatter import render_cache
+    from markpost.server import preview_post
+
+    content = "Preview me *twice*.\n\n---\n\nSecond part."
+    first = preview_post.fn(content=content, title="Twice")
+    hits = render_cache.hits
+    second = preview_post.fn(content=content, title="Twice")
+
+    assert second == first
+    assert render_cache.hits == hits + 3
+
+
+@pytest.mark.asyncio
+async def test_publish_post_reports_partial_failure(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with (
+        patch("markpost.server.post_to_twitter", side_effect=RuntimeError("boom")),
+        patch("markpost.server.post_to_threads", new_callable=AsyncMock, return_value=["th1"]),
+        patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html"),
+    ):
+        from markpost.server import publish_post
+
+        result = await publish_post.fn(
+            content="Hello.",
+            title="Hello",
+            platforms=["twitter", "threads", "blog"],
+        )
+
+    assert "twitter" not in result
+    assert result["threads"]["post_ids"] == ["th1"]
+    assert result["blog"]["url"] == "https://example.com/post.html"
+    assert result["errors"] == {"twitter": "RuntimeError: boom"}
+
+
+@pytest.mark.asyncio
+async def test_publish_post_platforms_run_concurrently(mock_config, monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+    in_flight = 0
+    peak = 0
+
+    async def slow(result):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return result
+
+    async def slow_twitter(parts, config, **kwargs):
+        return await slow(["tw1"])
+
+    async def slow_threads(parts, config, **kwargs):
+        return await slow(["th1"])
+
+    async def slow_blog(html, slug, config, **kwargs):
+        return await slow("https://example.com/post.html")
+
+    with (
+        patch("markpost.server.post_to_twitter", side_effect=slow_twitter),
+        patch("markpost.server.post_to_threads", side_effect=slow_threads),
+        patch("markpost.server.apublish_to_blog", side_effect=slow_blog),
+    ):
+        from markpost.server import publish_post
+
+        result = await publish_post.fn(
+            content="Hello.",
+            platforms=["twitter", "threads", "blog"],
+        )
+
+    assert "errors" not in result
+    assert peak > 1
+
+
+@pytest.mark.asyncio
+async def test_submit_post_runs_in_background(mock_config, monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with (
+        patch("markpost.server.post_to_twitter", return_value=["tw1"]),
+        patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html"),
+    ):
+        from markpost import server
+
+        submitted = await server.submit_post.fn(content="Hello.", platforms=["twitter", "blog"])
+        assert submitted["status"] == "queued"
+
+        await asyncio.wait_for(server._job_queue.join(), timeout=5)
+        job = await server.get_job_status.fn(job_id=submitted["job_id"])
+        listed = await server.list_jobs.fn()
+        await server._job_queue.stop()
+
+    assert job["status"] == "succeeded"
+    assert job["platforms"]["twitter"]["result"] == {"tweet_ids": ["tw1"], "parts": 1}
+    assert job["platforms"]["blog"]["result"] == {"url": "https://example.com/post.html"}
+    assert [j["job_id"] for j in listed["jobs"]] == [submitted["job_id"]]
+
+
+@pytest.mark.asyncio
+async def test_schedule_post_publishes_when_due(mock_config, monkeypatch):
+    import asyncio
+    from datetime import datetime, timedelta, timezone
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with patch("markpost.server.post_to_twitter", return_value=["tw1"]) as mock_post:
+        from markpost import server
+
+        publish_at = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+        scheduled = await server.schedule_post.fn(
+            content="Hello.", publish_at=publish_at.isoformat(), platforms=["twitter"]
+        )
+        assert scheduled["status"] == "scheduled"
+        assert datetime.fromisoformat(scheduled["publish_at"]) == publish_at
+        listed = await server.list_jobs.fn(status="scheduled")
+        mock_post.assert_not_called()
+
+        async def finished():
+            while (job := await server.get_job_status.fn(job_id=scheduled["job_id"]))["status"] in (
+                "scheduled", "queued", "running"
+            ):
+                await asyncio.sleep(0.01)
+            return job
+
+        job = await asyncio.wait_for(finished(), timeout=5)
+        await server._job_queue.stop()
+
+    assert [j["job_id"] for j in listed["jobs"]] == [scheduled["job_id"]]
+    assert job["status"] == "succeeded"
+    assert job["platforms"]["twitter"]["result"] == {"tweet_ids": ["tw1"], "parts": 1}
+
+
+@pytest.mark.asyncio
+async def test_schedule_post_rejects_bad_times(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    from markpost import server
+
+    with pytest.raises(ValueError, match="not an ISO 8601"):
+        await server.schedule_post.fn(content="Hello.", publish_at="tomorrow at 9")
+    with pytest.raises(ValueError, match="in the past"):
+        await server.schedule_post.fn(content="Hello.", publish_at="2020-01-01T09:00:00Z")
+
+
+@pytest.mark.asyncio
+async def test_changing_state_dir_retires_the_old_job_queue(tmp_path, monkeypatch, caplog):
+    import asyncio
+    from types import SimpleNamespace
+
+    from markpost import server
+    from markpost.jobs import JobStore
+
+    started = asyncio.Event()
+
+    async def blocked(request, progress):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(server, "_job_queue", None)
+    monkeypatch.setattr(server, "_run_job", blocked)
+    old = server._get_job_queue(SimpleNamespace(state_dir=tmp_path / "a"))
+    job_id = old.submit({"content": "Hi", "title": None, "slug": None, "platforms": ["twitter"]})
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    new = server._get_job_queue(SimpleNamespace(state_dir=tmp_path / "b"))
+
+    assert new is not old
+    assert job_id in caplog.text
+    [retiring] = server._retired_queues
+    await asyncio.wait_for(retiring, timeout=5)
+    assert server._retired_queues == set()
+    # The interrupted job is left for the old state_dir's queue to resume
+    store = JobStore(tmp_path / "a" / server.JOBS_DB)
+    assert store.unfinished() == [job_id]
+    store.close()
+    await new.stop()
+
+
+@pytest.mark.asyncio
+async def test_get_job_status_unknown_job(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    from markpost import server
+
+    with pytest.raises(ValueError, match="Unknown job"):
+        await server.get_job_status.fn(job_id="nope")
+    await server._job_queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_publish_post_resumes_failed_thread(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+    calls = []
+
+    async def flaky_twitter(parts, config, resume_from=None, on_posted=None, **kwargs):
+        calls.append(list(resume_from))
+        ids = list(resume_from)
+        for index in range(len(ids), len(parts)):
+            if index == 1 and len(calls) == 1:
+                raise RuntimeError("network down")
+            ids.append(f"tw{index}")
+            on_posted(index, ids[-1])
+        return ids
+
+    content = "First sentence here. " * 10 + "\n\n---\n\nSecond part."
+    with patch("markpost.server.post_to_twitter", side_effect=flaky_twitter):
+        from markpost.server import publish_post
+
+        first = await publish_post.fn(content=content, platforms=["twitter"])
+        second = await publish_post.fn(content=content, platforms=["twitter"])
+
+    assert "RuntimeError" in first["errors"]["twitter"]
+    assert calls == [[], ["tw0"]]
+    assert second["twitter"]["tweet_ids"] == ["tw0", "tw1"]
+
+
+@pytest.mark.asyncio
+async def test_publish_post_replays_successful_result(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with patch("markpost.server.post_to_twitter", return_value=["tw1"]) as mock_tw:
+        from markpost.server import publish_post
+
+        first = await publish_post.fn(content="Hello.", platforms=["twitter"])
+        second = await publish_post.fn(content="Hello.", platforms=["twitter"])
+        keyed = await publish_post.fn(content="Hello.", platforms=["twitter"], idempotency_key="abc")
+        keyed_retry = await publish_post.fn(content="Changed.", platforms=["twitter"], idempotency_key="abc")
+
+    assert mock_tw.call_count == 2
+    assert "replayed" not in first
+    assert second == {**first, "replayed": True}
+    assert keyed_retry == {**keyed, "replayed": True}
+
+
+@pytest.mark.asyncio
+async def test_publish_post_does_not_cache_failures(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with patch("markpost.server.post_to_twitter", side_effect=[RuntimeError("boom"), ["tw1"]]) as mock_tw:
+        from markpost.server import publish_post
+
+        first = await publish_post.fn(content="Hello.", platforms=["twitter"])
+        second = await publish_post.fn(content="Hello.", platforms=["twitter"])
+
+    assert "errors" in first
+    assert second["twitter"]["tweet_ids"] == ["tw1"]
+    assert mock_tw.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_publishes_share_one_run(mock_config, monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    async def slow_twitter(parts, config, **kwargs):
+        await asyncio.sleep(0.1)
+        return ["tw1"]
+
+    with patch("markpost.server.post_to_twitter", side_effect=slow_twitter) as mock_tw:
+        from markpost.server import publish_post
+
+        a, b = await asyncio.gather(
+            publish_post.fn(content="Hello.", platforms=["twitter"]),
+            publish_post.fn(content="Hello.", platforms=["twitter"]),
+        )
+
+    assert mock_tw.call_count == 1
+    assert a["twitter"] == b["twitter"]
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_reports_each_post_in_input_order(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    async def twitter(parts, config, **kwargs):
+        if parts[0].startswith("Broken"):
+            raise RuntimeError("boom")
+        return [f"tw-{parts[0]}"]
+
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    ctx.info = AsyncMock()
+
+    with (
+        patch("markpost.server.post_to_twitter", side_effect=twitter) as mock_tw,
+        patch("markpost.server.apublish_to_blog", return_value="https://example.com/third.html"),
+        patch("markpost.server.get_context", return_value=ctx),
+    ):
+        from markpost.server import BatchPost, publish_batch
+
+        result = await publish_batch.fn(
+            posts=[
+                BatchPost(content="First."),
+                BatchPost(content="Broken."),
+                BatchPost(content="Third.", platforms=["blog"], slug="third"),
+                BatchPost(content="Fourth."),
+            ],
+            platforms=["twitter"],
+        )
+
+    results = result["results"]
+    assert [entry["index"] for entry in results] == [0, 1, 2, 3]
+    assert results[0]["twitter"]["tweet_ids"] == ["tw-First."]
+    assert results[1]["errors"]["twitter"] == "RuntimeError: boom"
+    assert results[3]["twitter"]["tweet_ids"] == ["tw-Fourth."]
+    assert results[2]["blog"]["url"] == "https://example.com/third.html"
+    assert (result["succeeded"], result["failed"]) == (3, 1)
+    assert mock_tw.call_count == 3
+    assert ctx.report_progress.await_count == 4
+    assert ctx.report_progress.await_args.args[:2] == (4, 4)
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_reports_unconfigured_platform_per_post(blog_only_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", blog_only_config)
+
+    with patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html"):
+        from markpost.server import BatchPost, publish_batch
+
+        result = await publish_batch.fn(
+            posts=[BatchPost(content="Blog post.", title="Post"), BatchPost(content="Tweet.", platforms=["twitter"])],
+        )
+
+    assert result["results"][0]["blog"]["url"] == "https://example.com/post.html"
+    assert result["results"][1]["error"].startswith("ValueError: Twitter is not configured")
+    assert (result["succeeded"], result["failed"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_slow_post_does_not_block_others(mock_config, monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    async def threads(parts, config, **kwargs):
+        if parts[0].startswith("Slow"):
+            await asyncio.sleep(0.3)
+        return [f"th-{parts[0]}"]
+
+    finished: list[int] = []
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    ctx.info = AsyncMock(side_effect=lambda message, extra: finished.append(extra["index"]))
+
+    with (
+        patch("markpost.server.post_to_threads", side_effect=threads),
+        patch("markpost.server.get_context", return_value=ctx),
+    ):
+        from markpost.server import BatchPost, publish_batch
+
+        result = await publish_batch.fn(
+            posts=[BatchPost(content="Slow post.")] + [BatchPost(content=f"Post {i}.") for i in range(1, 10)],
+            platforms=["threads"],
+        )
+
+    assert result["failed"] == 0
+    assert finished[-1] == 0
+    assert sorted(finished) == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_streams_progress_over_mcp(mock_config, monkeypatch):
+    from fastmcp import Client
+
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+    progress: list[tuple[float, float | None]] = []
+
+    async def on_progress(done, total, message):
+        progress.append((done, total))
+
+    with patch("markpost.server.post_to_twitter", return_value=["tw1"]):
+        from markpost.server import mcp
+
+        async with Client(mcp) as client:
+            result = await client.call_tool(
+                "publish_batch",
+                {"posts": [{"content": "One."}, {"content": "Two."}], "platforms": ["twitter"]},
+                progress_handler=on_progress,
+            )
+
+    assert result.data["succeeded"] == 2
+    assert progress == [(1, 2), (2, 2)]
+
+
+@pytest.mark.asyncio
+async def test_publish_blog_refreshes_site_index(tmp_path, monkeypatch):
+    from datetime import date
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("""
+[blog]
+s3_bucket = "b"
+base_url = "https://example.com"
+site_index = true
+""")
+    monkeypatch.setenv("MARKPOST_CONFIG", str(config_file))
+
+    with (
+        patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html"),
+        patch("markpost.server.aupload_to_blog", return_value={"feed.xml": {"error": "RuntimeError: down"}}) as upload,
+    ):
+        from markpost.server import publish_post
+
+        result = await publish_post.fn(content="# Hello\n\nBody.", title="Hello")
+
+    keys = [obj.key for obj in upload.call_args.args[0]]
+    month = date.today().strftime("%Y-%m")
+    assert keys == ["index.html", "feed.xml", "sitemap.xml", f"sitemaps/{month}.xml"]
+    assert result["blog"]["url"] == "https://example.com/post.html"
+    assert result["blog"]["site_errors"] == {"feed.xml": "RuntimeError: down"}
+
+
+
+@pytest.mark.asyncio
+async def test_publish_blog_uses_configured_layout(tmp_path, monkeypatch):
+    pytest.importorskip("jinja2")
+
+    layout = tmp_path / "layout.html"
+    layout.write_text("<h1>{{ site_title }}</h1><h2>{{ title }}</h2>{{ content }}<footer>{{ slug }}</footer>")
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(f"""
+[blog]
+s3_bucket = "b"
+base_url = "https://example.com"
+site_title = "My Site"
+layout = "{layout}"
+""")
+    monkeypatch.setenv("MARKPOST_CONFIG", str(config_file))
+
+    with patch("markpost.server.apublish_to_blog", return_value="https://example.com/post.html") as mock_blog:
+        from markpost.server import publish_post
+
+        await publish_post.fn(content="Body text.", title="Hello World")
+
+    html = mock_blog.call_args.args[0]
+    assert html == "<h1>My Site</h1><h2>Hello World</h2><p>Body text.</p><footer>hello-world</footer>"
+
+
+@pytest.mark.asyncio
+async def test_metrics_reports_publish_stages_and_cache_hits(mock_config, monkeypatch):
+    monkeypatch.setenv("MARKPOST_CONFIG", mock_config)
+
+    with patch("markpost.server.post_to_twitter", return_value=["tw1"]):
+        from markpost.server import metrics, publish_post
+
+        await publish_post.fn(content="Measure *this* publish.", platforms=["twitter"])
+        await publish_post.fn(content="Measure *this* publish.", platforms=["twitter"])
+        report = metrics.fn()
+
+    stages = {
+        series["labels"]["stage"]
+        for series in report["metrics"]["markpost_stage_seconds"]["series"]
+        if series["labels"]["platform"] == "twitter"
+    }
+    assert {"publish", "format", "split", "client_setup"} <= stages
+    assert 0 < report["cache_hit_rates"]["idempotency"] < 1
+    assert "render" in report["cache_hit_rates"]
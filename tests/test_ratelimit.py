@@ -0,0 +1,89 @@
+# tests/test_ratelimit.py
+import time
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_delays():
+    from markpost.ratelimit import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=2, period=10, clock=clock)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 5.0
+    assert bucket.reserve() == 10.0
+
+    # Both waiting reservations are covered after 10s, one more token after 15s.
+    clock.now += 15
+    assert bucket.reserve() == 0
+
+
+def test_bucket_eta_does_not_consume():
+    from markpost.ratelimit import TokenBucket
+
+    bucket = TokenBucket(capacity=2, period=10, clock=FakeClock())
+
+    assert bucket.eta(4) == 10.0
+    assert bucket.eta(4) == 10.0
+    assert bucket.reserve() == 0
+
+
+def test_bucket_follows_api_window():
+    from markpost.ratelimit import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=100, period=900, clock=clock)
+
+    bucket.sync(remaining=1, reset_in=60)
+    assert bucket.reserve() == 0
+    # Nothing refills until the window resets.
+    assert bucket.reserve() == 60.0
+
+    clock.now += 60
+    # The reset restores a full window, less the one reservation waiting on it.
+    assert bucket.eta(99) == 0
+    assert bucket.eta(100) > 0
+
+
+def test_update_from_headers():
+    from markpost.ratelimit import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=100, period=900, clock=clock)
+
+    assert bucket.update_from_headers({
+        "x-rate-limit-remaining": "0",
+        "x-rate-limit-reset": str(time.time() + 30),
+    })
+    assert 29 < bucket.eta(1) <= 30
+
+    assert not bucket.update_from_headers({"content-type": "application/json"})
+    assert bucket.update_from_headers({"x-app-usage": '{"call_count": 12, "total_time": 5}'})
+
+
+def test_throttled_without_headers_backs_off():
+    from markpost.ratelimit import DEFAULT_BACKOFF, TokenBucket
+
+    bucket = TokenBucket(capacity=10, period=10, clock=FakeClock())
+    bucket.throttled({})
+
+    assert bucket.eta(1) == DEFAULT_BACKOFF
+
+
+def test_limiter_shares_buckets_per_account():
+    from markpost.ratelimit import RateLimiter
+
+    limiter = RateLimiter()
+    a = limiter.bucket("twitter", "acct", 100, 900)
+
+    assert limiter.bucket("twitter", "acct", 100, 900) is a
+    assert limiter.bucket("twitter", "other", 100, 900) is not a
+    assert limiter.bucket("twitter", "acct", 50, 900) is not a
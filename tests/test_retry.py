@@ -0,0 +1,98 @@
+# tests/test_retry.py
+from unittest.mock import patch
+
+import pytest
+
+
+def _transient(e):
+    return isinstance(e, ConnectionError)
+
+
+def test_retry_recovers_from_transient_errors():
+    from markpost.retry import retry
+
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    with patch("markpost.retry.time.sleep") as mock_sleep:
+        assert retry(flaky, _transient) == "ok"
+
+    assert len(calls) == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_retry_reports_each_retried_failure():
+    from markpost.retry import retry
+
+    attempts = iter([ConnectionError("a"), ConnectionError("b")])
+    seen = []
+
+    def flaky():
+        error = next(attempts, None)
+        if error is not None:
+            raise error
+        return "ok"
+
+    with patch("markpost.retry.time.sleep"):
+        assert retry(flaky, _transient, on_retry=seen.append) == "ok"
+
+    assert [str(e) for e in seen] == ["a", "b"]
+
+
+def test_retry_does_not_retry_permanent_errors():
+    from markpost.retry import retry
+
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        retry(broken, _transient)
+    assert len(calls) == 1
+
+
+def test_retry_gives_up_after_attempts():
+    from markpost.retry import retry
+
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    with patch("markpost.retry.time.sleep"), pytest.raises(ConnectionError):
+        retry(down, _transient, attempts=3)
+    assert len(calls) == 3
+
+
+def test_backoff_delays_are_jittered_and_capped():
+    from markpost.retry import backoff_delays
+
+    delays = list(backoff_delays(attempts=10, base=1, cap=4))
+
+    assert len(delays) == 9
+    assert all(0 <= d <= 4 for d in delays)
+
+
+@pytest.mark.asyncio
+async def test_aretry_recovers_from_transient_errors():
+    from markpost.retry import aretry
+
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise ConnectionError("reset")
+        return "ok"
+
+    with patch("markpost.retry.asyncio.sleep"):
+        assert await aretry(flaky, _transient) == "ok"
+    assert len(calls) == 2
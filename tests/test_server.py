@@ -1,7 +1,21 @@
 # tests/test_server.py
+import httpx
+import pytest
+
 from markpost.server import mcp
 
 
 def test_server_has_ping_tool():
     tool_names = [t.name for t in mcp._tool_manager._tools.values()]
     assert "ping" in tool_names
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_serves_prometheus_text():
+    transport = httpx.ASGITransport(app=mcp.http_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://markpost") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE markpost_stage_seconds histogram" in response.text
@@ -0,0 +1,52 @@
+# tests/test_templates.py
+import pytest
+
+pytest.importorskip("jinja2")
+
+
+def test_layout_receives_post_context(tmp_path):
+    from markpost.templates import LayoutCache
+
+    layout = tmp_path / "post.html"
+    layout.write_text("<title>{{ title }}</title><time>{{ date }}</time><main>{{ content }}</main><p>{{ excerpt }}</p>")
+
+    html = LayoutCache().render(layout, "<p>Body &amp; more</p>", title="A <b> title", date="2024-01-02", excerpt="x < y")
+
+    assert "<title>A &lt;b&gt; title</title>" in html
+    assert "<main><p>Body &amp; more</p></main>" in html
+    assert "<p>x &lt; y</p>" in html
+
+
+def test_layouts_are_compiled_once_and_can_extend_siblings(tmp_path):
+    from markpost.templates import LayoutCache
+
+    (tmp_path / "base.html").write_text("<nav>Home</nav>{% block body %}{% endblock %}")
+    layout = tmp_path / "post.html"
+    layout.write_text('{% extends "base.html" %}{% block body %}<article>{{ content }}</article>{% endblock %}')
+
+    cache = LayoutCache()
+    assert cache.get(layout) is cache.get(str(layout))
+    assert cache.render(layout, "<p>Hi</p>") == "<nav>Home</nav><article><p>Hi</p></article>"
+
+
+def test_edited_layout_is_recompiled(tmp_path):
+    import os
+
+    from markpost.templates import LayoutCache
+
+    layout = tmp_path / "post.html"
+    layout.write_text("v1 {{ content }}")
+    cache = LayoutCache()
+    assert cache.render(layout, "x") == "v1 x"
+
+    layout.write_text("v2 {{ content }}")
+    stat = layout.stat()
+    os.utime(layout, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert cache.render(layout, "x") == "v2 x"
+
+
+def test_excerpt_takes_first_paragraph_at_a_word_boundary():
+    from markpost.templates import excerpt
+
+    assert excerpt("First line\ncontinues.\n\nSecond paragraph.") == "First line continues."
+    assert excerpt("word " * 100, limit=22) == "word word word word…"
@@ -57,3 +57,200 @@ async def test_post_thread_chain():
 
     assert result == ["post_1", "post_2"]
     assert mock_client.post.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_post_uses_supplied_client():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123")
+
+    create_resp = MagicMock()
+    create_resp.json.return_value = {"id": "container_1"}
+    publish_resp = MagicMock()
+    publish_resp.json.return_value = {"id": "post_1"}
+
+    client = AsyncMock()
+    client.post.side_effect = [create_resp, publish_resp]
+
+    with patch("markpost.publishers.threads.httpx.AsyncClient") as MockClient:
+        result = await post_to_threads(["Hello"], config, client=client)
+
+    MockClient.assert_not_called()
+    assert result == ["post_1"]
+
+
+class FakeThreadsAPI:
+    """Minimal stand-in for the Threads create/publish/status endpoints."""
+
+    def __init__(self, statuses=None, create_delay=0.0):
+        self.calls = []
+        self.statuses = list(statuses or [])
+        self.create_delay = create_delay
+        # Most container creates in flight at once
+        self.peak_creates = 0
+        self._creating = 0
+        self._containers = 0
+        self._posts = 0
+
+    def _response(self, payload):
+        resp = MagicMock()
+        resp.json.return_value = payload
+        return resp
+
+    async def post(self, url, params):
+        import asyncio
+
+        if url.endswith("/threads"):
+            self.calls.append(("create", params.get("reply_to_id")))
+            self._creating += 1
+            self.peak_creates = max(self.peak_creates, self._creating)
+            try:
+                await asyncio.sleep(self.create_delay)
+            finally:
+                self._creating -= 1
+            self._containers += 1
+            return self._response({"id": f"container_{self._containers}"})
+        self._posts += 1
+        self.calls.append(("publish", params["creation_id"]))
+        return self._response({"id": f"post_{self._posts}"})
+
+    async def get(self, url, params):
+        self.calls.append(("status", url.rsplit("/", 1)[-1]))
+        status = self.statuses.pop(0) if self.statuses else "FINISHED"
+        return self._response({"status": status})
+
+
+@pytest.mark.asyncio
+async def test_pipelined_replies_attach_to_first_post():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123", pipeline=True)
+    api = FakeThreadsAPI()
+
+    result = await post_to_threads(["One", "Two", "Three", "Four"], config, client=api)
+
+    assert result == ["post_1", "post_2", "post_3", "post_4"]
+    creates = [reply_to for kind, reply_to in api.calls if kind == "create"]
+    assert creates == [None, "post_1", "post_1", "post_1"]
+
+
+@pytest.mark.asyncio
+async def test_pipelined_creates_reply_containers_concurrently():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123", pipeline=True, max_concurrency=4)
+    api = FakeThreadsAPI(create_delay=0.01)
+
+    result = await post_to_threads([f"Part {i}" for i in range(10)], config, client=api)
+
+    assert len(result) == 10
+    # Reply containers are created side by side, up to max_concurrency
+    assert api.peak_creates == 4
+
+
+@pytest.mark.asyncio
+async def test_pipelined_failure_leaves_no_reply_tasks_behind():
+    import asyncio
+
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    class FirstReplyRejected(FakeThreadsAPI):
+        async def post(self, url, params):
+            if url.endswith("/threads") and params.get("reply_to_id"):
+                self._replies = getattr(self, "_replies", 0) + 1
+                if self._replies == 1:
+                    raise RuntimeError("container rejected")
+                await asyncio.sleep(10)
+            return await super().post(url, params)
+
+    config = ThreadsConfig(access_token="tok", user_id="123", pipeline=True, max_concurrency=4)
+
+    with pytest.raises(RuntimeError, match="container rejected"):
+        await post_to_threads(["One", "Two", "Three", "Four"], config, client=FirstReplyRejected())
+
+    # The other replies were cancelled and awaited before the error propagated
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_polls_container_status_before_publishing():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123", poll_interval=0.01)
+    api = FakeThreadsAPI(statuses=["IN_PROGRESS", "FINISHED"])
+
+    result = await post_to_threads(["Hello"], config, client=api)
+
+    assert result == ["post_1"]
+    assert api.calls == [
+        ("create", None),
+        ("status", "container_1"),
+        ("status", "container_1"),
+        ("publish", "container_1"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_errored_container_is_not_published():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123", poll_interval=0.01)
+    api = FakeThreadsAPI(statuses=["ERROR"])
+
+    with pytest.raises(RuntimeError, match="ERROR"):
+        await post_to_threads(["Hello"], config, client=api)
+
+    assert not any(kind == "publish" for kind, _ in api.calls)
+
+
+@pytest.mark.asyncio
+async def test_resumes_chain_after_posted_parts():
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+
+    config = ThreadsConfig(access_token="tok", user_id="123")
+    api = FakeThreadsAPI()
+    posted = []
+
+    result = await post_to_threads(
+        ["One", "Two", "Three"],
+        config,
+        client=api,
+        resume_from=["old_1", "old_2"],
+        on_posted=lambda index, post_id: posted.append((index, post_id)),
+    )
+
+    assert result == ["old_1", "old_2", "post_1"]
+    assert api.calls == [("create", "old_2"), ("publish", "container_1")]
+    assert posted == [(2, "post_1")]
+
+
+@pytest.mark.asyncio
+async def test_throttled_publish_is_retried():
+    import httpx
+
+    from markpost.config import ThreadsConfig
+    from markpost.publishers.threads import post_to_threads
+    from markpost.ratelimit import TokenBucket
+
+    request = httpx.Request("POST", "https://graph.threads.net")
+    responses = [
+        httpx.Response(200, json={"id": "container_1"}, request=request),
+        httpx.Response(429, headers={"retry-after": "0"}, request=request),
+        httpx.Response(200, json={"id": "post_1"}, request=request),
+    ]
+    client = AsyncMock()
+    client.post.side_effect = responses
+
+    config = ThreadsConfig(access_token="tok", user_id="123")
+    result = await post_to_threads(["Hello"], config, client=client, bucket=TokenBucket(10, 10))
+
+    assert result == ["post_1"]
+    assert client.post.call_count == 3
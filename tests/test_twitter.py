@@ -1,52 +1,187 @@
 # tests/test_twitter.py
-from unittest.mock import MagicMock, patch, call
+import json
+from unittest.mock import patch
 
+import httpx
+import pytest
 
-def test_post_single_tweet():
+
+def _config():
     from markpost.config import TwitterConfig
+
+    return TwitterConfig(
+        consumer_key="k", consumer_secret="s",
+        access_token="a", access_token_secret="as",
+    )
+
+
+def _twitter(responses):
+    """An httpx client whose requests are recorded and answered from responses in turn."""
+    requests = []
+    replies = iter(responses)
+
+    def handle(request):
+        requests.append(request)
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle)), requests
+
+
+def _created(tweet_id, headers=None):
+    return httpx.Response(201, json={"data": {"id": tweet_id, "text": ""}}, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_post_single_tweet():
     from markpost.publishers.twitter import post_to_twitter
 
-    mock_response = MagicMock()
-    mock_response.data = {"id": "111"}
+    client, requests = _twitter([_created("111")])
+    result = await post_to_twitter(["Hello world"], _config(), client=client)
 
-    with patch("markpost.publishers.twitter.tweepy.Client") as MockClient:
-        client = MockClient.return_value
-        client.create_tweet.return_value = mock_response
+    assert result == ["111"]
+    [request] = requests
+    assert request.method == "POST"
+    assert str(request.url) == "https://api.twitter.com/2/tweets"
+    assert json.loads(request.content) == {"text": "Hello world"}
+    assert request.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_requests_are_signed_with_oauth1_user_credentials():
+    from markpost.publishers.twitter import post_to_twitter
 
-        config = TwitterConfig(
-            consumer_key="k", consumer_secret="s",
-            access_token="a", access_token_secret="as",
-        )
-        result = post_to_twitter(["Hello world"], config)
+    client, requests = _twitter([_created("111"), _created("222")])
+    await post_to_twitter(["Part 1", "Part 2"], _config(), client=client)
 
-    client.create_tweet.assert_called_once_with(text="Hello world")
+    first, second = (request.headers["authorization"] for request in requests)
+    assert first.startswith("OAuth ")
+    assert 'oauth_consumer_key="k"' in first
+    assert 'oauth_token="a"' in first
+    assert 'oauth_signature_method="HMAC-SHA1"' in first
+    # Fresh nonce per request
+    assert first != second
+
+
+@pytest.mark.asyncio
+async def test_post_thread():
+    from markpost.publishers.twitter import post_to_twitter
+
+    client, requests = _twitter([_created("111"), _created("222"), _created("333")])
+    result = await post_to_twitter(["Part 1", "Part 2", "Part 3"], _config(), client=client)
+
+    assert result == ["111", "222", "333"]
+    assert [json.loads(request.content) for request in requests] == [
+        {"text": "Part 1"},
+        {"text": "Part 2", "reply": {"in_reply_to_tweet_id": "111"}},
+        {"text": "Part 3", "reply": {"in_reply_to_tweet_id": "222"}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_post_opens_a_client_when_none_is_supplied():
+    from markpost.publishers.twitter import post_to_twitter
+
+    client, requests = _twitter([_created("111")])
+    with patch("markpost.publishers.twitter.httpx.AsyncClient", return_value=client) as MockClient:
+        result = await post_to_twitter(["Hello world"], _config())
+
+    MockClient.assert_called_once()
     assert result == ["111"]
+    assert client.is_closed
 
 
-def test_post_thread():
-    from markpost.config import TwitterConfig
+@pytest.mark.asyncio
+async def test_post_resumes_after_posted_parts():
     from markpost.publishers.twitter import post_to_twitter
 
-    responses = []
-    for tweet_id in ["111", "222", "333"]:
-        r = MagicMock()
-        r.data = {"id": tweet_id}
-        responses.append(r)
-
-    with patch("markpost.publishers.twitter.tweepy.Client") as MockClient:
-        client = MockClient.return_value
-        client.create_tweet.side_effect = responses
-
-        config = TwitterConfig(
-            consumer_key="k", consumer_secret="s",
-            access_token="a", access_token_secret="as",
-        )
-        result = post_to_twitter(["Part 1", "Part 2", "Part 3"], config)
-
-    assert client.create_tweet.call_count == 3
-    # First tweet has no reply
-    client.create_tweet.assert_any_call(text="Part 1")
-    # Subsequent tweets reply to the previous
-    client.create_tweet.assert_any_call(text="Part 2", in_reply_to_tweet_id="111")
-    client.create_tweet.assert_any_call(text="Part 3", in_reply_to_tweet_id="222")
+    client, requests = _twitter([_created("333")])
+    posted = []
+
+    result = await post_to_twitter(
+        ["Part 1", "Part 2", "Part 3"],
+        _config(),
+        client=client,
+        resume_from=["111", "222"],
+        on_posted=lambda index, tweet_id: posted.append((index, tweet_id)),
+    )
+
+    [request] = requests
+    assert json.loads(request.content) == {"text": "Part 3", "reply": {"in_reply_to_tweet_id": "222"}}
     assert result == ["111", "222", "333"]
+    assert posted == [(2, "333")]
+
+
+@pytest.mark.asyncio
+async def test_post_retries_server_errors():
+    from markpost.publishers.twitter import post_to_twitter
+
+    client, requests = _twitter([httpx.ConnectError("reset"), httpx.Response(503), _created("111")])
+    with patch("markpost.retry.asyncio.sleep"):
+        result = await post_to_twitter(["Hello"], _config(), client=client)
+
+    assert result == ["111"]
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_post_does_not_retry_client_errors():
+    from markpost.publishers.twitter import post_to_twitter
+
+    client, requests = _twitter([httpx.Response(403, json={"detail": "duplicate content"})])
+    with pytest.raises(httpx.HTTPStatusError):
+        await post_to_twitter(["Hello"], _config(), client=client)
+
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_post_waits_out_rate_limit():
+    from markpost.publishers.twitter import post_to_twitter
+    from markpost.ratelimit import TokenBucket
+
+    client, requests = _twitter([
+        httpx.Response(429, headers={"retry-after": "7"}),
+        _created("111", headers={"x-rate-limit-remaining": "40", "x-rate-limit-reset": "9999999999"}),
+    ])
+    bucket = TokenBucket(capacity=10, period=10)
+
+    with patch("markpost.publishers.twitter.asyncio.sleep") as mock_sleep:
+        result = await post_to_twitter(["Hello"], _config(), client=client, bucket=bucket)
+
+    assert result == ["111"]
+    assert len(requests) == 2
+    assert mock_sleep.call_args_list[-1][0][0] > 6
+
+
+@pytest.mark.asyncio
+async def test_concurrent_threads_share_the_client_without_serializing():
+    import asyncio
+
+    from markpost.publishers.twitter import post_to_twitter
+
+    ids = iter(range(100))
+    in_flight = 0
+    peak = 0
+
+    async def slow_api(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            in_flight -= 1
+        return _created(str(next(ids)))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_api))
+    first, second = await asyncio.gather(
+        post_to_twitter(["A1", "A2"], _config(), client=client),
+        post_to_twitter(["B1", "B2"], _config(), client=client),
+    )
+
+    assert len(first) == len(second) == 2
+    # Both threads had a request open at once
+    assert peak > 1